@@ -34,6 +34,7 @@ def get_category_data(parent_category):
     FROM categories c
     JOIN publication_counts pc ON c.id = pc.category_id
     WHERE c.parent_category = ?
+    AND pc.year * 100 + pc.month < CAST(strftime('%Y%m', 'now') AS INTEGER)
     ORDER BY c.id, pc.year, pc.month
     """
     df = pd.read_sql_query(query, conn, params=(parent_category,))
@@ -50,6 +51,7 @@ def get_cross_category_data(categories):
     FROM categories c
     JOIN publication_counts pc ON c.id = pc.category_id
     WHERE c.id IN ({placeholders})
+    AND pc.year * 100 + pc.month < CAST(strftime('%Y%m', 'now') AS INTEGER)
     ORDER BY c.id, pc.year, pc.month
     """
     df = pd.read_sql_query(query, conn, params=categories)
@@ -20,6 +20,7 @@ def get_math_data():
     FROM categories c
     JOIN publication_counts pc ON c.id = pc.category_id
     WHERE c.parent_category = 'math'
+    AND pc.year * 100 + pc.month < CAST(strftime('%Y%m', 'now') AS INTEGER)
     ORDER BY c.id, pc.year, pc.month
     """
 
@@ -1,35 +1,64 @@
 import httpx
 import asyncio
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
 import aiosqlite
-from database import DATABASE_PATH, ARXIV_CATEGORIES
+from database import (
+    DATABASE_PATH, ARXIV_CATEGORIES, CATEGORY_BIT, PaperLedger,
+    CountWriter, rebuild_daily_counts, tune_for_writes, write_counts
+)
+from nowcast import update_nowcasts
+from rate_control import AdaptiveRateLimiter, parse_retry_after
+from page_archive import PAGE_ARCHIVE_DIR, PageArchive
+from http_transport import TransportStats, build_client
+from checkpoint_log import CHECKPOINT_DIR, CheckpointLog
+from harvest_shards import (
+    LEASE_RENEW_INTERVAL, HarvestShard, ShardQueue, process_name
+)
+from count_matrix import CountMatrix
+from loop_monitor import LoopLagMonitor
+from harvest_metrics import HarvestMetrics
+from memory_budget import MemoryBudget, MemoryProfiler
+from oai_parser import (
+    DigestSpec, HeaderRecord, OAIPageParser, PageDigest,
+    digest_page, digest_records
+)
 import logging
 import json
-import re
+import multiprocessing
+import time
+import zlib
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 
-# Configure file-based logging for overnight runs
 LOG_DIR = Path(__file__).parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
-
-log_file = LOG_DIR / f"sync_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-
-# Set up both console and file logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(log_file)
-    ]
-)
 logger = logging.getLogger(__name__)
+log_file: Path | None = None
+
 
-# Checkpoint file for resume capability
-CHECKPOINT_FILE = Path(__file__).parent / "sync_checkpoint.json"
+def configure_logging() -> Path:
+    """
+    Log to the console and to a new file in LOG_DIR, for overnight runs.
+
+    Entry points call this rather than it running on import: spawned
+    parse-pool workers re-import the parent's main module, and with it this
+    one, and must not open log files of their own.
+    """
+    global log_file
+    if log_file is None:
+        LOG_DIR.mkdir(exist_ok=True)
+        log_file = LOG_DIR / f"sync_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.StreamHandler(),
+                logging.FileHandler(log_file)
+            ]
+        )
+    return log_file
 
 # OAI-PMH base URL (use the new endpoint directly to avoid redirect overhead)
 OAI_BASE_URL = "https://oaipmh.arxiv.org/oai"
@@ -39,11 +68,43 @@ OAI_NS = {
     "oai": "http://www.openarchives.org/OAI/2.0/",
 }
 
+# Top-level OAI-PMH sets harvested by a sync
+PARENT_SETS = ["cs", "econ", "eess", "math", "physics", "q-bio", "q-fin", "stat"]
+ALL_SETS = "all"  # cursor name for a single-pass harvest without a set filter
+
 # Configuration
 MAX_RETRIES = 5
 INITIAL_RETRY_DELAY = 5  # seconds
 REQUEST_TIMEOUT = 120  # seconds (OAI-PMH can be slow)
-RATE_LIMIT_DELAY = 3  # seconds between requests
+RATE_LIMIT_DELAY = 3  # seconds between requests (shared by all cursors)
+MAX_REQUEST_INTERVAL = 30  # slowest pacing adaptive rate control backs off to
+MAX_THROTTLE_WAITS = 20  # Retry-After responses honoured per page before giving up
+SYNC_CONCURRENCY = 2  # parent-set cursors harvested at once
+STREAM_PARSE = True  # parse pages incrementally from the byte stream
+PREFETCH_DEPTH = 2  # pages buffered between the fetch and count stages
+# Datestamp windows harvested in parallel by a full sync, per parent set
+SET_SHARDS = {"cs": 3, "physics": 3}
+ARCHIVE_PAGES = False  # keep a compressed copy of every page for offline replay
+COUNT_WRITE_QUEUE = 4  # finished parent sets waiting for the count writer
+# Where pages are parsed and counted: "process", "thread" or None (on the
+# event loop). A pool keeps parsing from delaying API requests during syncs.
+PARSE_POOL = "process"
+PARSE_WORKERS = 2
+# Sharded full sync: datestamp windows per parent set, leased by any worker
+SHARDS_PER_SET = 4
+SHARD_POLL_INTERVAL = 5.0  # seconds between checks on shards leased elsewhere
+# Full-history backfill: first year of arXiv, sharded by datestamp year.
+# The OAI-PMH repository's datestamps start in 2007 (older records were
+# restamped then), so earlier years share the first shard.
+BACKFILL_START_YEAR = 1991
+OAI_EARLIEST_YEAR = 2007
+# Full syncs: MB of count accumulators held before they spill to disk (None:
+# unbounded), and whether to log tracemalloc allocations per pipeline phase
+MEMORY_BUDGET_MB = None
+TRACE_MEMORY = False
+# Single-category refresh: months recounted, the current one included
+REFRESH_MONTHS = 3
+MAX_REFRESH_MONTHS = 60
 
 # Map category IDs to OAI-PMH set specs - ALL categories
 CATEGORY_TO_SETSPEC = {
@@ -213,39 +274,297 @@ CATEGORY_TO_SETSPEC = {
 }
 
 
-def parse_arxiv_id_date(identifier: str) -> tuple[int, int] | None:
-    """Extract submission year/month from arXiv identifier.
+SETSPEC_TO_CATEGORY = {setspec: cat_id for cat_id, setspec in CATEGORY_TO_SETSPEC.items()}
+# Column order of every CountMatrix the collector builds
+CATEGORY_INDEX = tuple(sorted(CATEGORY_TO_SETSPEC))
+SETSPEC_COLUMN = {CATEGORY_TO_SETSPEC[cat_id]: i for i, cat_id in enumerate(CATEGORY_INDEX)}
+SETSPEC_BIT = {
+    setspec: CATEGORY_BIT[cat_id] for setspec, cat_id in SETSPEC_TO_CATEGORY.items()
+    if cat_id in CATEGORY_BIT
+}
+
+
+class ResumptionTokenExpired(Exception):
+    """The server no longer accepts a resumption token (badResumptionToken)."""
+
+
+class PageFetchFailed(Exception):
+    """A page of a resumption-token chain could not be fetched, even after retries."""
+
+
+@dataclass
+class OAIPage:
+    """Result of harvesting a single ListIdentifiers page."""
+    records: list[HeaderRecord] = field(default_factory=list)
+    token: str | None = None
+    error_code: str | None = None
+    complete_list_size: int | None = None
+    cursor: int | None = None
+    bytes_received: int = 0  # decoded body size
+    wire_bytes: int = 0  # as transferred, before content decoding
+    wait_seconds: float = 0.0  # time spent waiting on the rate limiter
+    parse_seconds: float = 0.0  # time spent in the streaming parser
+    raw: bytes | None = None  # gzip-compressed body, only kept when archiving
+    digest: PageDigest | None = None  # counts etc.; records stay empty when set
 
-    ArXiv IDs follow the format YYMM.xxxxx (since April 2007).
-    For example: oai:arXiv.org:2401.12345 -> (2024, 1) for January 2024
 
-    Returns (year, month) or None if can't parse.
+@dataclass
+class PipelineStats:
+    """Wall-clock accounting for one fetch/count page pipeline."""
+    fetch_seconds: float = 0.0  # waiting on the server
+    wait_seconds: float = 0.0  # waiting on the rate limiter
+    count_seconds: float = 0.0  # counting records
+    wall_seconds: float = 0.0
+
+    @property
+    def serial_seconds(self) -> float:
+        """Time the same work would take with no overlap between stages."""
+        return self.fetch_seconds + self.wait_seconds + self.count_seconds
+
+    @property
+    def saved_seconds(self) -> float:
+        return max(0.0, self.serial_seconds - self.wall_seconds)
+
+    def summary(self) -> str:
+        pct = self.saved_seconds / self.serial_seconds * 100 if self.serial_seconds else 0.0
+        return (
+            f"fetch {self.fetch_seconds:.1f}s, rate-limit wait {self.wait_seconds:.1f}s, "
+            f"count {self.count_seconds:.1f}s, wall {self.wall_seconds:.1f}s "
+            f"(overlap saved {self.saved_seconds:.1f}s, {pct:.0f}%)"
+        )
+
+
+class SinglePassSavings:
     """
-    match = re.search(r'(\d{4})\.\d+', identifier)
-    if match:
-        yymm = match.group(1)
-        yy = int(yymm[:2])
-        mm = int(yymm[2:])
-        # 2-digit year: 07+ maps to 2007+
-        year = 2000 + yy
-        if 1 <= mm <= 12:
-            return (year, mm)
-    return None
+    Compare a single unfiltered harvest with the per-parent loop.
 
+    The per-parent loop downloads a header once for every parent set it
+    is listed in, so cross-listed papers are fetched several times. From the
+    setSpecs seen in the single pass we can work out how many headers,
+    pages and bytes the per-parent loop would have needed.
+    """
 
-class ArxivCollector:
     def __init__(self):
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=30.0),
-            follow_redirects=True
+        self.pages = 0
+        self.records = 0
+        self.bytes = 0
+        self.page_size = 0
+        self.parent_records: dict[str, int] = defaultdict(int)
+
+    def observe(self, page: "OAIPage"):
+        """Account for a page; its digest must tally records per parent set."""
+        digest = page.digest
+        self.pages += 1
+        self.records += digest.records
+        self.bytes += page.bytes_received
+        self.page_size = max(self.page_size, digest.records)
+        for parent, n in digest.parent_records.items():
+            self.parent_records[parent] += n
+
+    def report(self) -> dict:
+        page_size = self.page_size or 1
+        bytes_per_record = self.bytes / self.records if self.records else 0
+        per_parent_records = sum(self.parent_records.values())
+        per_parent_pages = sum(
+            -(-n // page_size) for n in self.parent_records.values()
+        )
+        per_parent_bytes = int(per_parent_records * bytes_per_record)
+        return {
+            "pages": self.pages,
+            "records": self.records,
+            "bytes": self.bytes,
+            "per_parent_pages": per_parent_pages,
+            "per_parent_records": per_parent_records,
+            "per_parent_bytes": per_parent_bytes,
+            "pages_saved": per_parent_pages - self.pages,
+            "bytes_saved": per_parent_bytes - self.bytes,
+        }
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Retry-After of a 429/503 response, or None for any other error."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    if error.response.status_code not in (429, 503):
+        return None
+    return parse_retry_after(error.response.headers.get("Retry-After"))
+
+
+def header_record_from_element(header: ET.Element) -> HeaderRecord:
+    """Convert a <header> from a fully parsed page into a HeaderRecord."""
+    identifier = header.find("oai:identifier", OAI_NS)
+    datestamp = header.find("oai:datestamp", OAI_NS)
+    return HeaderRecord(
+        identifier.text or "" if identifier is not None else "",
+        datestamp.text or "" if datestamp is not None else "",
+        tuple(s.text for s in header.findall("oai:setSpec", OAI_NS) if s.text),
+        header.get("status") == "deleted",
+    )
+
+
+def refresh_window(months: int, now: datetime | None = None) -> tuple[tuple[int, int], tuple[int, int]]:
+    """First and last month of a refresh of the last `months` months."""
+    now = now or datetime.now()
+    first = now.year * 12 + now.month - 1 - (months - 1)
+    return (first // 12, first % 12 + 1), (now.year, now.month)
+
+
+def set_columns(setspec: str) -> dict[str, int]:
+    """Columns of a set and the sets below it (cs:cs:LG, or every cs:* for cs)."""
+    return {
+        spec: column for spec, column in SETSPEC_COLUMN.items()
+        if spec == setspec or spec.startswith(f"{setspec}:")
+    }
+
+
+def effective_watermarks(watermarks: dict[str, str]) -> dict[str, str]:
+    """
+    Watermark of every parent set and of ALL_SETS, given that a single-pass
+    harvest covers every set and that the parent sets together cover all of
+    them. Sets without any watermark are left out.
+    """
+    shared = watermarks.get(ALL_SETS, "")
+    effective = {
+        p: mark for p in PARENT_SETS
+        if (mark := max(watermarks.get(p, ""), shared))
+    }
+    if len(effective) == len(PARENT_SETS):
+        effective[ALL_SETS] = min(effective[p] for p in PARENT_SETS)
+    elif shared:
+        effective[ALL_SETS] = shared
+    return effective
+
+
+def new_counts(start: tuple[int, int], end: tuple[int, int]) -> CountMatrix:
+    """Empty counts over every category for months start..end."""
+    return CountMatrix(CATEGORY_INDEX, start, end)
+
+
+def plan_windows(
+    first: date,
+    last: date,
+    shards: int,
+    density: dict[str, int]
+) -> list[tuple[date, date | None]]:
+    """
+    Split the datestamp range [first, last] into `shards` windows.
+
+    `density` maps "YYYY-MM" to the number of records with a datestamp in
+    that month, as seen by earlier harvests. Each window gets roughly the
+    same share of the expected records; months with no history are
+    weighted like an average month. Windows are inclusive and
+    non-overlapping. The last one is left open-ended (until=None) so records
+    stamped after `last` are not missed.
+    """
+    days = (last - first).days + 1
+    if shards <= 1 or days < shards:
+        return [(first, None)]
+
+    known = [n for n in density.values() if n > 0]
+    default = sum(known) / len(known) if known else 1.0
+
+    # Spread each month's records evenly over its days
+    weights = []
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        month_days = ((day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).day
+        weights.append(density.get(day.strftime("%Y-%m"), default) / month_days)
+
+    target = sum(weights) / shards
+    windows = []
+    window_start = 0
+    acc = 0.0
+    for offset, weight in enumerate(weights):
+        acc += weight
+        if acc >= target and len(windows) < shards - 1 and offset < days - 1:
+            windows.append((first + timedelta(days=window_start), first + timedelta(days=offset)))
+            window_start = offset + 1
+            acc = 0.0
+    windows.append((first + timedelta(days=window_start), None))
+    return windows
+
+
+def year_windows(
+    first_year: int,
+    last: date,
+    earliest_year: int = OAI_EARLIEST_YEAR
+) -> list[tuple[date, date | None]]:
+    """
+    One datestamp window per calendar year from `first_year` to `last`.
+    Years before `earliest_year` hold no datestamps and share the first
+    window. Like plan_windows, the last window is open-ended.
+    """
+    head = max(first_year, earliest_year)
+    windows = [(date(first_year, 1, 1), date(head, 12, 31))]
+    windows += [(date(year, 1, 1), date(year, 12, 31)) for year in range(head + 1, last.year + 1)]
+    windows[-1] = (windows[-1][0], None)
+    return windows
+
+
+class ArxivCollector:
+    def __init__(
+        self,
+        stream_parse: bool = STREAM_PARSE,
+        archive_pages: bool = ARCHIVE_PAGES,
+        replay: bool = False,
+        base_url: str = OAI_BASE_URL,
+        parse_pool: str | None = PARSE_POOL,
+        archive_dir: Path = PAGE_ARCHIVE_DIR,
+        checkpoint_dir: Path = CHECKPOINT_DIR
+    ):
+        # Created on first use, so the module-level singleton costs nothing to
+        # build in processes that never fetch (spawned parse-pool workers)
+        self._client: httpx.AsyncClient | None = None
+        self.transport_stats = TransportStats()
+        # How long the event loop was blocked during the current sync
+        self.loop_lag = LoopLagMonitor()
+        # Throughput, waste and ETA of the current sync
+        self.metrics = HarvestMetrics()
+        # Set for a full sync with a memory budget
+        self.memory_budget: MemoryBudget | None = None
+        self.memory_profiler = MemoryProfiler()
+        self.base_url = base_url
+        self.stream_parse = stream_parse
+        # "process", "thread" or None; pages are parsed and counted off the event loop
+        self.parse_pool_kind = parse_pool
+        self._parse_pool: Executor | None = None
+        # Replay mode counts pages from the archive instead of the network
+        self.replay = replay
+        self.archive = PageArchive(archive_dir) if archive_pages or replay else None
+        self.archive_pages = archive_pages and not replay
+        self.checkpoint_dir = checkpoint_dir
+        self._sync_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+        # Kind of the running harvest, recorded with its archived runs
+        self._harvest_kind: str | None = None
+        # One limiter for every cursor keeps the combined rate within policy;
+        # it slows down when the server pushes back and pauses on error spikes
+        self.rate_limiter = AdaptiveRateLimiter(
+            max_rate=1 / RATE_LIMIT_DELAY, min_rate=1 / MAX_REQUEST_INTERVAL
         )
         self._is_syncing = False
         self._sync_progress = ""
         self._current = 0
         self._total = 0
+        self._cursors: dict[str, dict] = {}
+        self.single_pass_report: dict | None = None
+        self._ledger_changes = 0
+        # Page-level checkpoint log of the full sync in progress
+        self._checkpoint: CheckpointLog | None = None
+        # Records per datestamp month seen this sync, per cursor
+        self._density: dict[str, dict[str, int]] = {}
         self._errors = 0
         self._successful = 0
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = build_client(httpx.Timeout(REQUEST_TIMEOUT, connect=30.0))
+        return self._client
+
+    @client.setter
+    def client(self, client: httpx.AsyncClient):
+        self._client = client
+
     @property
     def is_syncing(self) -> bool:
         return self._is_syncing
@@ -262,23 +581,58 @@ class ArxivCollector:
     def total(self) -> int:
         return self._total
 
+    @property
+    def cursors(self) -> list[dict]:
+        return [dict(c) for c in self._cursors.values()]
+
+    def status_snapshot(self) -> dict:
+        """Progress of the current sync, as stored with its sync job."""
+        return {
+            "progress": self._sync_progress,
+            "current": self._current,
+            "total": self._total,
+            "cursors": self.cursors,
+            "transport": self.transport_stats.report(),
+            "loop_lag": self.loop_lag.report(),
+            "metrics": self.metrics.report(
+                unstarted_chains=sum(1 for c in self._cursors.values() if c["status"] == "pending")
+            ),
+        }
+
     async def close(self):
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
 
     async def fetch_oai_page(
         self,
-        params: dict,
-        retry_count: int = 0
+        params: dict
     ) -> tuple[ET.Element | None, str | None]:
         """
         Fetch a single OAI-PMH page with retry logic.
         Returns (xml_root, resumption_token) tuple.
         """
-        try:
-            response = await self.client.get(OAI_BASE_URL, params=params)
-            response.raise_for_status()
-
-            root = ET.fromstring(response.text)
+        failures = throttles = 0
+        while True:
+            await self.rate_limiter.acquire()
+            try:
+                response = await self.client.get(
+                    self.base_url, params=params,
+                    extensions={"trace": self.transport_stats.trace()}
+                )
+                response.raise_for_status()
+                self.transport_stats.observe(response, len(response.content))
+                root = ET.fromstring(response.text)
+            except Exception as e:
+                retry = await self._retry_wait(e, failures, throttles)
+                if retry is None:
+                    return None, None
+                failures, throttles = retry
+                continue
+            self.rate_limiter.on_success()
 
             # Check for OAI-PMH errors
             error = root.find(".//oai:error", OAI_NS)
@@ -287,6 +641,8 @@ class ArxivCollector:
                 if error_code == "noRecordsMatch":
                     # No records for this query - not an error
                     return root, None
+                if error_code == "badResumptionToken":
+                    raise ResumptionTokenExpired(error.text)
                 logger.error(f"OAI-PMH error: {error_code} - {error.text}")
                 return None, None
 
@@ -296,164 +652,845 @@ class ArxivCollector:
 
             return root, token
 
-        except httpx.TimeoutException as e:
-            if retry_count < MAX_RETRIES:
-                delay = INITIAL_RETRY_DELAY * (2 ** retry_count)
-                logger.warning(f"Timeout, retrying in {delay}s... (attempt {retry_count + 1})")
-                await asyncio.sleep(delay)
-                return await self.fetch_oai_page(params, retry_count + 1)
-            logger.error(f"All retries failed due to timeout")
-            return None, None
+    async def _retry_wait(
+        self,
+        error: Exception,
+        failures: int,
+        throttles: int,
+        metrics: HarvestMetrics | None = None,
+        limiter: AdaptiveRateLimiter | None = None
+    ) -> tuple[int, int] | None:
+        """
+        Decide whether and when a failed request is retried.
 
-        except Exception as e:
-            if retry_count < MAX_RETRIES:
-                delay = INITIAL_RETRY_DELAY * (2 ** retry_count)
-                logger.warning(f"Error: {e}, retrying in {delay}s... (attempt {retry_count + 1})")
-                await asyncio.sleep(delay)
-                return await self.fetch_oai_page(params, retry_count + 1)
-            logger.error(f"All retries failed: {e}")
-            return None, None
+        A 429/503 with Retry-After holds every cursor for exactly as long as
+        the server asked and does not use up the retry budget. Other errors
+        back off exponentially and feed the circuit breaker. Returns the
+        updated (failures, throttles), or None when retries are exhausted.
+        The retry is recorded in `metrics` and `limiter`, by default the sync's.
+        """
+        metrics = metrics or self.metrics
+        limiter = limiter or self.rate_limiter
+        retry_after = _retry_after(error)
+        metrics.observe_retry(throttled=retry_after is not None)
+        if retry_after is not None and throttles < MAX_THROTTLE_WAITS:
+            limiter.on_throttle(retry_after)
+            logger.warning(
+                f"Server busy ({error.response.status_code}), retrying after {retry_after:.0f}s "
+                f"(pacing now {1 / limiter.rate:.1f}s per request)"
+            )
+            return failures, throttles + 1
+
+        limiter.on_failure()
+        reason = "Timeout" if isinstance(error, httpx.TimeoutException) else f"Error: {error}"
+        if failures < MAX_RETRIES:
+            delay = INITIAL_RETRY_DELAY * (2 ** failures)
+            logger.warning(f"{reason}, retrying in {delay}s... (attempt {failures + 1})")
+            await asyncio.sleep(delay)
+            return failures + 1, throttles
+        logger.error(f"All retries failed: {reason}")
+        return None
+
+    async def _iter_page_chunks(self, params: dict, page: OAIPage):
+        """
+        Stream the decoded body of one OAI-PMH page chunk by chunk.
+
+        Byte counts are recorded on `page`. When archiving, the body is
+        compressed as it arrives and stored as page.raw once complete, so an
+        archived page is never held uncompressed.
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if self.archive_pages else None
+        compressed = []
+        async with self.client.stream(
+            "GET", self.base_url, params=params,
+            extensions={"trace": self.transport_stats.trace()}
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                page.bytes_received += len(chunk)
+                if compressor is not None:
+                    compressed.append(compressor.compress(chunk))
+                yield chunk
+            page.wire_bytes = response.num_bytes_downloaded
+            self.transport_stats.observe(response, page.bytes_received)
+
+        if compressor is not None:
+            compressed.append(compressor.flush())
+            page.raw = b"".join(compressed)
+
+    async def iter_oai_headers(self, params: dict, page: OAIPage):
+        """
+        Stream a single OAI-PMH page, yielding header records as they arrive.
+
+        The response body is fed chunk by chunk into an incremental parser,
+        so the page is never held in memory as text or as a full tree.
+        Token, list size and error code are stored on `page` once the
+        stream has been consumed.
+        """
+        parser = OAIPageParser()
+        async for chunk in self._iter_page_chunks(params, page):
+            started = time.perf_counter()
+            records = parser.feed(chunk)
+            page.parse_seconds += time.perf_counter() - started
+            for record in records:
+                yield record
+        started = time.perf_counter()
+        records = parser.close()
+        page.parse_seconds += time.perf_counter() - started
+        for record in records:
+            yield record
+
+        page.token = parser.token
+        page.error_code = parser.error_code
+        page.complete_list_size = parser.complete_list_size
+        page.cursor = parser.cursor
+        if parser.error_code and parser.error_code != "noRecordsMatch":
+            logger.error(f"OAI-PMH error: {parser.error_code} - {parser.error_message}")
+
+    async def _read_page_digest(self, params: dict, page: OAIPage, spec: DigestSpec):
+        """
+        Read a page's body and have the parse pool parse and count it.
+
+        Only the raw bytes are handled on the event loop; page.digest holds
+        the result and page.records stays empty.
+        """
+        chunks = [chunk async for chunk in self._iter_page_chunks(params, page)]
+        digest = await self._digest_body(b"".join(chunks), spec)
+        page.digest = digest
+        page.token = digest.token
+        page.error_code = digest.error_code
+        page.complete_list_size = digest.complete_list_size
+        page.cursor = digest.cursor
+        if digest.error_code and digest.error_code != "noRecordsMatch":
+            logger.error(f"OAI-PMH error: {digest.error_code} - {digest.error_message}")
+
+    def _parse_executor(self) -> Executor | None:
+        """The parse pool, started on first use; None parses on the event loop."""
+        if self._parse_pool is None and self.parse_pool_kind == "process":
+            # spawn: forking a process that runs threads (aiosqlite) is unsafe
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        elif self._parse_pool is None and self.parse_pool_kind == "thread":
+            self._parse_pool = ThreadPoolExecutor(
+                max_workers=PARSE_WORKERS, thread_name_prefix="oai-parse"
+            )
+        return self._parse_pool
+
+    async def _digest_body(self, body: bytes, spec: DigestSpec) -> PageDigest:
+        """Parse and count a page body in the parse pool, or inline without one."""
+        pool = self._parse_executor()
+        if pool is None:
+            return digest_page(body, spec)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, digest_page, body, spec)
+        except BrokenExecutor as e:
+            # A dead pool is not a network failure; parse here from now on
+            logger.warning(f"Parse pool failed ({e!r}), parsing on the event loop instead")
+            self.parse_pool_kind = None
+            self._parse_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            return digest_page(body, spec)
+
+    async def fetch_oai_records(
+        self,
+        params: dict,
+        spec: DigestSpec | None = None,
+        metrics: HarvestMetrics | None = None,
+        limiter: AdaptiveRateLimiter | None = None
+    ) -> OAIPage | None:
+        """
+        Fetch a single OAI-PMH page in streaming mode, with retry logic.
+
+        A page is only returned once it has been read completely, so a
+        connection dropped mid-page is retried from the start of that page
+        rather than leaving a partial set of records behind.
+        With a `spec` and a parse pool, the page comes back digested rather
+        than as records.
+        Requests are paced by `limiter` and retries recorded in `metrics`,
+        by default the sync's own.
+        Returns None on an OAI-PMH error or when all retries fail, and
+        raises ResumptionTokenExpired if the server rejects the token.
+        """
+        limiter = limiter or self.rate_limiter
+        waited = 0.0
+        failures = throttles = 0
+        while True:
+            page = OAIPage()
+            waited += await limiter.acquire()
+            page.wait_seconds = waited
+            try:
+                if spec is not None and self.parse_pool_kind:
+                    await self._read_page_digest(params, page, spec)
+                else:
+                    async for record in self.iter_oai_headers(params, page):
+                        page.records.append(record)
+            except Exception as e:
+                retry = await self._retry_wait(e, failures, throttles, metrics, limiter)
+                if retry is None:
+                    return None
+                failures, throttles = retry
+                continue
+            limiter.on_success()
+
+            if page.error_code == "badResumptionToken":
+                raise ResumptionTokenExpired(params.get("resumptionToken"))
+            if page.error_code and page.error_code != "noRecordsMatch":
+                return None
+            return page
+
+    async def _fetch_page_records(self, params: dict, spec: DigestSpec | None = None) -> OAIPage | None:
+        """Fetch one page using the configured parse mode."""
+        if self.stream_parse:
+            return await self.fetch_oai_records(params, spec)
+
+        root, token = await self.fetch_oai_page(params)
+        if root is None:
+            return None
+        return OAIPage(
+            records=[header_record_from_element(h) for h in root.findall(".//oai:header", OAI_NS)],
+            token=token,
+        )
 
     async def count_papers_by_submission_date(
         self,
-        parent_set: str,
+        parent_set: str | None,
         start_year: int,
         start_month: int,
         end_year: int,
-        end_month: int
-    ) -> dict[tuple[int, int], dict[str, int]]:
+        end_month: int,
+        savings: SinglePassSavings | None = None,
+        on_page=None,
+        from_date: str | None = None,
+        until_date: str | None = None,
+        shards: int = 1,
+        replay_run: dict | None = None
+    ) -> CountMatrix:
         """
         Count papers by their actual submission date (from arXiv ID).
 
         Unlike OAI-PMH date filters (which use modification date), this method
-        extracts the submission year/month from the arXiv identifier (YYMM.xxxxx).
+        extracts the submission year/month from the arXiv identifier: YYMM.xxxxx
+        since April 2007, archive/YYMMxxx (e.g. hep-th/9108001) before that.
 
-        Returns dict mapping (year, month) -> {category_id: count}
-        """
-        # Build mapping from setSpec to category_id for this parent
-        setspec_to_category = {}
-        for cat_id, setspec in CATEGORY_TO_SETSPEC.items():
-            if setspec.startswith(f"{parent_set}:"):
-                setspec_to_category[setspec] = cat_id
+        With parent_set=None the whole archive is harvested without a set
+        filter and every header is counted in all of its categories.
+
+        `on_page(page)` is awaited for every page after it has been counted.
+        `from_date` (YYYY-MM-DD) overrides the datestamp the harvest starts
+        from; the newest datestamp seen is kept as the cursor's watermark.
+        `until_date` closes the datestamp range. With shards > 1 the range is
+        split into that many datestamp windows, harvested concurrently.
+
+        In replay mode no requests are made: the pages archived by the most
+        recent harvest of the set are counted instead.
 
-        # Counts: (year, month) -> category_id -> count
-        counts = defaultdict(lambda: defaultdict(int))
+        Returns a CountMatrix of papers per submission month and category.
+        """
+        if self.replay and replay_run is None:
+            return await self._count_replayed(
+                parent_set, start_year, start_month, end_year, end_month,
+                savings, on_page
+            )
+        if shards > 1 and not self.replay:
+            return await self._count_sharded(
+                parent_set, start_year, start_month, end_year, end_month,
+                savings, on_page, from_date, shards
+            )
+
+        # Columns of the setSpecs counted for this set
+        setspec_to_column = SETSPEC_COLUMN if parent_set is None else set_columns(parent_set)
+        cursor_name = parent_set or ALL_SETS
+        label = cursor_name if until_date is None else f"{cursor_name} [{from_date}..{until_date}]"
+        if replay_run is not None:
+            label = f"{label} (replay)"
+
+        # Under a memory budget the accumulator only grows to the months it has seen
+        budget = self.memory_budget
+        first = (start_year, start_month)
+        counts = new_counts(first, first if budget is not None else (end_year, end_month))
         total_records = 0
         pages = 0
+        cursor = self._cursors.get(cursor_name)
+        density = self._density.setdefault(cursor_name, defaultdict(int))
+        chain_density = defaultdict(int)
+        stats = PipelineStats()
+        started = time.monotonic()
+        watermark = ""
 
         # Query all records for this parent set
         # We use a date filter to avoid fetching very old records, but we'll
         # verify submission date from the arXiv ID
-        params = {
+        initial_params = {
             "verb": "ListIdentifiers",
             "metadataPrefix": "oai_dc",
-            "set": parent_set,
-            "from": f"{start_year}-{start_month:02d}-01",
+            "from": from_date or f"{start_year}-{start_month:02d}-01",
         }
+        if until_date is not None:
+            initial_params["until"] = until_date
+        if parent_set is not None:
+            initial_params["set"] = parent_set
+        params = initial_params
+        spec = DigestSpec(
+            CATEGORY_INDEX, setspec_to_column, (start_year, start_month), (end_year, end_month),
+            SETSPEC_BIT, tuple(PARENT_SETS) if savings is not None else ()
+        )
 
+        # Every counted page of a full sync is checkpointed, keyed by its chain
+        checkpoint = self._checkpoint if replay_run is None else None
+        chain_key = f"{cursor_name}|{initial_params['from']}|{until_date or ''}"
+        resumed = checkpoint.chain(chain_key) if checkpoint is not None else None
+        if resumed is not None:
+            counts.merge(checkpoint.chain_counts(chain_key), grow=True)
+            total_records = resumed["records"]
+            pages = resumed["pages"]
+            watermark = resumed["watermark"]
+            if cursor is not None:
+                cursor["pages"] += resumed["pages"]
+                cursor["records"] += resumed["records"]
+            if resumed["done"]:
+                logger.info(f"  {label}: already counted before the restart ({total_records} papers)")
+                if cursor is not None and watermark:
+                    cursor["watermark"] = max(cursor.get("watermark", ""), watermark)
+                return counts
+            logger.info(f"  {label}: resuming after page {pages} ({total_records} papers so far)")
+            params = {"verb": "ListIdentifiers", "resumptionToken": resumed["token"]}
+
+        if budget is not None:
+            budget.track(chain_key, counts)
+        restarts = 0
         while True:
-            pages += 1
-            root, token = await self.fetch_oai_page(params)
+            # Pages are fetched by a background producer; counting the current
+            # page overlaps with the request for the next one.
+            queue: asyncio.Queue = asyncio.Queue(maxsize=PREFETCH_DEPTH)
+            if replay_run is not None:
+                producer = asyncio.create_task(self._replay_pages(replay_run, queue, spec))
+            else:
+                # A chain resumed mid-way would only archive its tail
+                producer = asyncio.create_task(self._produce_pages(
+                    params, queue, stats, cursor_name,
+                    archive="resumptionToken" not in params, spec=spec
+                ))
 
-            if root is None:
+            try:
+                while True:
+                    page = await queue.get()
+                    if isinstance(page, BaseException):
+                        raise page
+
+                    if page is None:  # an archived run ended without a final page
+                        break
+                    pages += 1
+
+                    # Pages fetched through the parse pool arrive already counted
+                    count_started = time.monotonic()
+                    with self.memory_profiler.phase("parse"):
+                        digest = page.digest or digest_records(page.records, spec)
+                    page.digest = digest
+                    with self.memory_profiler.phase("merge"):
+                        # A spilled accumulator starts again from its first month
+                        counts.merge(digest.counts, grow=budget is not None)
+                    if budget is not None:
+                        budget.check()
+                    counted = digest.counted
+                    total_records += counted
+                    for month, n in digest.density.items():
+                        chain_density[month] += n
+                    count_seconds = time.monotonic() - count_started
+                    stats.count_seconds += count_seconds
+                    self.metrics.observe_page(
+                        chain_key, page, digest,
+                        page.parse_seconds + digest.parse_seconds + count_seconds
+                    )
+                    watermark = max(watermark, digest.watermark)
+                    if savings is not None:
+                        savings.observe(page)
+                    if on_page is not None:
+                        with self.memory_profiler.phase("merge"):
+                            await on_page(page)
+                    if checkpoint is not None:
+                        # Written after the ledger, so a resumed sync never skips a page
+                        await asyncio.to_thread(
+                            checkpoint.page, chain_key, cursor_name, page.token or None,
+                            digest.counts, counted, digest.watermark
+                        )
+
+                    # Several datestamp windows may feed the same cursor
+                    if cursor is not None:
+                        cursor["pages"] += 1
+                        cursor["records"] += counted
+
+                    if not page.token:
+                        break
+
+                    if pages % 10 == 0:
+                        logger.info(f"    {label}: processed {pages} pages, {total_records} records so far")
                 break
+            except ResumptionTokenExpired:
+                if restarts >= MAX_RETRIES:
+                    raise
+                restarts += 1
+                logger.warning(f"  {label}: resumption token expired, restarting the chain")
+                # Drop everything this chain counted and harvest it again
+                if cursor is not None:
+                    cursor["pages"] -= pages
+                    cursor["records"] -= total_records
+                if checkpoint is not None:
+                    await asyncio.to_thread(checkpoint.reset_chain, chain_key)
+                self.metrics.restart_chain(chain_key)
+                counts = counts.like()
+                if budget is not None:
+                    budget.release(chain_key)
+                    budget.track(chain_key, counts)
+                chain_density.clear()
+                total_records = 0
+                pages = 0
+                watermark = ""
+                params = initial_params
+            finally:
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+        for month, n in chain_density.items():
+            density[month] += n
+        stats.wall_seconds = time.monotonic() - started
+        if cursor is not None:
+            cursor["overlap_saved_seconds"] = round(
+                cursor["overlap_saved_seconds"] + stats.saved_seconds, 1
+            )
+            if watermark:
+                cursor["watermark"] = max(cursor.get("watermark", ""), watermark)
+        logger.info(f"  {label}: {total_records} papers in {pages} pages")
+        logger.info(f"  {label}: {stats.summary()}")
+        if budget is not None:
+            counts = budget.finish(
+                chain_key, counts, new_counts((start_year, start_month), (end_year, end_month))
+            )
+        return counts
 
-            # Process each record
-            for header in root.findall(".//oai:header", OAI_NS):
-                if header.get("status") == "deleted":
-                    continue
-
-                # Get the arXiv identifier
-                identifier = header.find("oai:identifier", OAI_NS)
-                if identifier is None or not identifier.text:
-                    continue
-
-                # Parse submission date from arXiv ID
-                submission_date = parse_arxiv_id_date(identifier.text)
-                if submission_date is None:
-                    continue
-
-                sub_year, sub_month = submission_date
-
-                # Check if submission is within our target range
-                if sub_year < start_year or (sub_year == start_year and sub_month < start_month):
-                    continue
-                if sub_year > end_year or (sub_year == end_year and sub_month > end_month):
-                    continue
+    async def _count_sharded(
+        self,
+        parent_set: str | None,
+        start_year: int,
+        start_month: int,
+        end_year: int,
+        end_month: int,
+        savings: SinglePassSavings | None,
+        on_page,
+        from_date: str | None,
+        shards: int
+    ) -> CountMatrix:
+        """
+        Harvest one set as several non-overlapping datestamp windows at once.
 
-                total_records += 1
-                key = (sub_year, sub_month)
+        Window boundaries follow the per-month record density seen in earlier
+        runs, so each window holds about the same number of records. All
+        windows share the global rate limiter; their counts are summed.
+        """
+        cursor_name = parent_set or ALL_SETS
+        first = date.fromisoformat(from_date) if from_date else date(start_year, start_month, 1)
+        stored = self._checkpoint.state["windows"].get(cursor_name) if self._checkpoint else None
+        if stored:
+            # A resumed sync must reuse the windows its checkpoints refer to
+            windows = [
+                (date.fromisoformat(a), date.fromisoformat(b) if b else None) for a, b in stored
+            ]
+        else:
+            density = await self._load_density(cursor_name)
+            windows = plan_windows(first, date.today(), shards, density)
+            if self._checkpoint is not None:
+                await asyncio.to_thread(self._checkpoint.windows, cursor_name, [
+                    [a.isoformat(), b.isoformat() if b else None] for a, b in windows
+                ])
+        logger.info(
+            f"  {cursor_name}: {len(windows)} datestamp windows "
+            + ", ".join(f"{a}..{b or 'now'}" for a, b in windows)
+        )
 
-                # Count for each category the paper belongs to
-                for setspec_elem in header.findall("oai:setSpec", OAI_NS):
-                    setspec = setspec_elem.text
-                    if setspec and setspec in setspec_to_category:
-                        cat_id = setspec_to_category[setspec]
-                        counts[key][cat_id] += 1
+        results = await asyncio.gather(*(
+            self.count_papers_by_submission_date(
+                parent_set, start_year, start_month, end_year, end_month,
+                savings=savings, on_page=on_page,
+                from_date=window_from.isoformat(),
+                until_date=window_until.isoformat() if window_until else None
+            )
+            for window_from, window_until in windows
+        ))
+
+        counts = new_counts((start_year, start_month), (end_year, end_month))
+        for window_counts in results:
+            counts.merge(window_counts)
+        return counts
 
-            if not token:
-                break
+    async def _produce_pages(
+        self,
+        params: dict,
+        queue: asyncio.Queue,
+        stats: "PipelineStats",
+        set_name: str = ALL_SETS,
+        archive: bool = True,
+        spec: DigestSpec | None = None
+    ):
+        """
+        Fetch stage of the page pipeline.
+
+        Follows the resumption-token chain and puts each page on `queue` as
+        soon as it has been read. A page that cannot be fetched raises
+        PageFetchFailed rather than ending the chain early, so a truncated
+        chain is never taken for a complete one; exceptions are forwarded to
+        the consumer instead of being lost.
+        When archiving, each page is appended to the page archive and the
+        run is published once the chain is complete. With a `spec`, pages are
+        parsed and counted in the parse pool.
+        """
+        run = None
+        if archive and self.archive_pages and self.archive is not None:
+            run = self.archive.start_run(set_name, params, self._sync_id, self._harvest_kind)
+        try:
+            while True:
+                fetch_started = time.monotonic()
+                with self.memory_profiler.phase("fetch"):
+                    page = await self._fetch_page_records(params, spec)
+                if page is None:
+                    raise PageFetchFailed(f"{set_name}: page fetch failed ({params})")
+                elapsed = time.monotonic() - fetch_started
+                wait = page.wait_seconds
+                stats.wait_seconds += wait
+                stats.fetch_seconds += elapsed - wait
+                self.metrics.observe_fetch(elapsed - wait, wait)
+
+                if run is not None and page.raw is not None:
+                    await asyncio.to_thread(run.append, page.raw, page.token)
+                    page.raw = None
+                await queue.put(page)
+
+                if not page.token:
+                    if run is not None:
+                        await asyncio.to_thread(run.finish)
+                        run = None
+                    return
+                # Continue with resumption token
+                params = {"verb": "ListIdentifiers", "resumptionToken": page.token}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            if run is not None:
+                run.abandon()
 
-            # Continue with resumption token
-            params = {"verb": "ListIdentifiers", "resumptionToken": token}
+    async def _replay_pages(self, run: dict, queue: asyncio.Queue, spec: DigestSpec | None = None):
+        """Replay stage: feed archived pages into the pipeline at disk speed."""
+        try:
+            pages = self.archive.iter_pages(run)
+            while True:
+                body = await asyncio.to_thread(next, pages, None)
+                if body is None:
+                    break
+                if spec is not None and self.parse_pool_kind:
+                    digest = await self._digest_body(body, spec)
+                    page = OAIPage(
+                        digest=digest,
+                        token=digest.token,
+                        complete_list_size=digest.complete_list_size,
+                        cursor=digest.cursor,
+                        bytes_received=len(body),
+                    )
+                else:
+                    parser = OAIPageParser()
+                    records = parser.feed(body) + parser.close()
+                    page = OAIPage(
+                        records=records,
+                        token=parser.token,
+                        complete_list_size=parser.complete_list_size,
+                        cursor=parser.cursor,
+                        bytes_received=len(body),
+                    )
+                await queue.put(page)
+                if not page.token:
+                    return
+            # Archived runs end on a page without a token; stop regardless
+            await queue.put(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
 
-            if pages % 10 == 0:
-                logger.info(f"    {parent_set}: processed {pages} pages, {total_records} records so far")
+    async def _count_replayed(
+        self,
+        parent_set: str | None,
+        start_year: int,
+        start_month: int,
+        end_year: int,
+        end_month: int,
+        savings: SinglePassSavings | None,
+        on_page
+    ) -> CountMatrix:
+        """
+        Count a set from the runs archived by its most recent full harvest
+        that reaches back to the start month.
 
-            await asyncio.sleep(RATE_LIMIT_DELAY)
+        Raises ValueError when no such harvest was archived: counting a
+        quick sync's changes, or a full sync that started later, would
+        overwrite the counts with a fraction of them.
+        """
+        cursor_name = parent_set or ALL_SETS
+        start = f"{start_year}-{start_month:02d}-01"
+        runs = self.archive.latest_runs(cursor_name, start)
+        if not runs:
+            raise ValueError(f"{cursor_name}: no archived full harvest covers {start} on, nothing to replay")
+        logger.info(f"  {cursor_name}: replaying {len(runs)} archived run(s) from sync {runs[0]['sync_id']}")
+
+        results = await asyncio.gather(*(
+            self.count_papers_by_submission_date(
+                parent_set, start_year, start_month, end_year, end_month,
+                savings=savings, on_page=on_page, replay_run=run
+            )
+            for run in runs
+        ))
+
+        counts = new_counts((start_year, start_month), (end_year, end_month))
+        for run_counts in results:
+            counts.merge(run_counts)
+        return counts
 
-        logger.info(f"  {parent_set}: {total_records} papers in {pages} pages")
-        return dict(counts)
+    def _reset_cursors(self, parent_sets: list[str], kind: str):
+        """Create a fresh progress entry for each parent-set cursor of a `kind` harvest."""
+        self._cursors = {
+            p: {
+                "parent_set": p, "status": "pending", "pages": 0, "records": 0,
+                "overlap_saved_seconds": 0.0,
+            }
+            for p in parent_sets
+        }
+        self._current = 0
+        self._total = len(parent_sets)
+        self._density = {}
+        self._sync_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self._harvest_kind = kind
+        self.transport_stats = TransportStats()
+        self.loop_lag = LoopLagMonitor()
+        self.metrics = HarvestMetrics()
+
+    def _update_progress(self, label: str):
+        running = [c["parent_set"] for c in self._cursors.values() if c["status"] == "running"]
+        if running:
+            self._sync_progress = (
+                f"{label} {', '.join(running)} ({self._current}/{self._total} done)"
+            )
+
+    def _record_savings(self, report: dict):
+        """Log how much a single-pass harvest saved over the per-parent loop."""
+        self.single_pass_report = report
+        logger.info(
+            f"  Single pass: {report['pages']} pages / {report['bytes'] / 1e6:.1f} MB; "
+            f"per-parent loop would need {report['per_parent_pages']} pages / "
+            f"{report['per_parent_bytes'] / 1e6:.1f} MB "
+            f"(saved {report['pages_saved']} pages, {report['bytes_saved'] / 1e6:.1f} MB)"
+        )
 
-    def save_checkpoint(self, data: dict):
-        """Save checkpoint to file for resume capability."""
-        with open(CHECKPOINT_FILE, 'w') as f:
-            json.dump(data, f)
-        logger.debug(f"Checkpoint saved")
+    def _start_memory_controls(self, memory_budget_mb: float | None, trace_memory: bool):
+        if memory_budget_mb:
+            self.memory_budget = MemoryBudget(int(memory_budget_mb * 1e6))
+            logger.info(f"Memory budget: {memory_budget_mb} MB of count accumulators, spilled to disk beyond that")
+        if trace_memory:
+            self.memory_profiler.start()
+
+    def _stop_memory_controls(self):
+        """Log the memory reports of the sync and remove its spill files."""
+        if self.memory_budget is not None:
+            logger.info(f"Sync {self.memory_budget.summary()}")
+            self.memory_budget.close()
+            self.memory_budget = None
+        if self.memory_profiler.enabled:
+            self.memory_profiler.log_report()
+            self.memory_profiler.stop()
+
+    def _ledger_writer(self, ledger: PaperLedger, floor: tuple[int, int]):
+        """Page callback that merges each harvested page into the ledger."""
+        async def write(page: OAIPage):
+            entries = [e for e in page.digest.ledger if (e[1], e[2]) >= floor]
+            changed = await ledger.apply(entries)
+            self._ledger_changes += changed
+        return write
+
+    async def _load_watermarks(self, db: aiosqlite.Connection) -> dict[str, str]:
+        """Per-set high-water marks (newest OAI datestamp already harvested)."""
+        cursor = await db.execute(
+            "SELECT key, value FROM sync_metadata WHERE key LIKE 'watermark:%'"
+        )
+        return {key.split(":", 1)[1]: value for key, value in await cursor.fetchall()}
 
-    def load_checkpoint(self) -> Optional[dict]:
-        """Load checkpoint from file if exists."""
-        if CHECKPOINT_FILE.exists():
-            try:
-                with open(CHECKPOINT_FILE, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load checkpoint: {e}")
-        return None
+    async def _save_watermarks(self, db: aiosqlite.Connection):
+        """Store the watermark of every cursor that finished."""
+        for cursor in self._cursors.values():
+            if cursor["status"] == "done" and cursor.get("watermark"):
+                await db.execute(
+                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                    (f"watermark:{cursor['parent_set']}", cursor["watermark"])
+                )
 
-    def clear_checkpoint(self):
-        """Clear checkpoint file after successful completion."""
-        if CHECKPOINT_FILE.exists():
-            CHECKPOINT_FILE.unlink()
-            logger.info("Checkpoint cleared")
+    async def _load_density(self, cursor_name: str) -> dict[str, int]:
+        """Records per datestamp month recorded for a set by earlier harvests."""
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute(
+                "SELECT value FROM sync_metadata WHERE key = ?", (f"density:{cursor_name}",)
+            )
+            row = await cursor.fetchone()
+        return json.loads(row[0]) if row else {}
+
+    async def _save_density(self, db: aiosqlite.Connection):
+        """Merge this sync's datestamp histograms into the stored ones."""
+        for cursor_name, density in self._density.items():
+            cursor = await db.execute(
+                "SELECT value FROM sync_metadata WHERE key = ?", (f"density:{cursor_name}",)
+            )
+            row = await cursor.fetchone()
+            stored = json.loads(row[0]) if row else {}
+            # An incremental harvest only sees part of a month, so keep the larger
+            for month, n in density.items():
+                stored[month] = max(stored.get(month, 0), n)
+            await db.execute(
+                "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                (f"density:{cursor_name}", json.dumps(stored, sort_keys=True))
+            )
+
+    async def _ledger_floor(self) -> tuple[int, int] | None:
+        """First month tracked by the ledger, or None if no full sync has seeded it."""
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute(
+                "SELECT value FROM sync_metadata WHERE key = 'ledger_floor'"
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        year, month = row[0].split("-")
+        return (int(year), int(month))
+
+    async def _record_full_sync(self, started: str, start_year: int):
+        """Record a completed full sync and prune the ledger to what it saw."""
+        # An earlier backfill keeps the ledger tracking the months before start_year
+        floor = min((start_year, 1), await self._ledger_floor() or (start_year, 1))
+        with self.memory_profiler.phase("write"):
+            async with aiosqlite.connect(DATABASE_PATH) as db:
+                await db.execute(
+                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                    ("last_sync", datetime.now().isoformat())
+                )
+                await db.execute(
+                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                    ("last_full_sync", datetime.now().isoformat())
+                )
+                if self.single_pass_report is not None:
+                    await db.execute(
+                        "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                        ("single_pass_savings", json.dumps(self.single_pass_report))
+                    )
+
+                # Papers this sync did not see are gone; the ledger now
+                # matches publication_counts from start_year on
+                await db.execute(
+                    "DELETE FROM papers WHERE seen_at < ? AND year >= ?",
+                    (started, start_year)
+                )
+                await db.execute(
+                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                    ("ledger_floor", f"{floor[0]}-{floor[1]:02d}")
+                )
+                daily_rows = await rebuild_daily_counts(db)
+                estimated = await update_nowcasts(db)
+                logger.info(f"Daily counts rebuilt: {daily_rows} rows, {estimated} categories nowcast")
+                await self._save_watermarks(db)
+                await self._save_density(db)
+                await db.commit()
 
-    async def sync_all_papers_by_parent(
+    async def _harvest_parents(
         self,
-        parent_set: str,
+        parent_sets: list[str],
         start_year: int,
+        start_month: int,
         end_year: int,
-        end_month: int
-    ) -> dict[tuple[int, int], dict[str, int]]:
+        end_month: int,
+        concurrency: int,
+        on_complete=None,
+        label: str = "Processing",
+        on_page=None,
+        from_dates: dict[str, str] | None = None,
+        shards: dict[str, int] | None = None
+    ):
         """
-        Fetch all papers for a parent set and count by actual submission date.
-        Returns dict mapping (year, month) -> {category_id: count}
+        Harvest several parent sets with up to `concurrency` cursors in flight.
+        The pseudo-set ALL_SETS harvests the whole archive in one pass.
+
+        All cursors share self.rate_limiter, so the combined request rate is
+        the same as a serial harvest; concurrency only overlaps the time spent
+        waiting on the server. `on_complete(parent_set, counts)` is awaited as
+        each cursor finishes. `from_dates` maps a parent set to the datestamp
+        its harvest starts from, and `shards` to the number of datestamp
+        windows it is split into.
         """
-        self._sync_progress = f"Fetching {parent_set} papers..."
-        logger.info(f"Fetching {parent_set} papers...")
-
-        counts = await self.count_papers_by_submission_date(
-            parent_set, start_year, 1, end_year, end_month
-        )
-
-        return counts
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(parent_set: str):
+            async with semaphore:
+                cursor = self._cursors[parent_set]
+                cursor["status"] = "running"
+                self._update_progress(label)
+                logger.info(f"\n[{parent_set}] {label} {parent_set}...")
+                savings = SinglePassSavings() if parent_set == ALL_SETS else None
+                try:
+                    counts = await self.count_papers_by_submission_date(
+                        None if savings else parent_set,
+                        start_year, start_month, end_year, end_month,
+                        savings=savings, on_page=on_page,
+                        from_date=(from_dates or {}).get(parent_set),
+                        shards=(shards or {}).get(parent_set, 1)
+                    )
+                except Exception:
+                    cursor["status"] = "failed"
+                    raise
+                cursor["status"] = "done"
+                self._current += 1
+                if savings is not None:
+                    self._record_savings(savings.report())
+                if on_complete is not None:
+                    await on_complete(parent_set, counts)
+                self._update_progress(label)
+
+        tasks = [asyncio.create_task(run(p)) for p in parent_sets]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
 
-    async def sync_all_categories(self, start_year: int = 2022, resume: bool = True):
+    async def sync_all_categories(
+        self,
+        start_year: int = 2022,
+        resume: bool = True,
+        concurrency: int = SYNC_CONCURRENCY,
+        single_pass: bool = False,
+        memory_budget_mb: float | None = MEMORY_BUDGET_MB,
+        trace_memory: bool = TRACE_MEMORY
+    ):
         """
         Sync all categories with checkpoint/resume support.
 
         NEW APPROACH: Fetches all papers per parent set, then extracts the
-        actual submission date from the arXiv ID (YYMM.xxxxx format).
+        actual submission date from the arXiv ID (YYMM.xxxxx, or
+        archive/YYMMxxx for papers from before April 2007).
         This fixes the issue where OAI-PMH date filters use modification date.
+
+        Up to `concurrency` parent sets are harvested at once under the
+        shared rate limiter. With single_pass=True the archive is instead
+        harvested once without a set filter, so cross-listed papers are
+        only downloaded once.
+
+        With `memory_budget_mb`, count accumulators beyond the budget spill
+        to disk and are merged back as each chain finishes; `trace_memory`
+        logs tracemalloc allocations per pipeline phase.
         """
         self._is_syncing = True
         self._sync_progress = "Starting sync..."
@@ -462,102 +1499,126 @@ class ArxivCollector:
         self._successful = 0
 
         logger.info("=" * 60)
-        logger.info(f"Starting full sync from {start_year}")
-        logger.info(f"Log file: {log_file}")
+        logger.info(f"Starting full sync from {start_year} (concurrency {concurrency})")
+        if log_file is not None:
+            logger.info(f"Log file: {log_file}")
         logger.info("=" * 60)
 
         try:
             now = datetime.now()
+            # The current month is stored too: the API hides it until it is
+            # complete, but the ledger has to record its papers now
             end_year = now.year
-            end_month = now.month - 1  # Exclude current incomplete month
-            if end_month == 0:
-                end_month = 12
-                end_year -= 1
-
-            parent_sets = ["cs", "econ", "eess", "math", "physics", "q-bio", "q-fin", "stat"]
-            self._total = len(parent_sets)
+            end_month = now.month
+
+            parent_sets = [ALL_SETS] if single_pass else list(PARENT_SETS)
+            self._reset_cursors(parent_sets, "full")
+            if self.replay:
+                # Refuse before any set's counts or papers are written
+                start = f"{start_year}-01-01"
+                missing = [p for p in parent_sets if not self.archive.latest_runs(p, start)]
+                if missing:
+                    raise ValueError(
+                        f"No archived full harvest covers {start} on for {', '.join(missing)}, nothing to replay"
+                    )
+            self.loop_lag.start()
+            self._start_memory_controls(memory_budget_mb, trace_memory)
+            self.single_pass_report = None
+            self._ledger_changes = 0
+
+            # Papers seen by this sync (including a resumed earlier attempt)
+            # are stamped with its start time
+            started = now.isoformat()
 
             # Check for checkpoint to resume
-            checkpoint = self.load_checkpoint() if resume else None
-            start_index = 0
-            existing_counts = {}
-
-            if checkpoint and checkpoint.get("type") == "full_sync_v2":
-                start_index = checkpoint.get("parent_index", 0)
-                existing_counts = checkpoint.get("counts", {})
-                # Convert string keys back to tuples
-                existing_counts = {
-                    eval(k): v for k, v in existing_counts.items()
-                }
-                logger.info(f"Resuming from checkpoint: parent index {start_index}")
-
-            # Aggregate all counts: (year, month) -> category_id -> count
-            all_counts = defaultdict(lambda: defaultdict(int))
-            for key, cats in existing_counts.items():
-                for cat_id, count in cats.items():
-                    all_counts[key][cat_id] = count
-
-            for i, parent_set in enumerate(parent_sets):
-                if i < start_index:
-                    self._current = i + 1
-                    continue
-
-                self._current = i + 1
-                self._sync_progress = f"Processing {parent_set} ({i+1}/{len(parent_sets)})"
-                logger.info(f"\n[{i+1}/{len(parent_sets)}] Processing {parent_set}...")
-
-                # Save checkpoint before starting
-                self.save_checkpoint({
-                    "type": "full_sync_v2",
-                    "parent_index": i,
-                    "counts": {str(k): dict(v) for k, v in all_counts.items()},
-                    "timestamp": datetime.now().isoformat()
+            self._checkpoint = CheckpointLog(self.checkpoint_dir)
+            manifest = await asyncio.to_thread(self._checkpoint.load) if resume else None
+            completed: list[str] = []
+
+            if manifest and (
+                manifest.get("single_pass", False) != single_pass
+                or manifest.get("start_year") != start_year
+            ):
+                logger.info("Checkpoint was written by a different kind of sync, ignoring it")
+                manifest = None
+
+            # Each parent set's counts are final for its own categories, so
+            # they are written as soon as it finishes
+            writer = CountWriter(DATABASE_PATH, maxsize=COUNT_WRITE_QUEUE)
+            months_seen: set[tuple[int, int]] = set()
+
+            if manifest:
+                started = manifest["started"]
+                # Pages counted before the restart used the original range
+                end_year, end_month = manifest.get("end", (end_year, end_month))
+                # Keep archived runs of the resumed sync under one id
+                self._sync_id = manifest.get("sync_id", self._sync_id)
+                completed = list(self._checkpoint.state["completed"])
+                in_progress = sum(
+                    1 for c in self._checkpoint.state["chains"].values() if not c["done"]
+                )
+                logger.info(
+                    f"Resuming from checkpoint: completed {completed}, "
+                    f"{in_progress} chain(s) continue from their last page"
+                )
+            else:
+                await asyncio.to_thread(self._checkpoint.start, {
+                    "single_pass": single_pass,
+                    "start_year": start_year,
+                    "started": started,
+                    "end": [end_year, end_month],
+                    "sync_id": self._sync_id,
                 })
 
-                # Fetch all papers for this parent set
-                counts = await self.sync_all_papers_by_parent(
-                    parent_set, start_year, end_year, end_month
+            for parent_set in completed:
+                if parent_set in self._cursors:
+                    self._cursors[parent_set]["status"] = "done"
+                    self._current += 1
+            remaining = [p for p in parent_sets if p not in completed]
+
+            async def flush_parent(parent_set: str, counts: CountMatrix):
+                months_seen.update(counts.month_keys())
+                with self.memory_profiler.phase("write"):
+                    await writer.put(counts.rows())
+                logger.info(f"  {parent_set}: counts queued for writing")
+                if parent_set not in completed:
+                    completed.append(parent_set)
+                    await asyncio.to_thread(self._checkpoint.cursor_done, parent_set)
+
+            # Counts are written per parent; the ledger is only re-seeded.
+            # Its commits stay fully synchronous: a page checkpoint is only
+            # written once the page is durably in the ledger.
+            async with writer, aiosqlite.connect(DATABASE_PATH) as ledger_db:
+                # A crash may have come between a parent's checkpoint and its write
+                for parent_set in list(completed):
+                    counts = self._checkpoint.cursor_counts(parent_set)
+                    if counts is None:
+                        counts = new_counts((start_year, 1), (end_year, end_month))
+                    await flush_parent(parent_set, counts)
+
+                ledger = PaperLedger(ledger_db, seen_at=started, apply_counts=False)
+                await self._harvest_parents(
+                    remaining, start_year, 1, end_year, end_month,
+                    concurrency, on_complete=flush_parent,
+                    on_page=self._ledger_writer(ledger, (start_year, 1)),
+                    shards=SET_SHARDS
                 )
+                self._sync_progress = "Saving to database..."
+            self._successful = writer.rows
 
-                # Merge counts
-                for key, cat_counts in counts.items():
-                    for cat_id, count in cat_counts.items():
-                        all_counts[key][cat_id] += count
-
-                await asyncio.sleep(RATE_LIMIT_DELAY)
-
-            # Save all counts to database
-            logger.info(f"\nSaving counts to database...")
-            self._sync_progress = "Saving to database..."
-
-            async with aiosqlite.connect(DATABASE_PATH) as db:
-                for (year, month), cat_counts in sorted(all_counts.items()):
-                    for cat_id, count in cat_counts.items():
-                        await db.execute("""
-                            INSERT OR REPLACE INTO publication_counts
-                            (category_id, year, month, count)
-                            VALUES (?, ?, ?, ?)
-                        """, (cat_id, year, month, count))
-                        self._successful += 1
-
-                await db.execute(
-                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
-                    ("last_sync", datetime.now().isoformat())
-                )
-                await db.execute(
-                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
-                    ("last_full_sync", datetime.now().isoformat())
-                )
-                await db.commit()
+            await self._record_full_sync(started, start_year)
 
             # Clear checkpoint on success
-            self.clear_checkpoint()
+            await asyncio.to_thread(self._checkpoint.clear)
+            logger.info("Checkpoint cleared")
 
             self._sync_progress = "Sync completed"
             logger.info("=" * 60)
             logger.info("SYNC COMPLETED")
-            logger.info(f"Total months with data: {len(all_counts)}")
+            logger.info(f"Total months with data: {len(months_seen)}")
             logger.info(f"Total category-month records: {self._successful}")
+            logger.info(f"Transport: {self.transport_stats.summary()}")
+            logger.info(f"Harvest: {self.metrics.summary()}")
             logger.info("=" * 60)
 
         except Exception as e:
@@ -566,70 +1627,334 @@ class ArxivCollector:
             raise
 
         finally:
+            await self.loop_lag.stop()
+            logger.info(f"Sync {self.loop_lag.summary()}")
+            self._stop_memory_controls()
             self._is_syncing = False
+            self._checkpoint = None
             self._current = 0
             self._total = 0
 
-    async def quick_sync(self):
+    async def run_shard(self, shard: HarvestShard, shards: ShardQueue, owner: str) -> bool:
+        """
+        Harvest one leased shard of a sharded full sync into the ledger.
+
+        The lease is renewed in the background; if it is lost, the harvest
+        stops and its result is discarded. Once every shard of the parent
+        set is done, their summed counts overwrite its publication_counts.
+        Returns True if this worker completed the shard.
+        """
+        parent_set = None if shard.parent_set == ALL_SETS else shard.parent_set
+        self.rate_limiter.set_share(await shards.active_owners())
+        seen = {"records": 0, "watermark": "", "density": defaultdict(int)}
+
+        async def harvest() -> CountMatrix:
+            async with aiosqlite.connect(DATABASE_PATH) as ledger_db:
+                ledger = PaperLedger(ledger_db, seen_at=shard.seen_at, apply_counts=False)
+                write = self._ledger_writer(ledger, (shard.start_year, 1))
+
+                async def on_page(page: OAIPage):
+                    await write(page)
+                    seen["records"] += page.digest.counted
+                    seen["watermark"] = max(seen["watermark"], page.digest.watermark)
+                    for month, n in page.digest.density.items():
+                        seen["density"][month] += n
+
+                return await self.count_papers_by_submission_date(
+                    parent_set, shard.start_year, 1, shard.end_year, shard.end_month,
+                    on_page=on_page, from_date=shard.from_date, until_date=shard.until_date
+                )
+
+        logger.info(f"  Shard {shard.id} {shard.label}: leased (attempt {shard.attempts})")
+        task = asyncio.create_task(harvest())
+        renewer = asyncio.create_task(self._renew_lease(shard, shards, owner, task, seen))
+        try:
+            counts = await task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                await asyncio.shield(shards.release(shard.id, owner, "worker stopped"))
+                raise
+            logger.warning(f"  Shard {shard.id} {shard.label}: lease lost, result discarded")
+            return False
+        except Exception as e:
+            logger.error(f"  Shard {shard.id} {shard.label} failed: {e}")
+            await shards.release(shard.id, owner, str(e))
+            return False
+        finally:
+            renewer.cancel()
+            task.cancel()
+            await asyncio.gather(renewer, task, return_exceptions=True)
+
+        if not await shards.complete(
+            shard.id, owner, counts, seen["records"], seen["watermark"], dict(seen["density"])
+        ):
+            logger.warning(f"  Shard {shard.id} {shard.label}: lease lost, result discarded")
+            return False
+        logger.info(f"  Shard {shard.id} {shard.label}: done ({seen['records']} papers)")
+
+        # Overwriting with the sum is idempotent, so a race between the last
+        # two shards of a parent set only writes the same rows twice
+        parent_counts = await shards.parent_counts(shard.sync_id, shard.parent_set)
+        if parent_counts is not None:
+            async with aiosqlite.connect(DATABASE_PATH) as db:
+                await tune_for_writes(db)
+                rows = await write_counts(db, parent_counts.rows())
+                await db.commit()
+            logger.info(f"  {shard.parent_set}: all shards done, {rows} category-months written")
+        return True
+
+    async def _renew_lease(self, shard: HarvestShard, shards: ShardQueue, owner: str,
+                           task: asyncio.Task, seen: dict):
+        """
+        Keep a shard's lease alive, recording the papers counted so far;
+        cancel its harvest if the lease is lost.
+        """
+        while True:
+            await asyncio.sleep(LEASE_RENEW_INTERVAL)
+            if not await shards.renew(shard.id, owner, records=seen["records"]):
+                task.cancel()
+                return
+            self.rate_limiter.set_share(await shards.active_owners())
+
+    async def sync_all_sharded(
+        self,
+        start_year: int = 2022,
+        concurrency: int = SYNC_CONCURRENCY,
+        single_pass: bool = False,
+        shards_per_set: int = SHARDS_PER_SET,
+        resume: bool = True,
+        memory_budget_mb: float | None = MEMORY_BUDGET_MB,
+        trace_memory: bool = TRACE_MEMORY,
+        year_shards: bool = False
+    ):
+        """
+        Full sync split into leased shards that any worker process can take.
+
+        Every parent set is split into `shards_per_set` datestamp windows,
+        or with `year_shards` into one window per datestamp year (see
+        year_windows), recorded in harvest_shards. This process harvests up to
+        `concurrency` shards at a time; idle workers on other processes or
+        machines sharing the database take the rest. A shard whose worker
+        dies is leased again once its lease expires. With `resume`, the
+        shards of an interrupted sharded sync are picked up again, failed
+        ones with their attempts reset. The
+        memory options apply to the shards harvested by this process.
+        """
+        self._is_syncing = True
+        self._sync_progress = "Starting sharded sync..."
+        self._errors = 0
+        self._successful = 0
+        shards = ShardQueue(DATABASE_PATH)
+        owner = process_name()
+
+        logger.info("=" * 60)
+        split = "by datestamp year" if year_shards else f"{shards_per_set} shards per set"
+        logger.info(f"Starting sharded full sync from {start_year} ({split})")
+        logger.info("=" * 60)
+
+        try:
+            now = datetime.now()
+            parent_sets = [ALL_SETS] if single_pass else list(PARENT_SETS)
+            self._reset_cursors(parent_sets, "sharded")
+            self.loop_lag.start()
+            self._start_memory_controls(memory_budget_mb, trace_memory)
+            self.single_pass_report = None
+            self._ledger_changes = 0
+
+            plan = None
+            for sync_id in reversed(await shards.sync_ids()):
+                described = await shards.describe(sync_id)
+                if resume and described["parent_sets"] == sorted(parent_sets) \
+                        and described["start_year"] == start_year:
+                    plan = described
+                    break
+                logger.info(f"Discarding shards of sync {sync_id}")
+                await shards.clear(sync_id)
+
+            if plan is not None:
+                sync_id, started = plan["sync_id"], plan["seen_at"]
+                logger.info(f"Resuming sharded sync {sync_id}")
+                # Shards that failed in an earlier run would otherwise fail every resume
+                retried = await shards.retry_failed(sync_id)
+                if retried:
+                    logger.info(f"Retrying {retried} failed shard(s)")
+            else:
+                sync_id, started = self._sync_id, now.isoformat()
+                rows = []
+                for parent_set in parent_sets:
+                    if year_shards:
+                        windows = year_windows(start_year, date.today())
+                    else:
+                        density = await self._load_density(parent_set)
+                        windows = plan_windows(date(start_year, 1, 1), date.today(), shards_per_set, density)
+                    rows += [{
+                        "sync_id": sync_id, "parent_set": parent_set,
+                        "from_date": a.isoformat(), "until_date": b.isoformat() if b else None,
+                        "start_year": start_year, "end_year": now.year, "end_month": now.month,
+                        "seen_at": started,
+                    } for a, b in windows]
+                await shards.plan(rows)
+                logger.info(f"Planned {len(rows)} shards for sync {sync_id}")
+
+            async def harvest_local():
+                while (shard := await shards.claim(owner, sync_id)) is not None:
+                    cursor = self._cursors.get(shard.parent_set)
+                    if cursor is not None:
+                        cursor["status"] = "running"
+                    await self.run_shard(shard, shards, owner)
+
+            while True:
+                await asyncio.gather(*(harvest_local() for _ in range(max(1, concurrency))))
+                progress = await shards.progress(sync_id)
+                self._total = sum(progress.values())
+                self._current = progress.get("done", 0)
+                self._sync_progress = (
+                    f"Sharded sync: {self._current}/{self._total} shards done, "
+                    f"{progress.get('leased', 0)} leased by other workers"
+                )
+                if not progress.get("pending") and not progress.get("leased"):
+                    break
+                # Wait for shards leased elsewhere; expired leases are claimed above
+                await asyncio.sleep(SHARD_POLL_INTERVAL)
+
+            if progress.get("failed"):
+                raise RuntimeError(f"{progress['failed']} shard(s) of sync {sync_id} failed")
+
+            # Watermarks and datestamp density of each parent set, from its
+            # shards; this process only saw the ones it harvested itself
+            self._density = {}
+            for cursor in self._cursors.values():
+                cursor["records"] = 0
+            for result in await shards.results(sync_id):
+                cursor = self._cursors[result["parent_set"]]
+                cursor["status"] = "done"
+                cursor["records"] += result["records"] or 0
+                cursor["watermark"] = max(cursor.get("watermark", ""), result["watermark"] or "")
+                density = self._density.setdefault(result["parent_set"], defaultdict(int))
+                for month, n in result["density"].items():
+                    density[month] += n
+
+            await self._record_full_sync(started, start_year)
+            await shards.clear(sync_id)
+
+            self._successful = self._current
+            self._sync_progress = "Sync completed"
+            logger.info(f"Sharded sync {sync_id} completed: {self._total} shards")
+            logger.info(f"Transport: {self.transport_stats.summary()}")
+            logger.info(f"Harvest: {self.metrics.summary()}")
+
+        except Exception as e:
+            logger.error(f"Sharded sync failed with exception: {e}", exc_info=True)
+            self._sync_progress = f"Sync failed: {e}"
+            raise
+
+        finally:
+            await self.loop_lag.stop()
+            logger.info(f"Sync {self.loop_lag.summary()}")
+            self._stop_memory_controls()
+            self.rate_limiter.set_share(1)
+            self._is_syncing = False
+            self._current = 0
+            self._total = 0
+
+    async def backfill(self, concurrency: int = SYNC_CONCURRENCY, resume: bool = True, **options):
+        """
+        Full-history sync from BACKFILL_START_YEAR, old-style identifiers
+        (math/0601001) included. Runs as a sharded sync with one shard per
+        parent set and datestamp year, so other workers can take shards
+        and each shard resumes on its own. A resumed backfill retries the
+        year shards that failed, so one bad year does not block later runs.
+        """
+        await self.sync_all_sharded(
+            BACKFILL_START_YEAR, concurrency=concurrency, resume=resume, year_shards=True, **options
+        )
+
+    async def quick_sync(self, concurrency: int = SYNC_CONCURRENCY, single_pass: bool = False):
         """
         Quick sync - sync recent months for all categories.
         Uses the corrected approach of extracting submission dates from arXiv IDs.
+
+        Once a full sync has seeded the papers ledger, only records modified
+        since each set's watermark (the newest datestamp already harvested)
+        are requested. They are merged into the ledger and only the resulting
+        count deltas are applied, so revisions, cross-list changes and
+        deletions are reflected exactly. The same deltas go into the daily
+        counts, from which the running month's nowcast is then refreshed.
+        Before that, the recent months are recounted and overwritten.
         """
         self._is_syncing = True
         self._sync_progress = "Quick sync in progress..."
         self._current = 0
         self._errors = 0
         self._successful = 0
+        self._ledger_changes = 0
 
         logger.info("Starting quick sync...")
 
         try:
             now = datetime.now()
-            # Sync last 3 months (excluding current incomplete month)
+            # Sync the last 3 complete months plus the current one
             end_year = now.year
-            end_month = now.month - 1
-            if end_month == 0:
-                end_month = 12
-                end_year -= 1
+            end_month = now.month
 
             start_year = end_year
-            start_month = end_month - 2
+            start_month = end_month - 3
             if start_month <= 0:
                 start_month += 12
                 start_year -= 1
 
-            parent_sets = ["cs", "econ", "eess", "math", "physics", "q-bio", "q-fin", "stat"]
-            self._total = len(parent_sets)
-
-            all_counts = defaultdict(lambda: defaultdict(int))
-
-            for i, parent_set in enumerate(parent_sets):
-                self._current = i + 1
-                self._sync_progress = f"Fetching {parent_set}..."
-                logger.info(f"  Fetching {parent_set}...")
-
-                counts = await self.count_papers_by_submission_date(
-                    parent_set, start_year, start_month, end_year, end_month
+            parent_sets = [ALL_SETS] if single_pass else list(PARENT_SETS)
+            self._reset_cursors(parent_sets, "quick")
+            self.loop_lag.start()
+
+            floor = await self._ledger_floor()
+            if floor is not None:
+                async with aiosqlite.connect(DATABASE_PATH) as ledger_db:
+                    # Only ask for records modified since each set's watermark.
+                    # `from` is inclusive, so the watermark day is re-read and
+                    # anything changed later that day is still picked up.
+                    watermarks = effective_watermarks(await self._load_watermarks(ledger_db))
+                    from_dates = {
+                        p: watermarks.get(p) or f"{start_year}-{start_month:02d}-01"
+                        for p in parent_sets
+                    }
+                    for parent_set, since in from_dates.items():
+                        logger.info(f"  {parent_set}: harvesting changes since {since}")
+
+                    ledger = PaperLedger(ledger_db, seen_at=now.isoformat())
+                    await self._harvest_parents(
+                        parent_sets, floor[0], floor[1], end_year, end_month,
+                        concurrency, label="Fetching",
+                        on_page=self._ledger_writer(ledger, floor),
+                        from_dates=from_dates
+                    )
+                    await self._save_watermarks(ledger_db)
+                    await self._save_density(ledger_db)
+                    await update_nowcasts(ledger_db)
+                    await ledger_db.execute(
+                        "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                        ("last_sync", datetime.now().isoformat())
+                    )
+                    await ledger_db.commit()
+
+                self._successful = self._ledger_changes
+                self._sync_progress = "Quick sync completed"
+                logger.info(f"Quick sync completed: {self._ledger_changes} papers changed in the ledger")
+                logger.info(f"Transport: {self.transport_stats.summary()}")
+                logger.info(f"Harvest: {self.metrics.summary()}")
+                return
+
+            async with CountWriter(DATABASE_PATH, maxsize=COUNT_WRITE_QUEUE) as writer:
+                async def flush_parent(parent_set: str, counts: CountMatrix):
+                    await writer.put(counts.rows())
+
+                await self._harvest_parents(
+                    parent_sets, start_year, start_month, end_year, end_month,
+                    concurrency, on_complete=flush_parent, label="Fetching"
                 )
+            self._successful = writer.rows
 
-                for key, cat_counts in counts.items():
-                    for cat_id, count in cat_counts.items():
-                        all_counts[key][cat_id] += count
-
-                await asyncio.sleep(RATE_LIMIT_DELAY)
-
-            # Save to database
             async with aiosqlite.connect(DATABASE_PATH) as db:
-                for (year, month), cat_counts in sorted(all_counts.items()):
-                    for cat_id, count in cat_counts.items():
-                        await db.execute("""
-                            INSERT OR REPLACE INTO publication_counts
-                            (category_id, year, month, count)
-                            VALUES (?, ?, ?, ?)
-                        """, (cat_id, year, month, count))
-                        self._successful += 1
-                        logger.info(f"  {year}-{month:02d} {cat_id}: {count} papers")
-
                 await db.execute(
                     "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
                     ("last_sync", datetime.now().isoformat())
@@ -638,13 +1963,147 @@ class ArxivCollector:
 
             self._sync_progress = "Quick sync completed"
             logger.info(f"Quick sync completed: {self._successful} category-months saved")
+            logger.info(f"Transport: {self.transport_stats.summary()}")
+            logger.info(f"Harvest: {self.metrics.summary()}")
 
         except Exception as e:
             logger.error(f"Quick sync failed: {e}", exc_info=True)
             self._sync_progress = f"Quick sync failed: {e}"
             self._errors += 1
+            raise
+
+        finally:
+            await self.loop_lag.stop()
+            logger.info(f"Quick sync {self.loop_lag.summary()}")
+            self._is_syncing = False
+            self._current = 0
+            self._total = 0
+
+    async def probe_changes(self) -> dict | None:
+        """
+        Count the records changed since the last harvest with one request:
+        ListIdentifiers from the day after the oldest watermark, reading
+        completeListSize off the first page (or counting the headers when
+        the whole list fits on it).
+
+        The probe has its own metrics and rate limiter, so one made while
+        a sync is running neither shows up in that sync's metrics nor moves
+        its pacing.
+
+        Returns {"since", "changes"}, or None when a set has never been
+        harvested incrementally or the request failed.
+        """
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            watermarks = effective_watermarks(await self._load_watermarks(db))
+        since = watermarks.get(ALL_SETS)
+        if since is None:
+            return None
+        # arXiv stamps records once per announcement, so the watermark day was
+        # complete when it was harvested (the sync itself still re-reads it)
+        from_date = date.fromisoformat(since[:10]) + timedelta(days=1)
+        if from_date > datetime.now(timezone.utc).date():
+            return {"since": since, "changes": 0}
+
+        page = await self.fetch_oai_records(
+            {"verb": "ListIdentifiers", "metadataPrefix": "oai_dc", "from": from_date.isoformat()},
+            metrics=HarvestMetrics(),
+            limiter=AdaptiveRateLimiter(max_rate=1 / RATE_LIMIT_DELAY, min_rate=1 / MAX_REQUEST_INTERVAL)
+        )
+        if page is None:
+            return None
+        if page.error_code == "noRecordsMatch":
+            changes = 0
+        elif page.complete_list_size is not None:
+            changes = page.complete_list_size
+        else:
+            changes = len(page.records)
+        logger.info(f"Probe: {changes} records changed since {since}")
+        return {"since": since, "changes": changes}
+
+    async def refresh_categories(
+        self,
+        categories: list[str],
+        months: int = REFRESH_MONTHS,
+        concurrency: int = SYNC_CONCURRENCY
+    ):
+        """
+        Recount the last `months` months of some categories by harvesting
+        only their fine-grained sets (cs:cs:LG for cs.LG).
+
+        Months the papers ledger tracks go through the ledger, like a quick
+        sync, so only papers that changed move any counts. Earlier months
+        have the refreshed categories' rows overwritten, zeros included.
+        Other categories' rows are left alone, and set watermarks are not
+        moved, since a single set does not cover its parent.
+        """
+        unknown = [c for c in categories if c not in CATEGORY_TO_SETSPEC]
+        if unknown:
+            raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+        setspecs = [CATEGORY_TO_SETSPEC[c] for c in categories]
+
+        self._is_syncing = True
+        self._sync_progress = f"Refreshing {', '.join(categories)}..."
+        self._errors = 0
+        self._successful = 0
+        self._ledger_changes = 0
+        logger.info(f"Starting refresh of {', '.join(categories)} ({months} months)...")
+
+        try:
+            now = datetime.now()
+            (start_year, start_month), (end_year, end_month) = refresh_window(months, now)
+            self._reset_cursors(setspecs, "refresh")
+            self.loop_lag.start()
+            floor = await self._ledger_floor()
+
+            async with aiosqlite.connect(DATABASE_PATH) as db:
+                ledger = PaperLedger(db, seen_at=now.isoformat()) if floor is not None else None
+
+                async def flush_set(setspec: str, counts: CountMatrix):
+                    rows = []
+                    for offset in range(counts.months):
+                        year, month = counts.key(offset)
+                        if floor is not None and (year, month) >= floor:
+                            continue
+                        for column in set_columns(setspec).values():
+                            rows.append((CATEGORY_INDEX[column], year, month,
+                                         counts.data[offset * len(CATEGORY_INDEX) + column]))
+                    self._successful += await write_counts(db, rows)
+
+                await self._harvest_parents(
+                    setspecs, start_year, start_month, end_year, end_month,
+                    concurrency, on_complete=flush_set, label="Refreshing",
+                    on_page=self._ledger_writer(ledger, floor) if ledger is not None else None
+                )
+                for category in categories:
+                    await db.execute(
+                        "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                        (f"refreshed:{category}", now.isoformat())
+                    )
+                if ledger is not None:
+                    await update_nowcasts(db)
+                await db.execute(
+                    "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+                    ("last_sync", datetime.now().isoformat())
+                )
+                await db.commit()
+
+            self._sync_progress = "Refresh completed"
+            logger.info(
+                f"Refresh completed: {self._ledger_changes} papers changed in the ledger, "
+                f"{self._successful} category-months overwritten"
+            )
+            logger.info(f"Transport: {self.transport_stats.summary()}")
+            logger.info(f"Harvest: {self.metrics.summary()}")
+
+        except Exception as e:
+            logger.error(f"Refresh failed: {e}", exc_info=True)
+            self._sync_progress = f"Refresh failed: {e}"
+            self._errors += 1
+            raise
 
         finally:
+            await self.loop_lag.stop()
+            logger.info(f"Refresh {self.loop_lag.summary()}")
             self._is_syncing = False
             self._current = 0
             self._total = 0
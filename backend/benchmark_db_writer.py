@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for writing publication_counts.
+
+Writes a 150-category x 240-month backfill (36,000 rows) into a scratch
+database twice: once with the old one-await-per-row INSERT OR REPLACE in
+rollback-journal mode, and once with write_counts (a single executemany
+UPSERT) in WAL mode with WRITE_PRAGMAS. Each is run on an empty table and
+again over existing rows, and reports rows/s.
+
+    python3 benchmark_db_writer.py
+    python3 benchmark_db_writer.py --categories 150 --months 240 --repeat 3
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+import database
+from database import count_rows, tune_for_writes, write_counts
+
+
+def synthetic_counts(categories: int, months: int, bump: int = 0) -> dict:
+    counts = {}
+    for m in range(months):
+        key = (2006 + m // 12, m % 12 + 1)
+        counts[key] = {f"cat.{c:03d}": (c * 7919 + m * 104729 + bump) % 5000 for c in range(categories)}
+    return counts
+
+
+async def write_per_row(db: aiosqlite.Connection, counts: dict) -> int:
+    """The previous writer: one awaited execute per category-month."""
+    written = 0
+    for (year, month), cat_counts in sorted(counts.items()):
+        for cat_id, count in cat_counts.items():
+            await db.execute("""
+                INSERT OR REPLACE INTO publication_counts
+                (category_id, year, month, count)
+                VALUES (?, ?, ?, ?)
+            """, (cat_id, year, month, count))
+            written += 1
+    return written
+
+
+async def write_bulk(db: aiosqlite.Connection, counts: dict) -> int:
+    return await write_counts(db, count_rows(counts))
+
+
+async def run(mode: str, categories: int, months: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = Path(tmp) / "bench.db"
+        await database.init_db()
+        async with aiosqlite.connect(database.DATABASE_PATH) as db:
+            if mode == "per-row":
+                await db.execute("PRAGMA journal_mode = DELETE")
+                writer = write_per_row
+            else:
+                await tune_for_writes(db)
+                writer = write_bulk
+
+            result = {"mode": mode}
+            for phase, bump in (("insert", 0), ("overwrite", 1)):
+                counts = synthetic_counts(categories, months, bump)
+                started = time.perf_counter()
+                rows = await writer(db, counts)
+                await db.commit()
+                elapsed = time.perf_counter() - started
+                result[f"{phase}_s"] = round(elapsed, 3)
+                result[f"{phase}_rows_per_s"] = round(rows / elapsed)
+            return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark publication_counts writes")
+    parser.add_argument("--categories", type=int, default=150)
+    parser.add_argument("--months", type=int, default=240)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = args.categories * args.months
+    print(f"Writing {args.categories} categories x {args.months} months = {rows:,} rows")
+    columns = ["mode", "insert_s", "insert_rows_per_s", "overwrite_s", "overwrite_rows_per_s"]
+    print("  ".join(f"{c:>20}" for c in columns))
+    for _ in range(args.repeat):
+        for mode in ("per-row", "bulk"):
+            result = await run(mode, args.categories, args.months)
+            print("  ".join(f"{result[c]:>20}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for ArxivCollector.
+
+Starts the synthetic OAI-PMH server (mock_oai_server.py) in a separate
+process, harvests it with the collector and reports records/s, pages/s,
+peak RSS, CPU time per page and the longest event-loop stall. Each configuration runs in its own
+process so peak RSS is measured independently.
+
+    python3 benchmark_harvester.py --records 1000000
+    python3 benchmark_harvester.py --records 200000 --latency 0.05 --modes stream
+    python3 benchmark_harvester.py --modes stream --parse-pool none
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"Mock OAI server did not start on port {port}")
+
+
+async def run_harvest(mode: str, port: int, set_spec: str | None, parse_pool: str | None) -> dict:
+    """Harvest the mock server once and measure it. Runs in a child process."""
+    import arxiv_collector
+    from arxiv_collector import ArxivCollector, ALL_SETS
+    from rate_control import AdaptiveRateLimiter
+
+    arxiv_collector.logger.setLevel("WARNING")
+    collector = ArxivCollector(
+        stream_parse=(mode == "stream"),
+        base_url=f"http://127.0.0.1:{port}/oai",
+        parse_pool=parse_pool
+    )
+    # The mock server has no rate policy; measure the harvester itself
+    collector.rate_limiter = AdaptiveRateLimiter(max_rate=1e9, capacity=1e9)
+    cursor_name = set_spec or ALL_SETS
+    collector._reset_cursors([cursor_name], "benchmark")
+
+    collector.loop_lag.start()
+    cpu_started = time.process_time()
+    started = time.monotonic()
+    try:
+        counts = await collector.count_papers_by_submission_date(
+            set_spec, 2000, 1, 2099, 12
+        )
+    finally:
+        await collector.loop_lag.stop()
+        await collector.close()
+    wall = time.monotonic() - started
+    cpu = time.process_time() - cpu_started
+
+    cursor = collector._cursors[cursor_name]
+    pages = max(cursor["pages"], 1)
+    transport = collector.transport_stats
+    return {
+        "mode": mode,
+        "pages": cursor["pages"],
+        "records": cursor["records"],
+        "counted": counts.total(),
+        "wall_s": round(wall, 2),
+        "records_per_s": round(cursor["records"] / wall, 1) if wall else 0,
+        "pages_per_s": round(cursor["pages"] / wall, 2) if wall else 0,
+        "cpu_ms_per_page": round(cpu / pages * 1000, 2),
+        "wire_mb": round(transport.wire_bytes / 1e6, 1),
+        "compression": round(transport.compression_ratio, 1),
+        "new_conns": transport.new_connections,
+        "max_lag_ms": collector.loop_lag.report()["max_ms"],
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OAI-PMH harvester")
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--set", dest="set_spec", default=None, help="harvest one set instead of everything")
+    parser.add_argument("--modes", default="stream,buffered", help="comma-separated: stream, buffered")
+    parser.add_argument("--parse-pool", default="process", help="process, thread or none")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        parse_pool = None if args.parse_pool == "none" else args.parse_pool
+        result = asyncio.run(run_harvest(args.child, args.port, args.set_spec, parse_pool))
+        print(json.dumps(result))
+        return
+
+    server = subprocess.Popen([
+        sys.executable, str(BACKEND_DIR / "mock_oai_server.py"),
+        "--port", str(args.port),
+        "--records", str(args.records),
+        "--page-size", str(args.page_size),
+        "--latency", str(args.latency),
+        "--error-rate", str(args.error_rate),
+    ], cwd=BACKEND_DIR)
+    try:
+        wait_for_port(args.port)
+        results = []
+        for mode in args.modes.split(","):
+            cmd = [
+                sys.executable, __file__, "--child", mode, "--port", str(args.port),
+                "--parse-pool", args.parse_pool,
+            ]
+            if args.set_spec:
+                cmd += ["--set", args.set_spec]
+            out = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    columns = [
+        "mode", "pages", "records", "wall_s", "records_per_s", "pages_per_s",
+        "cpu_ms_per_page", "peak_rss_mb", "wire_mb", "compression", "new_conns", "max_lag_ms",
+    ]
+    print(f"\nHarvest of {args.records:,} synthetic records ({args.page_size} per page)")
+    print("  ".join(f"{c:>15}" for c in columns))
+    for result in results:
+        print("  ".join(f"{result[c]:>15}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
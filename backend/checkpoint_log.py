@@ -0,0 +1,216 @@
+"""
+Page-level checkpoint log for full syncs.
+
+A checkpoint is written after every harvested page. It records the chain's
+next resumption token and the counts that page added, so an interrupted
+sync resumes from the last page instead of from the last parent set.
+
+Layout of the checkpoint directory:
+    manifest.json    the sync being checkpointed (mode, start year, start time)
+    base.json        segments folded together by compaction
+    <seq>.json       one segment per checkpoint, never modified once written
+
+Every file is written to a temporary name, fsynced and renamed into place,
+so a crash leaves either the old or the new file and never a torn one.
+Counts are stored as base64 CountMatrix blobs; in memory each chain keeps
+its counts as a CountMatrix.
+Appending a checkpoint costs one small file holding only its delta; the
+segments of a cursor are folded into base.json once the cursor finishes.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from count_matrix import CountMatrix
+
+CHECKPOINT_DIR = Path(__file__).parent / "checkpoints"
+CHECKPOINT_FORMAT = 2  # 2: counts stored as CountMatrix blobs
+
+
+def _write_atomic(path: Path, data: dict):
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CheckpointLog:
+    """
+    Append-only log of per-page checkpoints for one sync.
+
+    State is folded from the log on load: for every resumption-token chain
+    (a set, or one datestamp window of a set) the next token, the counts
+    accumulated so far, pages, records and the newest datestamp; plus the
+    cursors that finished and the datestamp windows each sharded cursor was
+    split into.
+    """
+
+    def __init__(self, root: Path = CHECKPOINT_DIR):
+        self.root = Path(root)
+        self._manifest = self.root / "manifest.json"
+        self._base = self.root / "base.json"
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        # Segments numbered but not yet written; compaction waits for them
+        self._in_flight = 0
+        self._written = threading.Condition(self._lock)
+        self._seq = 0
+        self.state = self._empty_state()
+
+    @staticmethod
+    def _empty_state() -> dict:
+        return {"chains": {}, "completed": [], "windows": {}, "through": 0}
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self, manifest: dict):
+        """Discard any previous log and begin a new one."""
+        self.clear()
+        self.root.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._manifest, {**manifest, "format": CHECKPOINT_FORMAT})
+        self.state = self._empty_state()
+        self._seq = 0
+
+    def load(self) -> dict | None:
+        """Read the manifest and fold all segments into self.state."""
+        if not self._manifest.exists():
+            return None
+        with open(self._manifest) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != CHECKPOINT_FORMAT:
+            return None  # written by an older version; the sync starts over
+
+        state = self._empty_state()
+        if self._base.exists():
+            with open(self._base) as f:
+                state = json.load(f)
+            for chain in state["chains"].values():
+                chain["counts"] = CountMatrix.decode(chain["counts"])
+        for seq, path in self._segments():
+            if seq <= state["through"]:
+                continue  # already folded into base.json
+            with open(path) as f:
+                self._apply(state, json.load(f))
+            state["through"] = seq
+        self.state = state
+        self._seq = state["through"]
+        return manifest
+
+    def clear(self):
+        """Remove the log after a sync completes."""
+        if not self.root.exists():
+            return
+        for path in self.root.iterdir():
+            path.unlink()
+        self.root.rmdir()
+
+    # -- records ------------------------------------------------------------
+
+    def page(self, chain: str, cursor: str, token: str | None, counts: CountMatrix,
+             records: int, watermark: str):
+        """Checkpoint one counted page; `token` None marks the chain complete."""
+        self._append({
+            "op": "page", "chain": chain, "cursor": cursor, "token": token,
+            "counts": counts.encode(), "records": records, "watermark": watermark,
+        })
+
+    def reset_chain(self, chain: str):
+        """Forget a chain's progress, e.g. after its resumption token expired."""
+        self._append({"op": "reset", "chain": chain})
+
+    def cursor_done(self, cursor: str):
+        """Record that every chain of a cursor has been counted."""
+        self._append({"op": "done", "cursor": cursor})
+        self.compact()
+
+    def windows(self, cursor: str, windows: list[list[str | None]]):
+        """Record the datestamp windows a cursor was split into."""
+        self._append({"op": "windows", "cursor": cursor, "windows": windows})
+
+    # -- queries ------------------------------------------------------------
+
+    def chain(self, chain: str) -> dict | None:
+        return self.state["chains"].get(chain)
+
+    def chain_counts(self, chain: str) -> CountMatrix:
+        """Counts checkpointed for one chain, over the months it has counts for."""
+        return self.state["chains"][chain]["counts"].copy()
+
+    def cursor_counts(self, cursor: str) -> CountMatrix | None:
+        """Counts of every chain of a cursor; None if it has none."""
+        counts = None
+        for chain in self.state["chains"].values():
+            if chain["cursor"] == cursor:
+                if counts is None:
+                    counts = chain["counts"].copy()
+                else:
+                    counts.merge(chain["counts"], grow=True)
+        return counts
+
+    # -- internals ----------------------------------------------------------
+
+    def _segments(self) -> list[tuple[int, Path]]:
+        segments = []
+        for path in self.root.glob("*.json"):
+            if path.stem.isdigit():
+                segments.append((int(path.stem), path))
+        return sorted(segments)
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._apply(self.state, entry)
+            self.state["through"] = seq
+            self._in_flight += 1
+        # Written outside the lock, so chains checkpoint concurrently
+        try:
+            _write_atomic(self.root / f"{seq:010d}.json", entry)
+        finally:
+            with self._written:
+                self._in_flight -= 1
+                self._written.notify_all()
+
+    @staticmethod
+    def _apply(state: dict, entry: dict):
+        op = entry["op"]
+        if op == "page":
+            counts = CountMatrix.decode(entry["counts"])
+            chain = state["chains"].get(entry["chain"])
+            if chain is None:
+                chain = state["chains"][entry["chain"]] = {
+                    "cursor": entry["cursor"], "token": None, "counts": counts,
+                    "pages": 0, "records": 0, "watermark": "", "done": False,
+                }
+            else:
+                chain["counts"].merge(counts, grow=True)
+            chain["token"] = entry["token"]
+            chain["done"] = entry["token"] is None
+            chain["pages"] += 1
+            chain["records"] += entry["records"]
+            chain["watermark"] = max(chain["watermark"], entry["watermark"])
+        elif op == "reset":
+            state["chains"].pop(entry["chain"], None)
+        elif op == "done":
+            if entry["cursor"] not in state["completed"]:
+                state["completed"].append(entry["cursor"])
+        elif op == "windows":
+            state["windows"][entry["cursor"]] = entry["windows"]
+
+    def compact(self):
+        """Fold every segment written so far into base.json and delete them."""
+        with self._compact_lock:
+            with self._written:
+                # A segment numbered up to `through` may still be being written
+                self._written.wait_for(lambda: self._in_flight == 0)
+                snapshot = json.loads(json.dumps(self.state, default=CountMatrix.encode))
+            # Every segment up to `through` is now on disk; later ones are
+            # numbered after the snapshot and left alone
+            _write_atomic(self._base, snapshot)
+            for seq, path in self._segments():
+                if seq <= snapshot["through"]:
+                    path.unlink(missing_ok=True)
@@ -0,0 +1,220 @@
+"""
+Dense category x month count accumulator.
+
+Counts are kept in one flat integer array indexed by
+(month offset, category column): the category columns are a fixed tuple
+shared by every matrix of a sync, and months run from `start` to `end`
+inclusive. Adding a header is a single array increment; merging two
+matrices is one element-wise add (vectorised with NumPy when it is
+installed); a matrix serialises to a compressed byte string, and its
+non-zero cells are yielded directly as publication_counts rows.
+
+Only the standard library is required, so parse-pool workers can import
+this module cheaply.
+"""
+
+import base64
+import operator
+import struct
+import zlib
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_HEADER = struct.Struct("<4sHHHHI")  # magic, start year/month, end year/month, columns
+_MAGIC = b"CMX1"
+_ITEMSIZE = 8  # array typecode "q"
+
+
+def month_span(start: tuple[int, int], end: tuple[int, int]) -> int:
+    """Number of months from `start` to `end` inclusive (0 if end < start)."""
+    return max(0, (end[0] - start[0]) * 12 + end[1] - start[1] + 1)
+
+
+class CountMatrix:
+    """Counts per (year, month) and category over a fixed month range."""
+
+    __slots__ = ("categories", "start", "end", "months", "data", "_columns")
+
+    def __init__(self, categories: tuple[str, ...], start: tuple[int, int], end: tuple[int, int],
+                 data: array | None = None):
+        self.categories = tuple(categories)
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self.months = month_span(self.start, self.end)
+        size = self.months * len(self.categories)
+        if data is None:
+            data = array("q", bytes(size * _ITEMSIZE))
+        elif len(data) != size:
+            raise ValueError(f"CountMatrix data has {len(data)} cells, expected {size}")
+        self.data = data
+        self._columns: dict[str, int] | None = None
+
+    # -- indexing -----------------------------------------------------------
+
+    def column(self, category_id: str) -> int:
+        if self._columns is None:
+            self._columns = {cat: i for i, cat in enumerate(self.categories)}
+        return self._columns[category_id]
+
+    def month_offset(self, year: int, month: int) -> int | None:
+        """Row of (year, month), or None outside the matrix."""
+        offset = (year - self.start[0]) * 12 + month - self.start[1]
+        return offset if 0 <= offset < self.months else None
+
+    def key(self, offset: int) -> tuple[int, int]:
+        index = self.start[1] - 1 + offset
+        return (self.start[0] + index // 12, index % 12 + 1)
+
+    # -- updates ------------------------------------------------------------
+
+    def add(self, year: int, month: int, column: int, n: int = 1):
+        """Add n to one cell; months outside the range are ignored."""
+        offset = self.month_offset(year, month)
+        if offset is not None:
+            self.data[offset * len(self.categories) + column] += n
+
+    def merge(self, other: "CountMatrix", grow: bool = False) -> "CountMatrix":
+        """
+        Add every cell of `other` in place. Its categories must match and its
+        months must lie within this matrix's range (e.g. a trimmed page),
+        unless `grow` extends the range to cover them.
+        """
+        if grow and other.months:
+            self._cover(min(self.start, other.start), max(self.end, other.end))
+        offset = self.month_offset(*other.start)
+        if other.categories != self.categories or offset is None or (
+            other.months and offset + other.months > self.months
+        ):
+            raise ValueError(
+                f"Cannot merge a {other.start}..{other.end} matrix into {self.start}..{self.end}"
+            )
+        lo = offset * len(self.categories)
+        hi = lo + len(other.data)
+        if np is not None:
+            mine = np.frombuffer(self.data, dtype=np.int64)[lo:hi]
+            np.add(mine, np.frombuffer(other.data, dtype=np.int64), out=mine)
+        elif lo == 0 and hi == len(self.data):
+            self.data = array("q", map(operator.add, self.data, other.data))
+        else:
+            self.data[lo:hi] = array("q", map(operator.add, self.data[lo:hi], other.data))
+        return self
+
+    def _cover(self, start: tuple[int, int], end: tuple[int, int]):
+        if (start, end) == (self.start, self.end):
+            return
+        grown = CountMatrix(self.categories, start, end)
+        lo = grown.month_offset(*self.start) * len(self.categories)
+        grown.data[lo:lo + len(self.data)] = self.data
+        self.start, self.end, self.months, self.data = start, end, grown.months, grown.data
+
+    def _nonzero_rows(self) -> list[int]:
+        raw = self.data.tobytes()
+        row_bytes = len(self.categories) * _ITEMSIZE
+        zero = bytes(row_bytes)
+        return [
+            offset for offset in range(self.months)
+            if raw[offset * row_bytes:(offset + 1) * row_bytes] != zero
+        ]
+
+    def trimmed(self) -> "CountMatrix":
+        """A copy restricted to the months from the first to the last non-zero one."""
+        rows = self._nonzero_rows()
+        if not rows:
+            return CountMatrix(self.categories, self.start, self.start)
+        width = len(self.categories)
+        data = self.data[rows[0] * width:(rows[-1] + 1) * width]
+        return CountMatrix(self.categories, self.key(rows[0]), self.key(rows[-1]), data)
+
+    def copy(self) -> "CountMatrix":
+        return CountMatrix(self.categories, self.start, self.end, array("q", self.data))
+
+    def like(self) -> "CountMatrix":
+        """An empty matrix of the same shape."""
+        return CountMatrix(self.categories, self.start, self.end)
+
+    def clear(self):
+        """Drop every count in place, shrinking the range to its first month."""
+        self.end = self.start
+        self.months = 1
+        self.data = array("q", bytes(len(self.categories) * _ITEMSIZE))
+
+    # -- queries ------------------------------------------------------------
+
+    def total(self) -> int:
+        return sum(self.data)
+
+    def __bool__(self) -> bool:
+        return any(self.data)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CountMatrix):
+            return NotImplemented
+        return (
+            (self.categories, self.start, self.end) == (other.categories, other.start, other.end)
+            and self.data == other.data
+        )
+
+    def rows(self) -> list[tuple[str, int, int, int]]:
+        """Non-zero cells as (category_id, year, month, count) rows for write_counts."""
+        width = len(self.categories)
+        rows = []
+        for offset in self._nonzero_rows():
+            year, month = self.key(offset)
+            base = offset * width
+            for column, n in enumerate(self.data[base:base + width]):
+                if n:
+                    rows.append((self.categories[column], year, month, n))
+        return rows
+
+    def month_keys(self) -> list[tuple[int, int]]:
+        """(year, month) of every month with at least one count."""
+        return [self.key(offset) for offset in self._nonzero_rows()]
+
+    def to_dict(self) -> dict[tuple[int, int], dict[str, int]]:
+        """(year, month) -> {category_id: count} for the non-zero cells."""
+        counts = {}
+        for cat_id, year, month, n in self.rows():
+            counts.setdefault((year, month), {})[cat_id] = n
+        return counts
+
+    # -- serialisation ------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Compressed binary form; sparse matrices shrink to a few hundred bytes."""
+        names = "\n".join(self.categories).encode()
+        header = _HEADER.pack(_MAGIC, *self.start, *self.end, len(names))
+        return header + names + zlib.compress(self.data.tobytes(), 1)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CountMatrix":
+        magic, sy, sm, ey, em, names_len = _HEADER.unpack_from(blob)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialised CountMatrix")
+        offset = _HEADER.size
+        names = blob[offset:offset + names_len].decode()
+        data = array("q")
+        data.frombytes(zlib.decompress(blob[offset + names_len:]))
+        return cls(tuple(names.split("\n")) if names else (), (sy, sm), (ey, em), data)
+
+    def encode(self) -> str:
+        """to_bytes as base64 text, for JSON files."""
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, text: str) -> "CountMatrix":
+        return cls.from_bytes(base64.b64decode(text))
+
+    def __reduce__(self):
+        # Pickled (e.g. back from a parse-pool worker) in compressed form
+        return (CountMatrix.from_bytes, (self.to_bytes(),))
+
+    def __repr__(self) -> str:
+        return (
+            f"CountMatrix({len(self.categories)} categories, "
+            f"{self.start[0]}-{self.start[1]:02d}..{self.end[0]}-{self.end[1]:02d}, "
+            f"total={self.total()})"
+        )
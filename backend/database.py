@@ -1,7 +1,22 @@
 import aiosqlite
+import asyncio
+import calendar
+from collections import defaultdict
+from datetime import datetime
 from pathlib import Path
 
 DATABASE_PATH = Path(__file__).parent / "arxiv_trends.db"
+DAILY_COUNT_MONTHS = 13  # months kept in daily_counts: the current one and a year before it
+
+# Per-connection settings for connections that write in bulk. WAL itself is
+# persistent and set once by init_db; with WAL, synchronous=NORMAL is still
+# safe against corruption and only syncs at checkpoints.
+WRITE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",  # KiB
+    "PRAGMA busy_timeout = 5000",  # ms; readers and the writer share the file
+)
 
 
 async def get_db():
@@ -17,6 +32,8 @@ async def get_db():
 async def init_db():
     """Initialize database schema."""
     async with aiosqlite.connect(DATABASE_PATH) as db:
+        # Readers no longer block behind a sync's write transaction
+        await db.execute("PRAGMA journal_mode = WAL")
         await db.executescript("""
             -- Categories table
             CREATE TABLE IF NOT EXISTS categories (
@@ -36,11 +53,97 @@ async def init_db():
                 UNIQUE(category_id, year, month)
             );
 
+            -- Stats read every category over a range of months
+            CREATE INDEX IF NOT EXISTS idx_publication_counts_month
+                ON publication_counts (year, month);
+
             -- Metadata for tracking sync state
             CREATE TABLE IF NOT EXISTS sync_metadata (
                 key TEXT PRIMARY KEY,
                 value TEXT
             );
+
+            -- Per-paper ledger: what each paper currently contributes to
+            -- publication_counts, so syncs can apply deltas
+            CREATE TABLE IF NOT EXISTS papers (
+                arxiv_id TEXT PRIMARY KEY,
+                year INTEGER,
+                month INTEGER,
+                categories BLOB,  -- bitmask over CATEGORY_IDS
+                datestamp TEXT,
+                seen_at TEXT,  -- start time of the sync that last saw it
+                announced TEXT  -- first datestamp seen: the day it was announced
+            ) WITHOUT ROWID;
+
+            -- Papers per category and day of their submission month, for
+            -- the last DAILY_COUNT_MONTHS months; kept by PaperLedger
+            CREATE TABLE IF NOT EXISTS daily_counts (
+                category_id TEXT,
+                year INTEGER,
+                month INTEGER,
+                day INTEGER,  -- see announcement_day()
+                count INTEGER,
+                PRIMARY KEY (category_id, year, month, day)
+            ) WITHOUT ROWID;
+
+            -- Estimated final count of the running month (see nowcast.py)
+            CREATE TABLE IF NOT EXISTS nowcasts (
+                category_id TEXT PRIMARY KEY,
+                year INTEGER,
+                month INTEGER,
+                day INTEGER,  -- day of the month the estimate was made on
+                observed INTEGER,  -- papers counted so far
+                estimate INTEGER,  -- NULL: too early in the month
+                share REAL  -- share of a month usually announced by `day`
+            );
+
+            -- Durable queue of sync jobs (see sync_jobs.py)
+            CREATE TABLE IF NOT EXISTS sync_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,  -- full | quick | category | backfill
+                params TEXT,  -- JSON keyword arguments for the sync
+                priority INTEGER DEFAULT 0,
+                status TEXT NOT NULL,  -- queued | running | done | failed | cancelled
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                cancel_requested INTEGER DEFAULT 0,
+                worker TEXT,
+                created_at TEXT,
+                started_at TEXT,
+                heartbeat_at TEXT,
+                finished_at TEXT,
+                run_after TEXT,  -- earliest start of a retry
+                error TEXT,
+                progress TEXT  -- JSON snapshot of the collector's status
+            );
+            CREATE INDEX IF NOT EXISTS idx_sync_jobs_status
+                ON sync_jobs (status, priority, id);
+
+            -- Leased shards of a distributed full sync (see harvest_shards.py)
+            CREATE TABLE IF NOT EXISTS harvest_shards (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sync_id TEXT NOT NULL,
+                parent_set TEXT NOT NULL,
+                from_date TEXT NOT NULL,  -- datestamp window
+                until_date TEXT,  -- NULL: up to now
+                start_year INTEGER,
+                end_year INTEGER,
+                end_month INTEGER,
+                seen_at TEXT,  -- start time of the sync, stamped on the papers
+                status TEXT NOT NULL,  -- pending | leased | done | failed
+                lease_owner TEXT,
+                lease_expires REAL,  -- unix time
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                counts BLOB,  -- CountMatrix of a done shard
+                records INTEGER,  -- papers counted; updated while leased
+                watermark TEXT,
+                density TEXT,  -- JSON: records per datestamp month
+                finished_at TEXT,
+                UNIQUE (sync_id, parent_set, from_date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_harvest_shards_status
+                ON harvest_shards (status, id);
         """)
         await db.commit()
 
@@ -261,3 +364,285 @@ async def seed_categories():
                     (sub_id, sub_name, parent_id)
                 )
         await db.commit()
+
+
+# Fixed category order used for the ledger's category bitmask.
+# Only ever append new categories: reordering invalidates stored masks.
+CATEGORY_IDS = [
+    sub_id
+    for parent_data in ARXIV_CATEGORIES.values()
+    for sub_id in parent_data["subcategories"]
+]
+CATEGORY_BIT = {cat_id: i for i, cat_id in enumerate(CATEGORY_IDS)}
+_MASK_BYTES = (len(CATEGORY_IDS) + 7) // 8
+
+
+def encode_categories(mask: int) -> bytes:
+    """Serialize a category bitmask for the papers table."""
+    return mask.to_bytes(_MASK_BYTES, "little")
+
+
+def decode_categories(mask: int) -> list[str]:
+    """Category IDs whose bit is set in mask."""
+    cats = []
+    i = 0
+    while mask:
+        if mask & 1:
+            cats.append(CATEGORY_IDS[i])
+        mask >>= 1
+        i += 1
+    return cats
+
+
+def last_complete_month(now: datetime | None = None) -> tuple[int, int]:
+    """The most recent month that has fully ended."""
+    now = now or datetime.now()
+    if now.month == 1:
+        return (now.year - 1, 12)
+    return (now.year, now.month - 1)
+
+
+def daily_window_start(now: datetime | None = None) -> tuple[int, int]:
+    """First month kept in daily_counts."""
+    now = now or datetime.now()
+    first = now.year * 12 + now.month - DAILY_COUNT_MONTHS
+    return (first // 12, first % 12 + 1)
+
+
+def announcement_day(year: int, month: int, announced: str | None) -> int:
+    """
+    Day of its submission month a paper is counted on in daily_counts: the
+    day it was announced. Papers announced after their month ended (or
+    first seen after a revision) count on its last day.
+    """
+    last_day = calendar.monthrange(year, month)[1]
+    if not announced:
+        return last_day
+    stamp = announced[:7]
+    if stamp == f"{year:04d}-{month:02d}":
+        return int(announced[8:10])
+    return 1 if stamp < f"{year:04d}-{month:02d}" else last_day
+
+
+async def tune_for_writes(db: aiosqlite.Connection):
+    """Apply WRITE_PRAGMAS to a connection."""
+    for pragma in WRITE_PRAGMAS:
+        await db.execute(pragma)
+
+
+def count_rows(counts: dict) -> list[tuple[str, int, int, int]]:
+    """(year, month) -> {category_id: count}  to  [(category_id, year, month, count)]."""
+    return [
+        (cat_id, year, month, count)
+        for (year, month), cat_counts in sorted(counts.items())
+        for cat_id, count in cat_counts.items()
+    ]
+
+
+async def write_counts(db: aiosqlite.Connection, rows: list[tuple], add: bool = False) -> int:
+    """
+    Write (category_id, year, month, count) rows to publication_counts in
+    one executemany. Existing rows are overwritten, or incremented with
+    add=True. Runs in the caller's transaction; the caller commits.
+    Returns the number of rows written.
+    """
+    update = "count + excluded.count" if add else "excluded.count"
+    await db.executemany(f"""
+        INSERT INTO publication_counts (category_id, year, month, count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(category_id, year, month)
+        DO UPDATE SET count = {update}
+    """, rows)
+    return len(rows)
+
+
+async def write_daily_counts(db: aiosqlite.Connection, rows: list[tuple]) -> int:
+    """
+    Add (category_id, year, month, day, delta) rows to daily_counts. Runs in
+    the caller's transaction. Returns the number of rows written.
+    """
+    await db.executemany("""
+        INSERT INTO daily_counts (category_id, year, month, day, count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(category_id, year, month, day)
+        DO UPDATE SET count = count + excluded.count
+    """, rows)
+    return len(rows)
+
+
+async def rebuild_daily_counts(db: aiosqlite.Connection, now: datetime | None = None) -> int:
+    """
+    Recount daily_counts from the papers ledger after a full sync has
+    re-seeded it. Runs in the caller's transaction.
+    """
+    start_year, start_month = daily_window_start(now)
+    counts: dict[tuple, int] = defaultdict(int)
+    cursor = await db.execute(
+        "SELECT year, month, categories, announced FROM papers WHERE year * 12 + month >= ?",
+        (start_year * 12 + start_month,)
+    )
+    async for year, month, blob, announced in cursor:
+        day = announcement_day(year, month, announced)
+        for cat_id in decode_categories(int.from_bytes(blob, "little")):
+            counts[(cat_id, year, month, day)] += 1
+    await db.execute("DELETE FROM daily_counts")
+    return await write_daily_counts(db, [(*key, n) for key, n in sorted(counts.items())])
+
+
+class CountWriter:
+    """
+    Write-behind task for publication_counts.
+
+    Batches of rows passed to put() go through a bounded queue to a
+    background task. The task writes and commits each batch on its own
+    connection, so finished parent sets become queryable while the sync
+    goes on. The sync only waits when `maxsize` batches are pending.
+    A write error is raised from the next put() or from close().
+    """
+
+    def __init__(self, path: Path, maxsize: int = 4, add: bool = False):
+        self.path = path
+        self.add = add
+        self.rows = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._task: asyncio.Task | None = None
+        self._error: Exception | None = None
+
+    async def __aenter__(self) -> "CountWriter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def put(self, rows: list[tuple]):
+        """Queue (category_id, year, month, count) rows for writing."""
+        if self._error is not None:
+            raise self._error
+        await self._queue.put(rows)
+
+    async def close(self) -> int:
+        """Wait for every queued batch to be committed. Returns rows written."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        if self._error is not None:
+            raise self._error
+        return self.rows
+
+    async def _run(self):
+        try:
+            async with aiosqlite.connect(self.path) as db:
+                await tune_for_writes(db)
+                while (rows := await self._queue.get()) is not None:
+                    self.rows += await write_counts(db, rows, add=self.add)
+                    await db.commit()
+        except Exception as e:
+            self._error = e
+            # Keep draining so put() never blocks on a dead writer
+            while await self._queue.get() is not None:
+                pass
+
+
+class PaperLedger:
+    """
+    Applies harvested papers to the papers ledger and publication_counts.
+
+    Each entry is (arxiv_id, year, month, mask, datestamp, deleted). The
+    ledger records what every paper currently contributes, so a paper seen
+    again only changes the counts if its month or categories changed, and
+    a deleted paper has its contribution subtracted. Any partial harvest
+    can therefore be merged safely, in any order and any number of times.
+    The same deltas go into daily_counts, on the day each paper was first
+    announced.
+
+    With apply_counts=False only the ledger rows are written; a full sync
+    uses this while it rebuilds publication_counts itself.
+    """
+
+    def __init__(self, db: aiosqlite.Connection, seen_at: str, apply_counts: bool = True):
+        self.db = db
+        self.seen_at = seen_at
+        self.apply_counts = apply_counts
+        self.daily_start = daily_window_start()
+        # Cursors share one ledger; a cross-listed paper may arrive on two at once
+        self._lock = asyncio.Lock()
+
+    async def _load(self, arxiv_ids: list[str]) -> dict[str, tuple[int, int, int, str]]:
+        existing = {}
+        for i in range(0, len(arxiv_ids), 500):
+            chunk = arxiv_ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = await self.db.execute(
+                f"SELECT arxiv_id, year, month, categories, announced FROM papers WHERE arxiv_id IN ({placeholders})",
+                chunk
+            )
+            for arxiv_id, year, month, blob, announced in await cursor.fetchall():
+                existing[arxiv_id] = (year, month, int.from_bytes(blob, "little"), announced)
+        return existing
+
+    async def apply(self, entries: list[tuple]) -> int:
+        """Merge entries into the ledger. Returns the number of papers that changed."""
+        if not entries:
+            return 0
+
+        async with self._lock:
+            existing = await self._load(list({e[0] for e in entries}))
+            deltas: dict[tuple[str, int, int], int] = defaultdict(int)
+            daily: dict[tuple[str, int, int, int], int] = defaultdict(int)
+            upserts = []
+            removed = []
+            touched = []
+
+            def contribute(year: int, month: int, mask: int, announced: str | None, sign: int):
+                cats = decode_categories(mask)
+                for cat_id in cats:
+                    deltas[(cat_id, year, month)] += sign
+                if (year, month) >= self.daily_start:
+                    day = announcement_day(year, month, announced)
+                    for cat_id in cats:
+                        daily[(cat_id, year, month, day)] += sign
+
+            for arxiv_id, year, month, mask, datestamp, deleted in entries:
+                old = existing.get(arxiv_id)
+                if deleted:
+                    if old is None:
+                        continue
+                    removed.append((arxiv_id,))
+                    existing.pop(arxiv_id)
+                elif old is not None and old[:3] == (year, month, mask):
+                    touched.append((datestamp, self.seen_at, arxiv_id))
+                    continue
+                else:
+                    # A revision keeps the day the paper was first announced
+                    announced = old[3] if old is not None and old[3] else datestamp
+                    upserts.append((
+                        arxiv_id, year, month, encode_categories(mask), datestamp, self.seen_at, announced
+                    ))
+                    existing[arxiv_id] = (year, month, mask, announced)
+                    contribute(year, month, mask, announced, 1)
+
+                if old is not None:
+                    contribute(*old, -1)
+
+            if upserts:
+                await self.db.executemany("""
+                    INSERT OR REPLACE INTO papers
+                    (arxiv_id, year, month, categories, datestamp, seen_at, announced)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, upserts)
+            if removed:
+                await self.db.executemany("DELETE FROM papers WHERE arxiv_id = ?", removed)
+            if touched:
+                await self.db.executemany(
+                    "UPDATE papers SET datestamp = ?, seen_at = ? WHERE arxiv_id = ?", touched
+                )
+            if self.apply_counts:
+                await write_counts(
+                    self.db, [(c, y, m, d) for (c, y, m), d in deltas.items() if d], add=True
+                )
+                await write_daily_counts(self.db, [(*key, d) for key, d in daily.items() if d])
+            await self.db.commit()
+
+        return len(upserts) + len(removed)
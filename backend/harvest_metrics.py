@@ -0,0 +1,153 @@
+"""
+Throughput, waste and remaining-work metrics of a harvest.
+
+The collector feeds every page, fetch and retry of the current sync into a
+HarvestMetrics. Its report goes into the sync status (and with it into the
+sync job's heartbeat), and prometheus_text() renders one in the Prometheus
+text exposition format for the /metrics endpoint.
+
+Remaining work comes from the resumptionToken of each page: arXiv reports
+`completeListSize` (headers in the whole list) and `cursor` (headers
+returned before this page), so every chain knows how much of it is left.
+"""
+
+import time
+
+# Prometheus name, report key, help text
+PROMETHEUS_GAUGES = (
+    ("arxiv_harvest_pages", "pages", "Pages harvested"),
+    ("arxiv_harvest_records", "records", "Headers received"),
+    ("arxiv_harvest_records_counted", "counted", "Headers counted into publication_counts"),
+    ("arxiv_harvest_records_out_of_range", "out_of_range",
+     "Headers skipped because their ID falls outside the synced months"),
+    ("arxiv_harvest_waste_ratio", "waste_ratio", "Share of received headers outside the synced months"),
+    ("arxiv_harvest_decoded_bytes", "bytes", "Response bytes after content decoding"),
+    ("arxiv_harvest_wire_bytes", "wire_bytes", "Response bytes as transferred"),
+    ("arxiv_harvest_pages_per_second", "pages_per_second", "Pages harvested per second"),
+    ("arxiv_harvest_records_per_second", "records_per_second", "Headers received per second"),
+    ("arxiv_harvest_parse_ms_per_page", "parse_ms_per_page", "Milliseconds spent parsing and counting a page"),
+    ("arxiv_harvest_retries", "retries", "Requests retried after an error or throttling"),
+    ("arxiv_harvest_rate_limit_wait_seconds", "rate_limit_wait_seconds", "Time spent waiting on the rate limiter"),
+    ("arxiv_harvest_rate_limit_share", "rate_limit_share",
+     "Share of the fetch stage spent waiting on the rate limiter"),
+    ("arxiv_harvest_remaining_records", "remaining_records", "Headers left in the lists being harvested"),
+    ("arxiv_harvest_eta_seconds", "eta_seconds", "Estimated seconds until the harvest is complete"),
+    ("arxiv_harvest_elapsed_seconds", "elapsed_seconds", "Seconds since the harvest started"),
+)
+
+
+class HarvestMetrics:
+    """Counters of the pages, fetches and retries of one sync."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.pages = 0
+        self.records = 0
+        self.counted = 0
+        self.out_of_range = 0
+        self.bytes = 0
+        self.wire_bytes = 0
+        self.parse_seconds = 0.0
+        self.fetch_seconds = 0.0  # waiting on the server
+        self.wait_seconds = 0.0  # waiting on the rate limiter
+        self.retries = 0
+        self.throttled = 0
+        # chain -> (completeListSize, headers received so far)
+        self._chains: dict[str, tuple[int, int]] = {}
+
+    def observe_page(self, chain: str, page, digest, parse_seconds: float):
+        """Record a page once it has been counted."""
+        self.pages += 1
+        self.records += digest.records
+        self.counted += digest.counted
+        self.out_of_range += digest.out_of_range
+        self.bytes += page.bytes_received
+        self.wire_bytes += page.wire_bytes
+        self.parse_seconds += parse_seconds
+        if page.complete_list_size is not None:
+            received = page.complete_list_size if not page.token else (page.cursor or 0) + digest.records
+            self._chains[chain] = (page.complete_list_size, received)
+        elif not page.token and chain in self._chains:
+            size, _ = self._chains[chain]
+            self._chains[chain] = (size, size)
+
+    def observe_fetch(self, fetch_seconds: float, wait_seconds: float):
+        self.fetch_seconds += fetch_seconds
+        self.wait_seconds += wait_seconds
+
+    def observe_retry(self, throttled: bool):
+        self.retries += 1
+        if throttled:
+            self.throttled += 1
+
+    def restart_chain(self, chain: str):
+        """A chain starts over (expired token); its list position is gone."""
+        self._chains.pop(chain, None)
+
+    def report(self, unstarted_chains: int = 0) -> dict:
+        """
+        Current metrics. `unstarted_chains` is the number of chains that have
+        not returned a page yet; the ETA assumes each is as long as the
+        average chain seen so far.
+        """
+        elapsed = time.monotonic() - self.started
+        sizes = [size for size, _ in self._chains.values()]
+        remaining = sum(max(0, size - received) for size, received in self._chains.values())
+        if sizes and unstarted_chains:
+            remaining += round(sum(sizes) / len(sizes) * unstarted_chains)
+        records_per_second = self.records / elapsed if elapsed > 0 else 0.0
+        fetch_stage = self.fetch_seconds + self.wait_seconds
+        eta = None
+        if sizes and records_per_second > 0:
+            eta = round(remaining / records_per_second, 1)
+        return {
+            "pages": self.pages,
+            "records": self.records,
+            "counted": self.counted,
+            "out_of_range": self.out_of_range,
+            "waste_ratio": round(self.out_of_range / self.records, 4) if self.records else 0.0,
+            "bytes": self.bytes,
+            "wire_bytes": self.wire_bytes,
+            "pages_per_second": round(self.pages / elapsed, 3) if elapsed > 0 else 0.0,
+            "records_per_second": round(records_per_second, 1),
+            "parse_ms_per_page": round(self.parse_seconds / self.pages * 1000, 2) if self.pages else 0.0,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "rate_limit_wait_seconds": round(self.wait_seconds, 1),
+            "rate_limit_share": round(self.wait_seconds / fetch_stage, 3) if fetch_stage else 0.0,
+            "list_size": sum(sizes) if sizes else None,
+            "remaining_records": remaining if sizes else None,
+            "eta_seconds": eta,
+            "elapsed_seconds": round(elapsed, 1),
+        }
+
+    def summary(self) -> str:
+        r = self.report()
+        return (
+            f"{r['pages']} pages, {r['records']} headers at {r['records_per_second']}/s, "
+            f"{r['waste_ratio']:.1%} outside the synced months, "
+            f"parse {r['parse_ms_per_page']} ms/page, {r['retries']} retries, "
+            f"{r['rate_limit_share']:.0%} of fetch time waiting on the rate limiter"
+        )
+
+
+def prometheus_text(report: dict | None, gauges: dict[str, tuple[float, str]] | None = None) -> str:
+    """
+    Render a HarvestMetrics report in the Prometheus text format. Values are
+    those of the running sync, or of the last one. `gauges` adds
+    name -> (value, help) entries; missing values are left out.
+    """
+    lines = []
+
+    def gauge(name: str, value, help_text: str):
+        if value is None:
+            return
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value!r}")
+
+    for name, (value, help_text) in (gauges or {}).items():
+        gauge(name, value, help_text)
+    for name, key, help_text in PROMETHEUS_GAUGES:
+        gauge(name, (report or {}).get(key), help_text)
+    return "\n".join(lines) + "\n"
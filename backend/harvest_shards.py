@@ -0,0 +1,311 @@
+"""
+Lease-based shards of a distributed full sync, kept in the `harvest_shards`
+table.
+
+A sharded full sync splits every parent set into datestamp windows. Each
+(parent set, window) is a shard that any worker process sharing the
+database can lease, harvest and complete:
+
+    pending -> leased -> done
+                 |  \\
+                 |   -> failed (after MAX_SHARD_ATTEMPTS) -> pending (sync resumed)
+                 -> pending (released after an error, or lease expired)
+
+A lease lasts LEASE_SECONDS and is renewed while the shard is harvested.
+A worker that dies stops renewing, and the shard is leased again once the
+lease has expired. Completing a shard only succeeds for the lease holder,
+so a worker that lost its lease cannot overwrite a newer result.
+
+Merging is idempotent: pages go into the papers ledger, where a paper seen
+twice changes nothing, and a parent set's publication_counts are
+overwritten with the sum of its shards' counts once all of them are done.
+Lease times are unix timestamps, so nodes sharing the database need
+reasonably synchronised clocks.
+"""
+
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import aiosqlite
+
+from count_matrix import CountMatrix
+from database import DATABASE_PATH
+
+LEASE_SECONDS = 90.0
+LEASE_RENEW_INTERVAL = 30.0  # seconds; well inside the lease
+MAX_SHARD_ATTEMPTS = 5
+
+
+def process_name() -> str:
+    """Identifies this worker process in leases and job rows."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class HarvestShard:
+    id: int
+    sync_id: str
+    parent_set: str
+    from_date: str
+    until_date: str | None
+    start_year: int
+    end_year: int
+    end_month: int
+    seen_at: str
+    status: str
+    lease_owner: str | None
+    attempts: int
+
+    @classmethod
+    def from_row(cls, row) -> "HarvestShard":
+        return cls(**{name: row[name] for name in cls.__dataclass_fields__})
+
+    @property
+    def label(self) -> str:
+        return f"{self.parent_set} [{self.from_date}..{self.until_date or 'now'}]"
+
+
+class ShardQueue:
+    """Operations on the harvest_shards table. Every call uses its own short connection."""
+
+    def __init__(self, path: Path = DATABASE_PATH):
+        self.path = path
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA busy_timeout = 5000")
+        return db
+
+    async def plan(self, shards: list[dict]) -> int:
+        """Add shards; ones already planned for the same sync are kept as they are."""
+        db = await self._connect()
+        try:
+            cursor = await db.executemany("""
+                INSERT OR IGNORE INTO harvest_shards
+                (sync_id, parent_set, from_date, until_date, start_year, end_year, end_month,
+                 seen_at, status)
+                VALUES (:sync_id, :parent_set, :from_date, :until_date, :start_year, :end_year,
+                        :end_month, :seen_at, 'pending')
+            """, shards)
+            await db.commit()
+            return cursor.rowcount
+        finally:
+            await db.close()
+
+    async def claim(self, owner: str, sync_id: str | None = None,
+                    lease: float = LEASE_SECONDS) -> HarvestShard | None:
+        """Lease a pending shard or one whose lease has expired, oldest first."""
+        now = time.time()
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                UPDATE harvest_shards
+                SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM harvest_shards
+                    WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                      AND attempts < ?
+                      AND (? IS NULL OR sync_id = ?)
+                    ORDER BY id
+                    LIMIT 1
+                )
+                RETURNING *
+            """, (owner, now + lease, now, MAX_SHARD_ATTEMPTS, sync_id, sync_id))
+            row = await cursor.fetchone()
+            # Expired leases that have used their attempts will not be retried
+            await db.execute("""
+                UPDATE harvest_shards SET status = 'failed', lease_owner = NULL
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """, (now, MAX_SHARD_ATTEMPTS))
+            await db.commit()
+        finally:
+            await db.close()
+        return HarvestShard.from_row(row) if row is not None else None
+
+    async def renew(self, shard_id: int, owner: str, lease: float = LEASE_SECONDS,
+                    records: int | None = None) -> bool:
+        """
+        Extend a lease, recording the papers counted so far. False means the
+        lease was lost to another worker.
+        """
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                UPDATE harvest_shards SET lease_expires = ?, records = COALESCE(?, records)
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (time.time() + lease, records, shard_id, owner))
+            await db.commit()
+            return cursor.rowcount == 1
+        finally:
+            await db.close()
+
+    async def complete(self, shard_id: int, owner: str, counts: CountMatrix,
+                       records: int, watermark: str, density: dict[str, int]) -> bool:
+        """Store a harvested shard's result. False if the lease was lost meanwhile."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                UPDATE harvest_shards
+                SET status = 'done', lease_owner = NULL, lease_expires = NULL, error = NULL,
+                    counts = ?, records = ?, watermark = ?, density = ?, finished_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (
+                counts.to_bytes(), records, watermark, json.dumps(density),
+                datetime.now().isoformat(), shard_id, owner
+            ))
+            await db.commit()
+            return cursor.rowcount == 1
+        finally:
+            await db.close()
+
+    async def release(self, shard_id: int, owner: str, error: str):
+        """Give a shard back after an error; it fails once it has used its attempts."""
+        db = await self._connect()
+        try:
+            await db.execute("""
+                UPDATE harvest_shards
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expires = NULL, error = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            """, (MAX_SHARD_ATTEMPTS, error, shard_id, owner))
+            await db.commit()
+        finally:
+            await db.close()
+
+    async def retry_failed(self, sync_id: str) -> int:
+        """
+        Put a resumed sync's failed shards back in the queue with fresh
+        attempts; the last error stays recorded until they run again.
+        Returns the number of shards reset.
+        """
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                UPDATE harvest_shards
+                SET status = 'pending', attempts = 0, lease_owner = NULL, lease_expires = NULL
+                WHERE sync_id = ? AND status = 'failed'
+            """, (sync_id,))
+            await db.commit()
+            return cursor.rowcount
+        finally:
+            await db.close()
+
+    async def parent_counts(self, sync_id: str, parent_set: str) -> CountMatrix | None:
+        """Summed counts of a parent set, or None while any of its shards is unfinished."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "SELECT status, counts FROM harvest_shards WHERE sync_id = ? AND parent_set = ?",
+                (sync_id, parent_set)
+            )
+            rows = await cursor.fetchall()
+        finally:
+            await db.close()
+        if not rows or any(row["status"] != "done" for row in rows):
+            return None
+        total = None
+        for row in rows:
+            counts = CountMatrix.from_bytes(row["counts"])
+            total = counts if total is None else total.merge(counts, grow=True)
+        return total
+
+    async def results(self, sync_id: str) -> list[dict]:
+        """Watermark, density and records of every done shard of a sync."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                SELECT parent_set, records, watermark, density FROM harvest_shards
+                WHERE sync_id = ? AND status = 'done'
+            """, (sync_id,))
+            rows = await cursor.fetchall()
+        finally:
+            await db.close()
+        return [
+            {
+                "parent_set": row["parent_set"], "records": row["records"],
+                "watermark": row["watermark"], "density": json.loads(row["density"] or "{}"),
+            }
+            for row in rows
+        ]
+
+    async def progress(self, sync_id: str) -> dict[str, int]:
+        """Number of shards of a sync in each status."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "SELECT status, COUNT(*) AS n FROM harvest_shards WHERE sync_id = ? GROUP BY status",
+                (sync_id,)
+            )
+            return {row["status"]: row["n"] for row in await cursor.fetchall()}
+        finally:
+            await db.close()
+
+    async def shards(self, sync_id: str | None = None) -> list[dict]:
+        """Every shard of a sync (by default the newest one), with its progress."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                SELECT id, sync_id, parent_set, from_date, until_date, status, lease_owner,
+                       lease_expires, attempts, records, error, finished_at
+                FROM harvest_shards
+                WHERE sync_id = COALESCE(?, (SELECT sync_id FROM harvest_shards ORDER BY id DESC LIMIT 1))
+                ORDER BY id
+            """, (sync_id,))
+            return [dict(row) for row in await cursor.fetchall()]
+        finally:
+            await db.close()
+
+    async def active_owners(self) -> int:
+        """Worker processes currently holding a live lease."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM harvest_shards WHERE status = 'leased' AND lease_expires >= ?",
+                (time.time(),)
+            )
+            return (await cursor.fetchone())[0]
+        finally:
+            await db.close()
+
+    async def sync_ids(self) -> list[str]:
+        """Syncs that still have shards recorded, oldest first."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "SELECT sync_id FROM harvest_shards GROUP BY sync_id ORDER BY MIN(id)"
+            )
+            return [row["sync_id"] for row in await cursor.fetchall()]
+        finally:
+            await db.close()
+
+    async def describe(self, sync_id: str) -> dict:
+        """Parent sets, start year and ledger timestamp a sync was planned with."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                SELECT parent_set, MIN(start_year) AS start_year, MIN(seen_at) AS seen_at
+                FROM harvest_shards WHERE sync_id = ? GROUP BY parent_set
+            """, (sync_id,))
+            rows = await cursor.fetchall()
+        finally:
+            await db.close()
+        return {
+            "sync_id": sync_id,
+            "parent_sets": sorted(row["parent_set"] for row in rows),
+            "start_year": min((row["start_year"] for row in rows), default=None),
+            "seen_at": min((row["seen_at"] for row in rows), default=None),
+        }
+
+    async def clear(self, sync_id: str):
+        db = await self._connect()
+        try:
+            await db.execute("DELETE FROM harvest_shards WHERE sync_id = ?", (sync_id,))
+            await db.commit()
+        finally:
+            await db.close()
@@ -0,0 +1,107 @@
+"""
+HTTP client configuration and transfer accounting for the harvester.
+
+The collector talks to a single host, so one keep-alive pool is reused for
+the whole sync. HTTP/2 is used when the optional `h2` package is installed
+(`pip install httpx[http2]`). Compressed transfer is always negotiated.
+
+TransportStats counts bytes as received on the wire and after decoding, and
+whether each request opened a new connection or reused a pooled one. A high
+compression ratio with slow pages points at latency; a low one at
+bandwidth.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = 8
+HTTP_MAX_KEEPALIVE = 4
+HTTP_KEEPALIVE_EXPIRY = 90.0  # seconds; the rate limiter spaces requests by 3s or more
+HTTP2 = True  # only takes effect when h2 is installed
+ACCEPT_ENCODING = "gzip, deflate"
+
+
+def build_client(
+    timeout: httpx.Timeout,
+    http2: bool = HTTP2,
+    max_connections: int = HTTP_MAX_CONNECTIONS,
+    max_keepalive: int = HTTP_MAX_KEEPALIVE,
+    keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+    transport: httpx.AsyncBaseTransport | None = None
+) -> httpx.AsyncClient:
+    """AsyncClient with pooled keep-alive connections and compressed transfer."""
+    return httpx.AsyncClient(
+        timeout=timeout,
+        follow_redirects=True,
+        http2=http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        headers={"Accept-Encoding": ACCEPT_ENCODING},
+        transport=transport,
+    )
+
+
+@dataclass
+class TransportStats:
+    """Bytes and connections used by the requests of one sync."""
+    requests: int = 0
+    new_connections: int = 0
+    wire_bytes: int = 0  # as received, before content decoding
+    decoded_bytes: int = 0
+    http_versions: Counter = field(default_factory=Counter)
+
+    def trace(self):
+        """
+        Per-request httpcore trace hook; pass as extensions={"trace": ...}.
+        Counts the request as a new connection if a TCP connect happened.
+        """
+        async def hook(event: str, info: dict):
+            if event == "connection.connect_tcp.complete":
+                self.new_connections += 1
+        return hook
+
+    def observe(self, response: httpx.Response, decoded_bytes: int):
+        """Record a response that has been read completely."""
+        self.requests += 1
+        self.wire_bytes += response.num_bytes_downloaded
+        self.decoded_bytes += decoded_bytes
+        self.http_versions[response.http_version] += 1
+
+    @property
+    def reused_connections(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def report(self) -> dict:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "wire_bytes": self.wire_bytes,
+            "decoded_bytes": self.decoded_bytes,
+            "compression_ratio": round(self.compression_ratio, 2),
+            "http_versions": dict(self.http_versions),
+        }
+
+    def summary(self) -> str:
+        versions = ", ".join(f"{v} x{n}" for v, n in sorted(self.http_versions.items()))
+        return (
+            f"{self.requests} requests ({versions or 'none'}), "
+            f"{self.new_connections} new / {self.reused_connections} reused connections, "
+            f"{self.wire_bytes / 1e6:.1f} MB on the wire -> {self.decoded_bytes / 1e6:.1f} MB decoded "
+            f"({self.compression_ratio:.1f}x)"
+        )
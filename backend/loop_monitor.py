@@ -0,0 +1,70 @@
+"""
+Event-loop lag monitor.
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up. Any lateness is time the loop spent running something else without
+yielding (parsing a page, a blocking call), during which API requests on the
+same loop were not served.
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = 0.05  # seconds between probes
+LOOP_LAG_THRESHOLD = 0.1  # seconds of lag that count as a stall
+
+
+class LoopLagMonitor:
+    """Samples the lag of the running event loop until stopped."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - expected)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                self.stalled_seconds += lag
+                logger.debug(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+    def report(self) -> dict:
+        return {
+            "samples": self.samples,
+            "max_ms": round(self.max_lag * 1000, 1),
+            "mean_ms": round(self.total_lag / self.samples * 1000, 2) if self.samples else 0.0,
+            "stalls": self.stalls,
+            "stalled_seconds": round(self.stalled_seconds, 2),
+        }
+
+    def summary(self) -> str:
+        r = self.report()
+        return (
+            f"event loop lag max {r['max_ms']} ms, mean {r['mean_ms']} ms, "
+            f"{r['stalls']} stalls over {self.threshold * 1000:.0f} ms ({r['stalled_seconds']}s)"
+        )
@@ -1,25 +1,61 @@
 from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 import aiosqlite
-from database import DATABASE_PATH, init_db, seed_categories, ARXIV_CATEGORIES
-from arxiv_collector import collector
-from scheduler import start_scheduler, stop_scheduler
+from database import (
+    DATABASE_PATH, DAILY_COUNT_MONTHS, init_db, seed_categories, ARXIV_CATEGORIES, last_complete_month
+)
+from arxiv_collector import (
+    collector, configure_logging, CATEGORY_TO_SETSPEC, MAX_REFRESH_MONTHS, PARENT_SETS,
+    REFRESH_MONTHS, SYNC_CONCURRENCY
+)
+from scheduler import schedule_status, start_scheduler, stop_scheduler
+from sync_jobs import JobConflict, JobQueue, SyncJob as QueuedJob, PRIORITY_MANUAL
+from sync_worker import SyncWorker
+from harvest_shards import ShardQueue
+from harvest_metrics import prometheus_text
+from sync_events import SyncEventBroadcaster
+from datetime import datetime
 import asyncio
 
+# Run a sync worker inside the API process. With False, start one or more
+# `python3 sync_worker.py` processes instead; /api/sync only queues jobs.
+EMBEDDED_WORKER = True
+
+# Trend stats (hype score, growth) are computed over the months from this
+# year on, so a full-history backfill does not change what they measure
+STATS_START_YEAR = 2022
+
+CATEGORY_NAMES = {
+    sub_id: sub_name
+    for parent_data in ARXIV_CATEGORIES.values()
+    for sub_id, sub_name in parent_data["subcategories"].items()
+}
+
+job_queue = JobQueue(DATABASE_PATH)
+shard_queue = ShardQueue(DATABASE_PATH)
+worker = SyncWorker(job_queue, collector) if EMBEDDED_WORKER else None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    configure_logging()
     await init_db()
     await seed_categories()
     start_scheduler()
+    if worker is not None:
+        worker.start()
     yield
     # Shutdown
     stop_scheduler()
+    await sync_events.stop()
+    if worker is not None:
+        await worker.stop()
     await collector.close()
 
 
@@ -52,6 +88,15 @@ class MonthlyCount(BaseModel):
     year: int
     month: int
     count: int
+    nowcast: Optional[bool] = None  # the running month's estimate
+    observed: Optional[int] = None  # papers counted so far in that month
+
+
+class DailyCount(BaseModel):
+    year: int
+    month: int
+    day: int
+    count: int
 
 
 class TrendStats(BaseModel):
@@ -64,12 +109,114 @@ class TrendStats(BaseModel):
     recent_growth_percent: float
 
 
+class CursorStatus(BaseModel):
+    parent_set: str
+    status: str
+    pages: int = 0
+    records: int = 0
+    overlap_saved_seconds: float = 0.0
+
+
+class TransportStatus(BaseModel):
+    requests: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+    compression_ratio: float = 1.0
+    http_versions: dict[str, int] = {}
+
+
+class LoopLagStatus(BaseModel):
+    samples: int = 0
+    max_ms: float = 0.0
+    mean_ms: float = 0.0
+    stalls: int = 0
+    stalled_seconds: float = 0.0
+
+
+class HarvestMetricsStatus(BaseModel):
+    pages: int = 0
+    records: int = 0
+    counted: int = 0
+    out_of_range: int = 0
+    waste_ratio: float = 0.0
+    bytes: int = 0
+    wire_bytes: int = 0
+    pages_per_second: float = 0.0
+    records_per_second: float = 0.0
+    parse_ms_per_page: float = 0.0
+    retries: int = 0
+    throttled: int = 0
+    rate_limit_wait_seconds: float = 0.0
+    rate_limit_share: float = 0.0
+    list_size: Optional[int] = None
+    remaining_records: Optional[int] = None
+    eta_seconds: Optional[float] = None
+    elapsed_seconds: float = 0.0
+
+
+class SyncJob(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    params: dict = {}
+    attempts: int = 0
+    max_attempts: int = 0
+    cancel_requested: bool = False
+    worker: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    heartbeat_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    run_after: Optional[str] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_job(cls, job: QueuedJob) -> "SyncJob":
+        return cls(**{k: v for k, v in vars(job).items() if k != "progress"})
+
+
+class HarvestShardStatus(BaseModel):
+    id: int
+    sync_id: str
+    parent_set: str
+    from_date: str
+    until_date: Optional[str] = None
+    status: str
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    attempts: int = 0
+    records: Optional[int] = None
+    error: Optional[str] = None
+    finished_at: Optional[str] = None
+
+
+class SyncSchedule(BaseModel):
+    next_run: Optional[str] = None
+    last_slot: Optional[str] = None
+    last_run: Optional[dict] = None
+
+
 class SyncStatus(BaseModel):
     is_syncing: bool
     progress: str
     current: int = 0
     total: int = 0
     last_sync: Optional[str] = None
+    cursors: list[CursorStatus] = []
+    transport: Optional[TransportStatus] = None
+    loop_lag: Optional[LoopLagStatus] = None
+    metrics: Optional[HarvestMetricsStatus] = None
+    job: Optional[SyncJob] = None
+    queued: int = 0
+
+
+def complete_month_key() -> int:
+    """YYYYMM of the last complete month; later months are still filling in."""
+    year, month = last_complete_month()
+    return year * 100 + month
 
 
 def filter_valid_counts(counts: list[int]) -> list[int]:
@@ -153,23 +300,27 @@ async def get_categories():
     return result
 
 
-@app.get("/api/trends/{category_id}", response_model=list[MonthlyCount])
-async def get_trends(category_id: str):
-    """Get monthly publication counts for a category."""
+@app.get("/api/trends/{category_id}", response_model=list[MonthlyCount], response_model_exclude_none=True)
+async def get_trends(category_id: str, start_year: Optional[int] = None, nowcast: bool = False):
+    """
+    Get monthly publication counts for a category, optionally from
+    `start_year` on. With `nowcast`, the running month's estimate is added.
+    """
     async with aiosqlite.connect(DATABASE_PATH) as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
             SELECT year, month, count
             FROM publication_counts
-            WHERE category_id = ?
+            WHERE category_id = ? AND year >= ? AND year * 100 + month <= ?
             ORDER BY year, month
             """,
-            (category_id,)
+            (category_id, start_year or 0, complete_month_key())
         )
         rows = await cursor.fetchall()
 
-    if not rows:
+    estimate = (await load_nowcasts([category_id])).get(category_id) if nowcast else None
+    if not rows and estimate is None:
         return []
 
     # Filter out months with zero or very low counts (incomplete data)
@@ -182,34 +333,92 @@ async def get_trends(category_id: str):
     for row in rows:
         if row["count"] >= threshold:
             results.append(MonthlyCount(year=row["year"], month=row["month"], count=row["count"]))
+    if estimate is not None:
+        results.append(MonthlyCount(**estimate, nowcast=True))
 
     return results
 
 
-@app.get("/api/trends/{category_id}/stats", response_model=TrendStats)
-async def get_trend_stats(category_id: str):
-    """Get trend analysis statistics for a category."""
-    # Get category name
-    category_name = category_id
-    for parent_data in ARXIV_CATEGORIES.values():
-        if category_id in parent_data["subcategories"]:
-            category_name = parent_data["subcategories"][category_id]
-            break
-
+@app.get("/api/trends/{category_id}/daily", response_model=list[DailyCount])
+async def get_daily_trends(category_id: str, months: int = 2):
+    """Papers per day of announcement over the last `months` submission months."""
+    if not 1 <= months <= DAILY_COUNT_MONTHS:
+        raise HTTPException(status_code=400, detail=f"months must be between 1 and {DAILY_COUNT_MONTHS}")
+    now = datetime.now()
+    first = now.year * 12 + now.month - months + 1
     async with aiosqlite.connect(DATABASE_PATH) as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             """
-            SELECT year, month, count
-            FROM publication_counts
-            WHERE category_id = ?
-            ORDER BY year, month
+            SELECT year, month, day, count
+            FROM daily_counts
+            WHERE category_id = ? AND year * 12 + month >= ? AND count > 0
+            ORDER BY year, month, day
             """,
-            (category_id,)
+            (category_id, first)
         )
-        rows = await cursor.fetchall()
+        return [DailyCount(**dict(row)) for row in await cursor.fetchall()]
 
-    if not rows:
+
+async def load_nowcasts(category_ids: Optional[list[str]] = None) -> dict[str, dict]:
+    """
+    Estimates for the running month by category, as MonthlyCount fields.
+    Nowcasts left from an earlier month, or made too early, are skipped.
+    """
+    now = datetime.now()
+    query = """
+        SELECT category_id, year, month, estimate, observed
+        FROM nowcasts
+        WHERE year = ? AND month = ? AND estimate IS NOT NULL
+    """
+    params = [now.year, now.month]
+    if category_ids is not None:
+        query += f" AND category_id IN ({','.join('?' * len(category_ids))})"
+        params += category_ids
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(query, params)
+        return {
+            category_id: {"year": year, "month": month, "count": estimate, "observed": observed}
+            for category_id, year, month, estimate, observed in await cursor.fetchall()
+        }
+
+
+async def load_monthly_counts(
+    category_ids: Optional[list[str]] = None,
+    start_year: int = STATS_START_YEAR,
+    nowcast: bool = False
+) -> dict[str, list[int]]:
+    """
+    Counts of the complete months from `start_year` on, in month order, for
+    some categories (default: all) in one query. With `nowcast`, the
+    running month's estimate is appended where there is one.
+    """
+    query = """
+        SELECT category_id, count
+        FROM publication_counts
+        WHERE year >= ? AND year * 100 + month <= ?
+    """
+    params = [start_year, complete_month_key()]
+    if category_ids is not None:
+        query += f" AND category_id IN ({','.join('?' * len(category_ids))})"
+        params += category_ids
+    query += " ORDER BY category_id, year, month"
+
+    counts: dict[str, list[int]] = {}
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(query, params)
+        for category_id, count in await cursor.fetchall():
+            counts.setdefault(category_id, []).append(count)
+    if nowcast:
+        for category_id, estimate in (await load_nowcasts(category_ids)).items():
+            counts.setdefault(category_id, []).append(estimate["count"])
+    return counts
+
+
+def build_trend_stats(category_id: str, counts: list[int]) -> TrendStats:
+    """Trend analysis statistics from a category's monthly counts."""
+    category_name = CATEGORY_NAMES.get(category_id, category_id)
+    if not counts:
         return TrendStats(
             category_id=category_id,
             category_name=category_name,
@@ -220,8 +429,6 @@ async def get_trend_stats(category_id: str):
             recent_growth_percent=0.0
         )
 
-    counts = [row["count"] for row in rows]
-
     # Filter out invalid counts for calculations
     valid_counts = filter_valid_counts(counts)
 
@@ -250,17 +457,35 @@ async def get_trend_stats(category_id: str):
     )
 
 
+async def collect_trend_stats(parent: Optional[str] = None, nowcast: bool = False) -> list[TrendStats]:
+    """Stats of every category with papers, or of one parent's subcategories."""
+    if parent is not None:
+        category_ids = list(ARXIV_CATEGORIES[parent]["subcategories"])
+    else:
+        category_ids = list(CATEGORY_NAMES)
+    counts = await load_monthly_counts(category_ids if parent is not None else None, nowcast=nowcast)
+    all_stats = []
+    for category_id in category_ids:
+        stats = build_trend_stats(category_id, counts.get(category_id, []))
+        if stats.total_papers > 0:
+            all_stats.append(stats)
+    return all_stats
+
+
+@app.get("/api/trends/{category_id}/stats", response_model=TrendStats)
+async def get_trend_stats(category_id: str, nowcast: bool = False):
+    """Get trend analysis statistics for a category, optionally including the running month's nowcast."""
+    counts = await load_monthly_counts([category_id], nowcast=nowcast)
+    return build_trend_stats(category_id, counts.get(category_id, []))
+
+
 @app.get("/api/parent/{parent_id}/stats", response_model=list[TrendStats])
-async def get_parent_category_stats(parent_id: str):
+async def get_parent_category_stats(parent_id: str, nowcast: bool = False):
     """Get stats for all subcategories within a parent category."""
     if parent_id not in ARXIV_CATEGORIES:
         raise HTTPException(status_code=404, detail=f"Parent category {parent_id} not found")
 
-    all_stats = []
-    for sub_id in ARXIV_CATEGORIES[parent_id]["subcategories"].keys():
-        stats = await get_trend_stats(sub_id)
-        if stats.total_papers > 0:
-            all_stats.append(stats)
+    all_stats = await collect_trend_stats(parent_id, nowcast)
 
     # Sort by hype score descending
     all_stats.sort(key=lambda x: x.hype_score, reverse=True)
@@ -268,23 +493,9 @@ async def get_parent_category_stats(parent_id: str):
 
 
 @app.get("/api/hype", response_model=list[TrendStats])
-async def get_hype_categories(limit: int = 10, parent: Optional[str] = None):
+async def get_hype_categories(limit: int = 10, parent: Optional[str] = None, nowcast: bool = False):
     """Get top trending categories. Optionally filter by parent category."""
-    all_stats = []
-
-    if parent and parent in ARXIV_CATEGORIES:
-        # Filter to specific parent
-        for sub_id in ARXIV_CATEGORIES[parent]["subcategories"].keys():
-            stats = await get_trend_stats(sub_id)
-            if stats.total_papers > 0:
-                all_stats.append(stats)
-    else:
-        # All categories
-        for parent_data in ARXIV_CATEGORIES.values():
-            for sub_id in parent_data["subcategories"].keys():
-                stats = await get_trend_stats(sub_id)
-                if stats.total_papers > 0:
-                    all_stats.append(stats)
+    all_stats = await collect_trend_stats(parent if parent in ARXIV_CATEGORIES else None, nowcast)
 
     # Sort by hype score descending
     all_stats.sort(key=lambda x: x.hype_score, reverse=True)
@@ -292,23 +503,9 @@ async def get_hype_categories(limit: int = 10, parent: Optional[str] = None):
 
 
 @app.get("/api/declining", response_model=list[TrendStats])
-async def get_declining_categories(limit: int = 10, parent: Optional[str] = None):
+async def get_declining_categories(limit: int = 10, parent: Optional[str] = None, nowcast: bool = False):
     """Get categories with declining publications. Optionally filter by parent."""
-    all_stats = []
-
-    if parent and parent in ARXIV_CATEGORIES:
-        # Filter to specific parent
-        for sub_id in ARXIV_CATEGORIES[parent]["subcategories"].keys():
-            stats = await get_trend_stats(sub_id)
-            if stats.total_papers > 0:
-                all_stats.append(stats)
-    else:
-        # All categories
-        for parent_data in ARXIV_CATEGORIES.values():
-            for sub_id in parent_data["subcategories"].keys():
-                stats = await get_trend_stats(sub_id)
-                if stats.total_papers > 0:
-                    all_stats.append(stats)
+    all_stats = await collect_trend_stats(parent if parent in ARXIV_CATEGORIES else None, nowcast)
 
     # Sort by hype score ascending (most declining first)
     all_stats.sort(key=lambda x: x.hype_score)
@@ -316,36 +513,198 @@ async def get_declining_categories(limit: int = 10, parent: Optional[str] = None
 
 
 @app.post("/api/sync")
-async def trigger_sync(background_tasks: BackgroundTasks, full: bool = False):
-    """Trigger manual data sync."""
-    if collector.is_syncing:
-        raise HTTPException(status_code=409, detail="Sync already in progress")
-
+async def trigger_sync(
+    full: bool = False,
+    concurrency: int = SYNC_CONCURRENCY,
+    single_pass: bool = False,
+    priority: int = PRIORITY_MANUAL,
+    sharded: bool = False,
+    memory_budget_mb: Optional[float] = None,
+    trace_memory: bool = False,
+    category: Optional[str] = None,
+    months: int = REFRESH_MONTHS,
+    backfill: bool = False
+):
+    """
+    Queue a manual data sync for the sync worker. A sharded full sync is
+    split into leased shards that idle workers on other processes help with.
+    A full sync can be given a memory budget for its count accumulators,
+    and can log tracemalloc allocations per phase to the sync log.
+
+    With `category`, only that category's OAI-PMH set is harvested and the
+    last `months` months of it recounted. Requests for a category that an
+    active job already covers join that job. Other requests join an active
+    job of the same kind, unless it differs in sharding or memory options,
+    which is a 409 conflict.
+
+    `backfill` queues a full-history sync from 1991, sharded by datestamp
+    year; its shards are listed by /api/sync/shards.
+    """
+    if backfill and (full or category is not None):
+        raise HTTPException(status_code=400, detail="backfill cannot be combined with full or category")
+    if category is not None:
+        if category not in CATEGORY_TO_SETSPEC:
+            raise HTTPException(status_code=404, detail=f"Category {category} not found")
+        if full or single_pass:
+            raise HTTPException(status_code=400, detail="category cannot be combined with full or single_pass")
+        if not 1 <= months <= MAX_REFRESH_MONTHS:
+            raise HTTPException(status_code=400, detail=f"months must be between 1 and {MAX_REFRESH_MONTHS}")
+    if not 1 <= concurrency <= len(PARENT_SETS):
+        raise HTTPException(status_code=400, detail=f"concurrency must be between 1 and {len(PARENT_SETS)}")
+    if sharded and not full:
+        raise HTTPException(status_code=400, detail="sharded requires full=true")
+    if (memory_budget_mb is not None or trace_memory) and not (full or backfill):
+        raise HTTPException(status_code=400, detail="memory options require full=true or backfill=true")
+    if memory_budget_mb is not None and memory_budget_mb <= 0:
+        raise HTTPException(status_code=400, detail="memory_budget_mb must be positive")
+
+    if category is not None:
+        params = {"categories": [category], "months": months, "concurrency": concurrency}
+        job, created = await job_queue.enqueue("category", params, priority)
+        if worker is not None:
+            worker.wake()
+        return {
+            "message": "Refresh queued" if created else "Refresh joined an active job",
+            "type": job.kind,
+            "job": SyncJob.from_job(job),
+        }
+
+    params = {"concurrency": concurrency, "single_pass": single_pass}
     if full:
-        background_tasks.add_task(collector.sync_all_categories, 2022)
-    else:
-        background_tasks.add_task(collector.quick_sync)
+        params["start_year"] = 2022
+    if sharded:
+        params["sharded"] = True
+    if memory_budget_mb is not None:
+        params["memory_budget_mb"] = memory_budget_mb
+    if trace_memory:
+        params["trace_memory"] = True
+    kind = "backfill" if backfill else "full" if full else "quick"
+    try:
+        job, created = await job_queue.enqueue(kind, params, priority)
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if worker is not None:
+        worker.wake()
+
+    return {
+        "message": "Sync queued" if created else "Sync already queued",
+        "type": job.kind,
+        "job": SyncJob.from_job(job),
+    }
+
+
+@app.get("/api/sync/shards", response_model=list[HarvestShardStatus])
+async def list_sync_shards(sync_id: Optional[str] = None):
+    """Shards of a sharded sync or backfill (by default the newest), with their progress."""
+    return [HarvestShardStatus(**shard) for shard in await shard_queue.shards(sync_id)]
+
+
+@app.get("/api/sync/schedule", response_model=SyncSchedule)
+async def get_sync_schedule():
+    """Next scheduled sync, and the probe result and action of the last one."""
+    return SyncSchedule(**await schedule_status())
+
+
+@app.get("/api/sync/jobs", response_model=list[SyncJob])
+async def list_sync_jobs(limit: int = 20):
+    """Queued and running sync jobs, then the most recent finished ones."""
+    return [SyncJob.from_job(job) for job in await job_queue.recent(limit)]
+
+
+@app.post("/api/sync/jobs/{job_id}/cancel", response_model=SyncJob)
+async def cancel_sync_job(job_id: int):
+    """Cancel a queued job, or stop a running one at its next heartbeat."""
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return SyncJob.from_job(job)
+
+
+async def get_last_sync() -> Optional[str]:
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(
+            "SELECT value FROM sync_metadata WHERE key = 'last_sync'"
+        )
+        row = await cursor.fetchone()
+    return row[0] if row else None
+
 
-    return {"message": "Sync started", "type": "full" if full else "quick"}
+def job_progress(job: QueuedJob) -> dict:
+    """Progress of a job: live from a worker in this process, else from its heartbeats."""
+    if job.status == "running" and worker is not None and collector.is_syncing:
+        return collector.status_snapshot()
+    return job.progress
 
 
 @app.get("/api/sync/status", response_model=SyncStatus)
 async def get_sync_status():
-    """Check sync status."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT value FROM sync_metadata WHERE key = 'last_sync'"
+    """Check sync status, as reported by the running job's worker."""
+    last_sync = await get_last_sync()
+    jobs = await job_queue.recent(limit=20)
+    running = next((j for j in jobs if j.status == "running"), None)
+    queued = sum(1 for j in jobs if j.status == "queued")
+    if running is None:
+        return SyncStatus(
+            is_syncing=False,
+            progress="Sync queued" if queued else "",
+            last_sync=last_sync,
+            queued=queued,
         )
-        row = await cursor.fetchone()
-        last_sync = row["value"] if row else None
 
+    progress = job_progress(running)
     return SyncStatus(
-        is_syncing=collector.is_syncing,
-        progress=collector.sync_progress,
-        current=collector.current,
-        total=collector.total,
-        last_sync=last_sync
+        is_syncing=True,
+        progress=progress.get("progress", "Sync starting..."),
+        current=progress.get("current", 0),
+        total=progress.get("total", 0),
+        last_sync=last_sync,
+        cursors=[CursorStatus(**c) for c in progress.get("cursors", [])],
+        transport=TransportStatus(**progress["transport"]) if "transport" in progress else None,
+        loop_lag=LoopLagStatus(**progress["loop_lag"]) if "loop_lag" in progress else None,
+        metrics=HarvestMetricsStatus(**progress["metrics"]) if "metrics" in progress else None,
+        job=SyncJob.from_job(running),
+        queued=queued,
+    )
+
+
+async def sync_status_payload() -> dict:
+    return (await get_sync_status()).model_dump()
+
+
+sync_events = SyncEventBroadcaster(sync_status_payload, get_last_sync)
+
+
+@app.get("/api/sync/events")
+async def stream_sync_events(request: Request):
+    """
+    Server-Sent Events: `progress` with the sync status whenever it changes,
+    and `data` with a new data version once a sync has committed.
+    """
+    return StreamingResponse(
+        sync_events.stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Harvester metrics of the running (or last) sync in the Prometheus text format."""
+    last_sync = await get_last_sync()
+    jobs = await job_queue.recent(limit=20)
+    running = next((j for j in jobs if j.status == "running"), None)
+    reported = running or next((j for j in jobs if "metrics" in j.progress), None)
+    report = job_progress(reported).get("metrics") if reported is not None else None
+    gauges = {
+        "arxiv_sync_running": (1 if running is not None else 0, "Whether a sync job is running"),
+        "arxiv_sync_jobs_queued": (sum(1 for j in jobs if j.status == "queued"), "Sync jobs waiting to run"),
+        "arxiv_sync_last_success_timestamp": (
+            datetime.fromisoformat(last_sync).timestamp() if last_sync else None,
+            "Unix time of the last completed sync"
+        ),
+    }
+    return PlainTextResponse(
+        prometheus_text(report, gauges), media_type="text/plain; version=0.0.4"
     )
 
 
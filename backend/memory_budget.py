@@ -0,0 +1,235 @@
+"""
+Bounded-memory harvesting and allocation reporting.
+
+MemoryBudget caps the bytes held by a sync's in-memory count accumulators
+(one CountMatrix per resumption-token chain). When the budget is exceeded,
+the largest accumulators are trimmed and spilled to a SpillStore on disk
+and start again from empty; each chain merges its spilled parts back when
+it finishes.
+
+MemoryProfiler uses tracemalloc to attribute allocations to the phases of
+the page pipeline (fetch, parse, merge, write). Phases of concurrent
+cursors overlap, so per-phase deltas are approximate; the snapshot kept for
+each phase shows the top allocation sites at that phase's high-water mark.
+Both write their report to the sync log.
+"""
+
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from count_matrix import CountMatrix
+
+logger = logging.getLogger(__name__)
+
+SPILL_DIR = Path(__file__).parent / "spill"
+MEMORY_SNAPSHOT_INTERVAL = 30.0  # seconds between snapshots of the same phase
+MEMORY_TOP_LINES = 8  # allocation sites logged per phase
+PHASES = ("fetch", "parse", "merge", "write")
+
+
+def current_rss() -> int | None:
+    """Resident set size of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SpillStore:
+    """Spilled CountMatrix parts, one file each, in a private temporary directory."""
+
+    def __init__(self, root: Path = SPILL_DIR):
+        root.mkdir(parents=True, exist_ok=True)
+        self.dir = Path(tempfile.mkdtemp(prefix="sync-", dir=root))
+        self._parts: dict[str, list[Path]] = {}
+        self._names = itertools.count()
+        self.bytes_written = 0
+
+    def put(self, key: str, counts: CountMatrix):
+        path = self.dir / f"part-{next(self._names)}.cmx"
+        blob = counts.to_bytes()
+        path.write_bytes(blob)
+        self.bytes_written += len(blob)
+        self._parts.setdefault(key, []).append(path)
+
+    def parts(self, key: str) -> int:
+        return len(self._parts.get(key, ()))
+
+    def take(self, key: str, into: CountMatrix) -> CountMatrix:
+        """Merge every part spilled for `key` into `into`, and delete them."""
+        for path in self._parts.pop(key, ()):
+            into.merge(CountMatrix.from_bytes(path.read_bytes()), grow=True)
+            path.unlink()
+        return into
+
+    def discard(self, key: str):
+        for path in self._parts.pop(key, ()):
+            path.unlink(missing_ok=True)
+
+    def close(self):
+        self._parts.clear()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class MemoryBudget:
+    """Keeps the tracked count accumulators under `limit` bytes by spilling them."""
+
+    def __init__(self, limit: int, store: SpillStore | None = None):
+        self.limit = limit
+        self.store = store or SpillStore()
+        self._tracked: dict[str, CountMatrix] = {}
+        self.spills = 0
+        self.peak_bytes = 0
+
+    @staticmethod
+    def size(counts: CountMatrix) -> int:
+        return counts.data.itemsize * len(counts.data)
+
+    def held_bytes(self) -> int:
+        return sum(self.size(counts) for counts in self._tracked.values())
+
+    def track(self, key: str, counts: CountMatrix):
+        self._tracked[key] = counts
+
+    def release(self, key: str):
+        """Stop tracking a chain and drop anything it spilled (it was abandoned)."""
+        self._tracked.pop(key, None)
+        self.store.discard(key)
+
+    def check(self) -> int:
+        """
+        Spill the largest accumulators until at most half the budget is held.
+        Returns how many were spilled.
+        """
+        held = self.held_bytes()
+        self.peak_bytes = max(self.peak_bytes, held)
+        if held <= self.limit:
+            return 0
+        spilled = 0
+        for key, counts in sorted(self._tracked.items(), key=lambda kv: -self.size(kv[1])):
+            if held <= self.limit // 2:
+                break
+            before = self.size(counts)
+            self.store.put(key, counts.trimmed())
+            counts.clear()
+            held -= before - self.size(counts)
+            spilled += 1
+        self.spills += spilled
+        logger.debug(f"Memory budget exceeded: spilled {spilled} accumulator(s), {held} bytes held")
+        return spilled
+
+    def finish(self, key: str, counts: CountMatrix, full: CountMatrix) -> CountMatrix:
+        """
+        A chain is done: its counts plus everything it spilled, over the
+        months of `full` (an empty matrix of the chain's requested range).
+        """
+        self._tracked.pop(key, None)
+        if not self.store.parts(key) and (counts.start, counts.end) == (full.start, full.end):
+            return counts
+        full.merge(counts, grow=True)
+        return self.store.take(key, full)
+
+    def report(self) -> dict:
+        return {
+            "limit_bytes": self.limit,
+            "held_bytes": self.held_bytes(),
+            "peak_bytes": self.peak_bytes,
+            "spills": self.spills,
+            "spilled_bytes": self.store.bytes_written,
+            "rss_bytes": current_rss(),
+        }
+
+    def summary(self) -> str:
+        r = self.report()
+        rss = f", RSS {r['rss_bytes'] / 1e6:.0f} MB" if r["rss_bytes"] else ""
+        return (
+            f"memory budget {r['limit_bytes'] / 1e6:.1f} MB: peak {r['peak_bytes'] / 1e6:.2f} MB held, "
+            f"{r['spills']} spills ({r['spilled_bytes'] / 1e3:.0f} KB on disk){rss}"
+        )
+
+    def close(self):
+        self._tracked.clear()
+        self.store.close()
+
+
+class MemoryProfiler:
+    """tracemalloc accounting per pipeline phase. Does nothing unless started."""
+
+    def __init__(self, snapshot_interval: float = MEMORY_SNAPSHOT_INTERVAL):
+        self.snapshot_interval = snapshot_interval
+        self.enabled = False
+        self._started_tracing = False
+        self._phases: dict[str, dict] = {}
+
+    def start(self):
+        self.enabled = True
+        self._phases = {
+            name: {"calls": 0, "net_bytes": 0, "max_traced": 0, "snapshot": None, "snapshot_at": 0.0}
+            for name in PHASES
+        }
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        self.enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            # The profiler may have been stopped while this phase awaited
+            if self.enabled:
+                self._record(name, before)
+
+    def _record(self, name: str, before: int):
+        traced = tracemalloc.get_traced_memory()[0]
+        stats = self._phases[name]
+        stats["calls"] += 1
+        stats["net_bytes"] += traced - before
+        if traced > stats["max_traced"]:
+            stats["max_traced"] = traced
+            now = time.monotonic()
+            if stats["snapshot"] is None or now - stats["snapshot_at"] >= self.snapshot_interval:
+                stats["snapshot"] = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                ))
+                stats["snapshot_at"] = now
+
+    def log_report(self, top: int = MEMORY_TOP_LINES):
+        """Write each phase's allocations and top allocation sites to the log."""
+        if not self._phases:
+            return
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        logger.info(f"Memory (tracemalloc): {current / 1e6:.1f} MB traced now, peak {peak / 1e6:.1f} MB")
+        for name, stats in self._phases.items():
+            if not stats["calls"]:
+                continue
+            logger.info(
+                f"  {name}: {stats['calls']} calls, net {stats['net_bytes'] / 1e3:+.0f} KB, "
+                f"high-water {stats['max_traced'] / 1e6:.1f} MB traced"
+            )
+            if stats["snapshot"] is not None:
+                for stat in stats["snapshot"].statistics("lineno")[:top]:
+                    frame = stat.traceback[0]
+                    logger.info(
+                        f"    {stat.size / 1e3:8.0f} KB {stat.count:7d} blocks  "
+                        f"{frame.filename}:{frame.lineno}"
+                    )
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the arXiv OAI-PMH endpoint.
+
+Generates a deterministic synthetic archive of ListIdentifiers headers,
+with resumption tokens, cross-listed setSpecs, deleted records and revised
+papers whose datestamp is later than their submission month. Months
+before April 2007 get old-style identifiers (math/0601001). Latency and
+errors (503 with Retry-After, stalled responses) can be injected to
+exercise the collector's retry and pacing logic.
+
+Records are computed from their index rather than stored, so archives of
+millions of records cost no memory.
+
+Run standalone:
+    python3 mock_oai_server.py --records 2000000 --port 8765
+
+or use `MockOAIServer(...).app` in-process with httpx.ASGITransport.
+"""
+
+import argparse
+import asyncio
+import gzip
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import parse_qs
+
+from arxiv_collector import CATEGORY_TO_SETSPEC
+from oai_parser import parse_arxiv_id_date
+
+OAI_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+    '<responseDate>{now}</responseDate>'
+    '<request verb="ListIdentifiers">http://localhost/oai</request>'
+)
+OAI_FOOTER = "</OAI-PMH>"
+
+SETSPECS = sorted(CATEGORY_TO_SETSPEC.values())
+
+
+class MockOAIServer:
+    """Deterministic synthetic OAI-PMH repository, served as an ASGI app."""
+
+    def __init__(
+        self,
+        records: int = 100_000,
+        page_size: int = 1000,
+        start: tuple[int, int] = (2022, 1),
+        months: int = 36,
+        cross_list_pct: int = 30,
+        deleted_permille: int = 5,
+        revised_pct: int = 10,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        stall_rate: float = 0.0,
+        stall_seconds: float = 30.0,
+        gzip_responses: bool = True,
+        seed: int = 1
+    ):
+        self.records = records
+        self.page_size = page_size
+        self.start = start
+        self.months = months
+        self.cross_list_pct = cross_list_pct
+        self.deleted_permille = deleted_permille
+        self.revised_pct = revised_pct
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.gzip_responses = gzip_responses
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._list_sizes: dict[tuple, int] = {}
+        self.requests = 0
+        self.errors_injected = 0
+
+    # -- synthetic archive --------------------------------------------------
+
+    def _month_of(self, index: int) -> int:
+        return index * self.months // self.records
+
+    def _first_index(self, month_index: int) -> int:
+        return -(-month_index * self.records // self.months)
+
+    def record(self, index: int) -> tuple[str, str, tuple[str, ...], bool]:
+        """(identifier, datestamp, setspecs, deleted) of the record at `index`."""
+        h = (index * 2654435761 + self.seed * 40503) & 0xFFFFFFFF
+        month_index = self._month_of(index)
+        year = self.start[0] + (self.start[1] - 1 + month_index) // 12
+        month = (self.start[1] - 1 + month_index) % 12 + 1
+        seq = index - self._first_index(month_index) + 1
+
+        specs = [SETSPECS[h % len(SETSPECS)]]
+        if (h >> 8) % 100 < self.cross_list_pct:
+            other = SETSPECS[(h >> 16) % len(SETSPECS)]
+            if other != specs[0]:
+                specs.append(other)
+
+        if (year, month) < (2007, 4):
+            # Old-style ID under the archive of the primary set (cs:cs:LG -> cs)
+            parts = specs[0].split(":")
+            archive = parts[1] if len(parts) > 1 else parts[0]
+            identifier = f"oai:arXiv.org:{archive}/{year % 100:02d}{month:02d}{seq:03d}"
+        else:
+            identifier = f"oai:arXiv.org:{year % 100:02d}{month:02d}.{seq:05d}"
+
+        stamp = date(year, month, 1) + timedelta(days=(h >> 4) % 28)
+        if (h >> 12) % 100 < self.revised_pct:
+            stamp += timedelta(days=30 + (h >> 20) % 300)
+        deleted = (h >> 24) % 1000 < self.deleted_permille
+        return identifier, stamp.isoformat(), tuple(specs), deleted
+
+    def _matches(self, rec, set_spec: str | None, from_: str | None, until: str | None) -> bool:
+        _, stamp, specs, _ = rec
+        if from_ and stamp < from_:
+            return False
+        if until and stamp > until:
+            return False
+        if set_spec:
+            prefix = set_spec + ":"
+            return any(s == set_spec or s.startswith(prefix) for s in specs)
+        return True
+
+    def _list_size(self, query: tuple) -> int:
+        if query not in self._list_sizes:
+            self._list_sizes[query] = sum(
+                1 for i in range(self.records) if self._matches(self.record(i), *query)
+            )
+        return self._list_sizes[query]
+
+    def expected_counts(
+        self,
+        set_spec: str | None,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        from_: str | None = None
+    ) -> dict[tuple[int, int], dict[str, int]]:
+        """What the collector should count for a harvest of `set_spec`."""
+        setspec_to_category = {
+            spec: cat for cat, spec in CATEGORY_TO_SETSPEC.items()
+            if set_spec is None or spec == set_spec or spec.startswith(set_spec + ":")
+        }
+        counts = defaultdict(lambda: defaultdict(int))
+        for i in range(self.records):
+            rec = self.record(i)
+            if rec[3] or not self._matches(rec, set_spec, from_, None):
+                continue
+            key = parse_arxiv_id_date(rec[0])
+            if key is None or key < start or key > end:
+                continue
+            for spec in rec[2]:
+                if spec in setspec_to_category:
+                    counts[key][setspec_to_category[spec]] += 1
+        return {k: dict(v) for k, v in counts.items()}
+
+    # -- OAI-PMH protocol ---------------------------------------------------
+
+    def list_identifiers(self, params: dict) -> str:
+        """Body of a ListIdentifiers response for the given query parameters."""
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        head = OAI_HEADER.format(now=now)
+
+        if params.get("verb") != "ListIdentifiers":
+            return head + '<error code="badVerb">Only ListIdentifiers is supported</error>' + OAI_FOOTER
+
+        if "resumptionToken" in params:
+            try:
+                set_spec, from_, until, pos, cursor = params["resumptionToken"].split("|")
+                pos, cursor = int(pos), int(cursor)
+            except ValueError:
+                return head + '<error code="badResumptionToken">Invalid token</error>' + OAI_FOOTER
+        else:
+            set_spec, from_, until = params.get("set", ""), params.get("from", ""), params.get("until", "")
+            pos, cursor = 0, 0
+
+        query = (set_spec or None, from_ or None, until or None)
+        headers = []
+        while pos < self.records and len(headers) < self.page_size:
+            rec = self.record(pos)
+            pos += 1
+            if not self._matches(rec, *query):
+                continue
+            identifier, stamp, specs, deleted = rec
+            status = ' status="deleted"' if deleted else ""
+            spec_xml = "".join(f"<setSpec>{s}</setSpec>" for s in specs)
+            headers.append(
+                f"<header{status}><identifier>{identifier}</identifier>"
+                f"<datestamp>{stamp}</datestamp>{spec_xml}</header>"
+            )
+
+        if not headers and cursor == 0:
+            return head + '<error code="noRecordsMatch">No matching records</error>' + OAI_FOOTER
+
+        size = self._list_size(query)
+        if pos < self.records and cursor + len(headers) < size:
+            token = f"{set_spec}|{from_}|{until}|{pos}|{cursor + len(headers)}"
+            token_xml = f'<resumptionToken completeListSize="{size}" cursor="{cursor}">{token}</resumptionToken>'
+        else:
+            token_xml = f'<resumptionToken completeListSize="{size}" cursor="{cursor}"/>'
+
+        return head + "<ListIdentifiers>" + "".join(headers) + token_xml + "</ListIdentifiers>" + OAI_FOOTER
+
+    async def app(self, scope, receive, send):
+        """ASGI entry point."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * (0.5 + self._random.random()))
+
+        roll = self._random.random()
+        if roll < self.error_rate:
+            self.errors_injected += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"retry-after", str(self.retry_after).encode())],
+            })
+            await send({"type": "http.response.body", "body": b"Service temporarily unavailable"})
+            return
+        if roll < self.error_rate + self.stall_rate:
+            self.errors_injected += 1
+            await asyncio.sleep(self.stall_seconds)
+
+        query = parse_qs(scope.get("query_string", b"").decode())
+        params = {k: v[0] for k, v in query.items()}
+        body = self.list_identifiers(params).encode()
+        headers = [(b"content-type", b"text/xml; charset=utf-8")]
+        accept = dict(scope.get("headers", [])).get(b"accept-encoding", b"")
+        if self.gzip_responses and b"gzip" in accept:
+            body = gzip.compress(body, compresslevel=6)
+            headers.append((b"content-encoding", b"gzip"))
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers,
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Synthetic arXiv OAI-PMH server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of stalled responses")
+    parser.add_argument("--no-gzip", action="store_true", help="ignore Accept-Encoding")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = build_arg_parser().parse_args()
+    server = MockOAIServer(
+        records=args.records,
+        page_size=args.page_size,
+        months=args.months,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        stall_rate=args.stall_rate,
+        gzip_responses=not args.no_gzip,
+        seed=args.seed,
+    )
+    uvicorn.run(server.app, host="127.0.0.1", port=args.port, log_level="warning", interface="asgi3")
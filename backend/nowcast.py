@@ -0,0 +1,95 @@
+"""
+Nowcast of the running month's publication counts.
+
+A sync sees the current month only up to its latest announcement, so the
+month's row in publication_counts is partial and the trend stats leave it
+out. The nowcast extrapolates it from daily_counts. In the last
+NOWCAST_REFERENCE_MONTHS complete months, the share of each month's papers
+that had been announced by the same day of the month tells how far along
+the current month is:
+
+    estimate = observed * sum(reference finals) / sum(reference counts by day d)
+
+Categories with too few reference papers use the share of all categories.
+Reference months seeded by a full sync count papers revised since on their
+month's last day (their announcement day is no longer known), which makes
+early estimates run high until those months have been synced day by day.
+
+Nowcasts are refreshed at the end of every sync that updates the ledger,
+from the daily counts it has just updated, and kept in the `nowcasts` table.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+import aiosqlite
+
+from database import daily_window_start
+
+NOWCAST_REFERENCE_MONTHS = 6
+NOWCAST_MIN_REFERENCE = 100  # reference papers below which the all-category share is used
+NOWCAST_MIN_SHARE = 0.1  # earlier in the month than this, no estimate is made
+
+
+def extrapolate(rows, year: int, month: int) -> list[tuple]:
+    """
+    Nowcasts from (category_id, year, month, count by the matching day,
+    month total) rows of the current and the reference months.
+    Returns (category_id, observed, estimate, share) per category with
+    papers this month; estimate is None when it is too early to tell.
+    """
+    observed: dict[str, int] = {}
+    by_day: dict[str, int] = defaultdict(int)
+    final: dict[str, int] = defaultdict(int)
+    for category_id, y, m, upto, total in rows:
+        if (y, m) == (year, month):
+            observed[category_id] = total
+        else:
+            by_day[category_id] += upto
+            final[category_id] += total
+
+    reference = sum(final.values())
+    overall = sum(by_day.values()) / reference if reference else None
+    results = []
+    for category_id, n in sorted(observed.items()):
+        if final[category_id] >= NOWCAST_MIN_REFERENCE:
+            share = by_day[category_id] / final[category_id]
+        else:
+            share = overall
+        estimate = None
+        if share is not None and share >= NOWCAST_MIN_SHARE:
+            estimate = max(n, round(n / share))
+        results.append((category_id, n, estimate, round(share, 4) if share is not None else None))
+    return results
+
+
+async def update_nowcasts(db: aiosqlite.Connection, now: datetime | None = None) -> int:
+    """
+    Re-estimate the month of `now` for every category, and drop daily
+    counts that have aged out. Runs in the caller's transaction.
+    Returns the number of categories with an estimate.
+    """
+    now = now or datetime.now()
+    first_year, first_month = daily_window_start(now)
+    await db.execute(
+        "DELETE FROM daily_counts WHERE year * 12 + month < ?", (first_year * 12 + first_month,)
+    )
+
+    current = now.year * 12 + now.month
+    cursor = await db.execute("""
+        SELECT category_id, year, month, SUM(CASE WHEN day <= ? THEN count ELSE 0 END), SUM(count)
+        FROM daily_counts
+        WHERE year * 12 + month BETWEEN ? AND ?
+        GROUP BY category_id, year, month
+    """, (now.day, current - NOWCAST_REFERENCE_MONTHS, current))
+    nowcasts = extrapolate(await cursor.fetchall(), now.year, now.month)
+
+    await db.execute("DELETE FROM nowcasts")
+    await db.executemany("""
+        INSERT INTO nowcasts (category_id, year, month, day, observed, estimate, share)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (category_id, now.year, now.month, now.day, observed, estimate, share)
+        for category_id, observed, estimate, share in nowcasts
+    ])
+    return sum(1 for _, _, estimate, _ in nowcasts if estimate is not None)
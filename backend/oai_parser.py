@@ -0,0 +1,293 @@
+"""
+Parsing and counting of OAI-PMH ListIdentifiers pages.
+
+Kept free of I/O and of the collector's module state so that pages can be
+digested in worker processes: digest_page() takes a page body and hands
+back only its counts (a CountMatrix), ledger entries and bookkeeping, not
+the parsed headers.
+"""
+
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from count_matrix import CountMatrix
+
+# Fully-qualified tag names used by the streaming parser
+_OAI = "{http://www.openarchives.org/OAI/2.0/}"
+HEADER_TAG = f"{_OAI}header"
+IDENTIFIER_TAG = f"{_OAI}identifier"
+DATESTAMP_TAG = f"{_OAI}datestamp"
+SETSPEC_TAG = f"{_OAI}setSpec"
+TOKEN_TAG = f"{_OAI}resumptionToken"
+ERROR_TAG = f"{_OAI}error"
+LIST_TAG = f"{_OAI}ListIdentifiers"
+
+
+def parse_arxiv_id_date(identifier: str) -> tuple[int, int] | None:
+    """Extract submission year/month from arXiv identifier.
+
+    ArXiv IDs follow one of two schemes:
+    - YYMM.xxxxx (YYMM.xxxx before 2015), since April 2007.
+      For example: oai:arXiv.org:2401.12345 -> (2024, 1) for January 2024
+    - archive/YYMMxxx before that, back to August 1991.
+      For example: oai:arXiv.org:math/0601001 -> (2006, 1),
+      oai:arXiv.org:hep-th/9108001 -> (1991, 8)
+
+    Returns (year, month) or None if can't parse.
+    """
+    arxiv_id = identifier.rsplit(":", 1)[-1]
+    slash = arxiv_id.rfind("/")
+    if slash >= 0:
+        # Old-style: 2-digit year 91+ maps to 1991+, anything lower to 2000+
+        yymm = arxiv_id[slash + 1:slash + 5]
+        century = 1900 if yymm[:2] >= "91" else 2000
+    else:
+        # New-style: 2-digit year 07+ maps to 2007+
+        if arxiv_id[4:5] != ".":
+            return None
+        yymm = arxiv_id[:4]
+        century = 2000
+    if len(yymm) != 4 or not yymm.isdigit():
+        return None
+    mm = int(yymm[2:])
+    if 1 <= mm <= 12:
+        return (century + int(yymm[:2]), mm)
+    return None
+
+
+class HeaderRecord(NamedTuple):
+    """Compact form of an OAI-PMH <header> element."""
+    identifier: str
+    datestamp: str
+    setspecs: tuple[str, ...]
+    deleted: bool
+
+
+class OAIPageParser:
+    """
+    Incremental parser for one ListIdentifiers response.
+
+    Bytes are fed as they arrive from the network. Each completed <header>
+    is converted to a HeaderRecord and then dropped from the tree, so the
+    parser never holds more than the header currently being read.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._container: ET.Element | None = None
+        self._setspecs: dict[str, str] = {}
+        self.token: str | None = None
+        self.error_code: str | None = None
+        self.error_message: str | None = None
+        self.complete_list_size: int | None = None
+        self.cursor: int | None = None
+
+    def feed(self, data: bytes) -> list[HeaderRecord]:
+        """Feed a chunk of the response body, returning completed headers."""
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> list[HeaderRecord]:
+        """Signal end of input, returning any remaining headers."""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> list[HeaderRecord]:
+        records = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if elem.tag == LIST_TAG:
+                    self._container = elem
+                continue
+
+            if elem.tag == HEADER_TAG:
+                records.append(self._to_record(elem))
+                elem.clear()
+            elif elem.tag == TOKEN_TAG:
+                self.token = elem.text.strip() if elem.text and elem.text.strip() else None
+                self.complete_list_size = _int_attr(elem, "completeListSize")
+                self.cursor = _int_attr(elem, "cursor")
+            elif elem.tag == ERROR_TAG:
+                self.error_code = elem.get("code", "unknown")
+                self.error_message = elem.text
+
+        # Processed headers are complete; detach them so the tree stays empty
+        if self._container is not None:
+            del self._container[:]
+        return records
+
+    def _to_record(self, header: ET.Element) -> HeaderRecord:
+        identifier = ""
+        datestamp = ""
+        setspecs = []
+        for child in header:
+            if child.tag == SETSPEC_TAG:
+                if child.text:
+                    # Intern set specs: a page repeats the same few dozen values
+                    spec = self._setspecs.setdefault(child.text, child.text)
+                    setspecs.append(spec)
+            elif child.tag == IDENTIFIER_TAG:
+                identifier = child.text or ""
+            elif child.tag == DATESTAMP_TAG:
+                datestamp = child.text or ""
+        return HeaderRecord(
+            identifier, datestamp, tuple(setspecs), header.get("status") == "deleted"
+        )
+
+
+def _int_attr(elem: ET.Element, name: str) -> int | None:
+    value = elem.get(name)
+    if value is None or not value.isdigit():
+        return None
+    return int(value)
+
+
+def submission_keys(records) -> list[tuple[int, int] | None]:
+    """Submission (year, month) of every record, None where it has no parseable ID."""
+    return [
+        parse_arxiv_id_date(record.identifier) if record.identifier else None
+        for record in records
+    ]
+
+
+def count_records(records, setspec_to_column: dict[str, int], counts: CountMatrix,
+                  keys: list | None = None) -> tuple[int, int]:
+    """
+    Add header records to a CountMatrix, one cell per category of a paper.
+
+    Deleted records and records submitted outside the matrix's months are
+    skipped. `keys` are the records' submission_keys(), if already known.
+    Returns (records counted, records outside the months).
+    """
+    data = counts.data
+    width = len(counts.categories)
+    start_year, start_month = counts.start
+    months = counts.months
+    counted = out_of_range = 0
+    if keys is None:
+        keys = submission_keys(records)
+    for record, key in zip(records, keys):
+        if record.deleted or key is None:
+            continue
+        offset = (key[0] - start_year) * 12 + key[1] - start_month
+        if not 0 <= offset < months:
+            out_of_range += 1
+            continue
+
+        counted += 1
+        # Count for each category the paper belongs to
+        base = offset * width
+        for setspec in record.setspecs:
+            column = setspec_to_column.get(setspec)
+            if column is not None:
+                data[base + column] += 1
+    return counted, out_of_range
+
+
+class DigestSpec(NamedTuple):
+    """What to count on a page; sent to the worker with every page."""
+    categories: tuple[str, ...]  # CountMatrix columns
+    setspec_to_column: dict[str, int]  # setSpecs counted, and their column
+    start: tuple[int, int]
+    end: tuple[int, int]
+    setspec_bits: dict[str, int]  # setSpec -> PaperLedger category bit
+    parent_sets: tuple[str, ...] = ()  # tally records per parent (single pass)
+
+
+@dataclass
+class PageDigest:
+    """Everything the collector needs from one page, without its headers."""
+    records: int = 0
+    counted: int = 0
+    out_of_range: int = 0  # submitted outside the synced months
+    counts: CountMatrix | None = None
+    ledger: list[tuple] = field(default_factory=list)
+    density: dict[str, int] = field(default_factory=dict)  # "YYYY-MM" datestamp -> n
+    watermark: str = ""
+    parent_records: dict[str, int] = field(default_factory=dict)
+    token: str | None = None
+    error_code: str | None = None
+    error_message: str | None = None
+    complete_list_size: int | None = None
+    cursor: int | None = None
+    parse_seconds: float = 0.0  # parsing and counting, when digested from a body
+
+
+def paper_entries(records, setspec_bits: dict[str, int], keys: list | None = None) -> list[tuple]:
+    """
+    PaperLedger entries (arxiv_id, year, month, mask, datestamp, deleted)
+    for every record with a parseable submission month.
+    """
+    entries = []
+    if keys is None:
+        keys = submission_keys(records)
+    for record, key in zip(records, keys):
+        if key is None:
+            continue
+
+        mask = 0
+        for setspec in record.setspecs:
+            bit = setspec_bits.get(setspec)
+            if bit is not None:
+                mask |= 1 << bit
+        if not mask and not record.deleted:
+            continue
+
+        arxiv_id = record.identifier.rsplit(":", 1)[-1]
+        entries.append((arxiv_id, key[0], key[1], mask, record.datestamp, record.deleted))
+    return entries
+
+
+def digest_records(records, spec: DigestSpec) -> PageDigest:
+    """Count parsed header records."""
+    keys = submission_keys(records)
+    # Only allocate the months this page touches: a page of a full-history
+    # harvest covers a few of several hundred months
+    in_range = [
+        key for key, record in zip(keys, records)
+        if key is not None and not record.deleted and spec.start <= key <= spec.end
+    ]
+    if in_range:
+        counts = CountMatrix(spec.categories, min(in_range), max(in_range))
+    else:
+        counts = CountMatrix(spec.categories, spec.start, spec.start)
+    counted, out_of_range = count_records(records, spec.setspec_to_column, counts, keys)
+    density = defaultdict(int)
+    parent_records = defaultdict(int)
+    watermark = ""
+    for record in records:
+        density[record.datestamp[:7]] += 1
+        if record.datestamp > watermark:
+            watermark = record.datestamp
+        if spec.parent_sets:
+            for parent in {s.split(":", 1)[0] for s in record.setspecs}:
+                if parent in spec.parent_sets:
+                    parent_records[parent] += 1
+    return PageDigest(
+        records=len(records),
+        counted=counted,
+        out_of_range=out_of_range,
+        counts=counts.trimmed(),
+        ledger=paper_entries(records, spec.setspec_bits, keys),
+        density=dict(density),
+        watermark=watermark,
+        parent_records=dict(parent_records),
+    )
+
+
+def digest_page(body: bytes, spec: DigestSpec) -> PageDigest:
+    """Parse a whole page body and count it. Runs in the parse pool."""
+    started = time.perf_counter()
+    parser = OAIPageParser()
+    records = parser.feed(body) + parser.close()
+    digest = digest_records(records, spec)
+    digest.token = parser.token
+    digest.error_code = parser.error_code
+    digest.error_message = parser.error_message
+    digest.complete_list_size = parser.complete_list_size
+    digest.cursor = parser.cursor
+    digest.parse_seconds = time.perf_counter() - started
+    return digest
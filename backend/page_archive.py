@@ -0,0 +1,167 @@
+"""
+Append-only archive of raw OAI-PMH pages.
+
+Every ListIdentifiers page a harvest receives can be stored gzip-compressed,
+so counting logic can later be re-run against the archive at disk speed
+instead of re-harvesting arXiv.
+
+Layout of the archive directory:
+    index.jsonl      one line per completed run (set, datestamp window, sync,
+                     and the kind of harvest: full, quick, refresh, sharded)
+    <run>.pages      the run's pages, one gzip member per page
+    <run>.idx        one line per page: sequence number, offset, length, token
+
+A run is one resumption-token chain (a set, or one datestamp window of a
+set). It only appears in index.jsonl once its last page has been written,
+so partial runs from an interrupted harvest are never replayed. Only the
+runs of a full harvest reaching back to the replayed start are replayed:
+an incremental harvest holds just the records that changed.
+"""
+
+import gzip
+import json
+import re
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+PAGE_ARCHIVE_DIR = Path(__file__).parent / "page_archive"
+
+
+class ArchiveRun:
+    """Writer for the pages of one resumption-token chain."""
+
+    def __init__(self, archive: "PageArchive", run_id: str, entry: dict):
+        self.archive = archive
+        self.run_id = run_id
+        self.entry = entry
+        self.pages = 0
+        self.bytes = 0
+        self._data = open(archive.root / f"{run_id}.pages", "ab")
+        self._idx = open(archive.root / f"{run_id}.idx", "a")
+
+    def append(self, compressed: bytes, token: str | None):
+        """Append one gzip-compressed page."""
+        offset = self._data.tell()
+        self._data.write(compressed)
+        self._data.flush()
+        self._idx.write(json.dumps({
+            "seq": self.pages, "offset": offset, "length": len(compressed), "token": token
+        }) + "\n")
+        self._idx.flush()
+        self.pages += 1
+        self.bytes += len(compressed)
+
+    def finish(self):
+        """Close the run and publish it in the archive index."""
+        self._data.close()
+        self._idx.close()
+        self.archive._publish({**self.entry, "run": self.run_id, "pages": self.pages, "bytes": self.bytes})
+
+    def abandon(self):
+        """Close the run without publishing it."""
+        self._data.close()
+        self._idx.close()
+
+
+class PageArchive:
+    """Compressed, append-only store of harvested pages, indexed by set and sequence."""
+
+    def __init__(self, root: Path = PAGE_ARCHIVE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index = self.root / "index.jsonl"
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def start_run(self, set_name: str, params: dict, sync_id: str, kind: str | None = None) -> ArchiveRun:
+        """Begin archiving a new resumption-token chain of a `kind` harvest."""
+        with self._lock:
+            self._counter += 1
+            counter = self._counter
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{set_name}-{sync_id}-{counter}")
+        entry = {
+            "set": set_name,
+            "from": params.get("from"),
+            "until": params.get("until"),
+            "sync_id": sync_id,
+            "kind": kind,
+        }
+        return ArchiveRun(self, safe, entry)
+
+    def _publish(self, entry: dict):
+        with self._lock:
+            with open(self._index, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def runs(self) -> list[dict]:
+        """All completed runs, oldest first."""
+        if not self._index.exists():
+            return []
+        with open(self._index) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def latest_runs(self, set_name: str, start: str, kind: str = "full") -> list[dict]:
+        """
+        Runs of the most recent `kind` harvest of `set_name` that covers every
+        datestamp from `start` (YYYY-MM-DD) on, in window order; [] if none does.
+        """
+        by_sync: dict[str, list[dict]] = {}
+        for run in self.runs():
+            if run["set"] == set_name and run.get("kind") == kind:
+                by_sync.setdefault(run["sync_id"], []).append(run)
+        for runs in reversed(by_sync.values()):
+            runs.sort(key=lambda r: r["from"] or "")
+            if covers(runs, start):
+                return runs
+        return []
+
+    def iter_pages(self, run: dict) -> Iterator[bytes]:
+        """Yield the decompressed XML of each page of a run, in sequence."""
+        with open(self.root / f"{run['run']}.idx") as idx, \
+                open(self.root / f"{run['run']}.pages", "rb") as data:
+            for line in idx:
+                page = json.loads(line)
+                data.seek(page["offset"])
+                yield gzip.decompress(data.read(page["length"]))
+
+
+def covers(runs: list[dict], start: str) -> bool:
+    """
+    Whether runs sorted by window tile the datestamps from `start` on:
+    the first from no later than `start`, each inclusive window followed by
+    the next day, and the last one open-ended.
+    """
+    if not runs or (runs[0]["from"] or "") > start or runs[-1]["until"] is not None:
+        return False
+    for run, following in zip(runs, runs[1:]):
+        if run["until"] is None or following["from"] is None:
+            return False
+        if date.fromisoformat(run["until"]) + timedelta(days=1) != date.fromisoformat(following["from"]):
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    # Offline re-count: rebuild publication_counts from the archive, no network
+    import argparse
+    import asyncio
+    from arxiv_collector import ArxivCollector, configure_logging
+
+    arg_parser = argparse.ArgumentParser(description="Re-count archived OAI-PMH pages")
+    arg_parser.add_argument("--start-year", type=int, default=2022)
+    arg_parser.add_argument("--single-pass", action="store_true")
+    args = arg_parser.parse_args()
+    configure_logging()
+
+    async def recount():
+        collector = ArxivCollector(replay=True)
+        try:
+            await collector.sync_all_categories(
+                args.start_year, resume=False, single_pass=args.single_pass
+            )
+        finally:
+            await collector.close()
+
+    asyncio.run(recount())
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every harvest cursor.
+
+    Each request takes one token. Tokens refill at `rate` per second up to
+    `capacity`, so however many cursors run at once the combined request
+    rate never exceeds `rate` (plus an initial burst of `capacity`).
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token. Returns the number of seconds spent waiting."""
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= 1
+        return waited
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate adapts to how the server is coping (AIMD).
+
+    The rate starts at `max_rate`. Every healthy response adds `increase`
+    requests/s back (up to `max_rate`); a throttled or failed response
+    multiplies it by `decrease` (down to `min_rate`). A Retry-After from the
+    server holds every cursor for exactly that long.
+
+    A circuit breaker watches the last `window` outcomes. When the share of
+    failures reaches `error_threshold`, all cursors pause for `cooldown`
+    seconds. The first outcome after the pause decides: a success closes the
+    breaker, a failure opens it again for twice as long (up to `max_cooldown`).
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float | None = None,
+        capacity: float = 1.0,
+        increase: float | None = None,
+        decrease: float = 0.5,
+        error_threshold: float = 0.5,
+        window: int = 10,
+        cooldown: float = 60.0,
+        max_cooldown: float = 600.0
+    ):
+        super().__init__(max_rate, capacity)
+        self.max_rate = max_rate
+        self.min_rate = min_rate if min_rate is not None else max_rate / 10
+        self.increase = increase if increase is not None else max_rate / 10
+        self.decrease = decrease
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._resume_at = 0.0  # Retry-After hold
+        self._open_until = 0.0  # circuit breaker hold
+        self._half_open = False
+        self._current_cooldown = cooldown
+        self.breaker_trips = 0
+        self.throttled = 0
+        # Rates as configured; set_share() divides them between processes
+        self._policy_max_rate = max_rate
+        self._policy_min_rate = self.min_rate
+        self.share = 1
+
+    @property
+    def breaker_state(self) -> str:
+        if time.monotonic() < self._open_until:
+            return "open"
+        return "half-open" if self._half_open else "closed"
+
+    async def acquire(self) -> float:
+        """Wait for any server-requested pause, then for a token."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                hold = max(self._resume_at, self._open_until) - time.monotonic()
+                if hold > 0:
+                    await asyncio.sleep(hold)
+                    waited += hold
+                    continue
+                self._refill()
+                if self._tokens >= 1:
+                    break
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+            self._tokens -= 1
+        return waited
+
+    def set_share(self, processes: int):
+        """
+        Pace this process for `processes` harvesting at once against the same
+        server, so their combined rate stays within the configured one.
+        """
+        processes = max(1, processes)
+        if processes == self.share:
+            return
+        self._refill()
+        self.share = processes
+        self.max_rate = self._policy_max_rate / processes
+        self.min_rate = min(self._policy_min_rate, self.max_rate)
+        self.rate = min(self.rate, self.max_rate)
+        logger.info(f"Request rate shared by {processes} process(es): up to {self.max_rate:.3f}/s")
+
+    def on_success(self):
+        """A request completed normally."""
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.increase)
+        if time.monotonic() < self._open_until:
+            return  # started before the breaker opened; not a probe
+        self._outcomes.append(True)
+        if self._half_open:
+            self._half_open = False
+            self._current_cooldown = self.cooldown
+            self._outcomes.clear()
+            logger.info("Circuit breaker closed, resuming normal pacing")
+
+    def on_throttle(self, retry_after: float):
+        """The server answered 429/503 with Retry-After: hold everyone that long."""
+        self._refill()
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+
+    def on_failure(self):
+        """A request failed (timeout, connection error, 5xx without Retry-After)."""
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        if time.monotonic() < self._open_until:
+            return  # started before the breaker opened; not a probe
+        self._outcomes.append(False)
+        if self._half_open:
+            self._trip(min(self.max_cooldown, self._current_cooldown * 2))
+            return
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) == self._outcomes.maxlen
+            and failures / len(self._outcomes) >= self.error_threshold
+        ):
+            self._trip(self._current_cooldown)
+
+    def _trip(self, cooldown: float):
+        self._current_cooldown = cooldown
+        self._open_until = time.monotonic() + cooldown
+        self._half_open = True
+        self._outcomes.clear()
+        self.breaker_trips += 1
+        logger.warning(f"Circuit breaker open: pausing all cursors for {cooldown:.0f}s")
+
+    def status(self) -> dict:
+        return {
+            "rate": round(self.rate, 4),
+            "share": self.share,
+            "breaker": self.breaker_state,
+            "breaker_trips": self.breaker_trips,
+            "throttled": self.throttled,
+        }
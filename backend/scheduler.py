@@ -1,29 +1,158 @@
+"""
+Scheduled quick syncs, aligned with arXiv's announcement schedule.
+
+arXiv announces new submissions Sunday to Thursday at 20:00 US Eastern,
+and the OAI-PMH records are stamped with them shortly after; nothing is
+announced on Friday and Saturday. Each run first probes for changed records
+with a single request, then skips the sync when nothing changed, queues a
+single-pass quick sync for a small batch of changes, or a per-set one with
+more cursors for a large batch.
+
+The last slot handled is kept in sync_metadata, so a run missed while the
+process was down is caught up (once) when it starts again.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+import aiosqlite
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from arxiv_collector import collector
-import logging
+
+from arxiv_collector import PARENT_SETS, SYNC_CONCURRENCY, collector
+from database import DATABASE_PATH
+from sync_jobs import JobQueue, PRIORITY_SCHEDULED
 
 logger = logging.getLogger(__name__)
 
+SCHEDULE_TIMEZONE = "America/New_York"
+SCHEDULE = {"day_of_week": "sun,mon,tue,wed,thu", "hour": 22, "minute": 0}  # two hours after the announcement
+SINGLE_PASS_MAX_CHANGES = 20000  # changed records one single-pass cursor is given
+SCHEDULE_GRACE = 3600  # seconds a run may start late, e.g. behind a busy event loop
+SCHEDULE_LOOKBACK = timedelta(days=8)  # covers the longest gap between two slots
+
 scheduler = AsyncIOScheduler()
+trigger = CronTrigger(timezone=SCHEDULE_TIMEZONE, **SCHEDULE)
+
+
+def previous_slot(now: datetime) -> datetime | None:
+    """The latest scheduled time at or before `now`."""
+    slot = None
+    fire = trigger.get_next_fire_time(None, now - SCHEDULE_LOOKBACK)
+    while fire is not None and fire <= now:
+        slot = fire
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(seconds=1))
+    return slot
+
+
+def sync_params(changes: int | None) -> dict | None:
+    """
+    Quick sync parameters for the number of changed records, or None when
+    there is nothing to sync. An unknown number gets the default sync.
+    """
+    if changes is None:
+        return {}
+    if changes == 0:
+        return None
+    if changes <= SINGLE_PASS_MAX_CHANGES:
+        # One unfiltered list reads every changed record exactly once
+        return {"single_pass": True}
+    # Per-set lists repeat cross-listed records but run side by side
+    cursors = -(-changes // SINGLE_PASS_MAX_CHANGES)
+    return {"concurrency": max(SYNC_CONCURRENCY, min(cursors, len(PARENT_SETS)))}
+
+
+async def load_schedule_state() -> dict:
+    """The last slot handled and the probe it ran, as recorded in sync_metadata."""
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(
+            "SELECT key, value FROM sync_metadata WHERE key IN ('schedule:last_slot', 'schedule:last_run')"
+        )
+        rows = dict(await cursor.fetchall())
+    return {
+        "last_slot": rows.get("schedule:last_slot"),
+        "last_run": json.loads(rows["schedule:last_run"]) if "schedule:last_run" in rows else None,
+    }
+
+
+async def save_schedule_state(slot: datetime, run: dict):
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        await db.executemany(
+            "INSERT OR REPLACE INTO sync_metadata (key, value) VALUES (?, ?)",
+            [("schedule:last_slot", slot.isoformat()), ("schedule:last_run", json.dumps(run))]
+        )
+        await db.commit()
+
+
+async def run_slot(slot: datetime):
+    """Probe for changes and queue the quick sync they call for, if any."""
+    try:
+        probe = await collector.probe_changes()
+    except Exception as e:
+        logger.warning(f"Change probe failed, syncing anyway: {e}")
+        probe = None
+    changes = probe["changes"] if probe else None
+    params = sync_params(changes)
+
+    run = {"slot": slot.isoformat(), "probed_at": datetime.now().isoformat(), "changes": changes}
+    if params is None:
+        logger.info(f"Scheduled sync for {slot} skipped: no records changed since {probe['since']}")
+        run["action"] = "skipped"
+    else:
+        job, created = await JobQueue().enqueue("quick", params, priority=PRIORITY_SCHEDULED)
+        run.update(action="queued" if created else "joined", job_id=job.id, params=params)
+        if created:
+            logger.info(f"Scheduled sync for {slot} queued as job {job.id} ({changes} changes, {params})")
+        else:
+            logger.info(f"Scheduled sync for {slot} skipped: job {job.id} is already {job.status}")
+    await save_schedule_state(slot, run)
 
 
 async def scheduled_sync():
-    """Run scheduled sync job."""
-    logger.info("Running scheduled sync...")
-    await collector.quick_sync()
-    logger.info("Scheduled sync completed")
+    """Handle the slot that has just fired."""
+    slot = previous_slot(datetime.now(timezone.utc))
+    await run_slot(slot or datetime.now(timezone.utc))
+
+
+async def catch_up():
+    """At startup, run the latest slot if it was missed while the process was down."""
+    slot = previous_slot(datetime.now(timezone.utc))
+    if slot is None:
+        return
+    state = await load_schedule_state()
+    if state["last_slot"] is None:
+        # First start: nothing was scheduled before, so nothing was missed
+        await save_schedule_state(slot, {"slot": slot.isoformat(), "action": "initialised"})
+        return
+    if datetime.fromisoformat(state["last_slot"]) < slot:
+        logger.info(f"Catching up on the scheduled sync missed at {slot}")
+        await run_slot(slot)
+
+
+async def schedule_status() -> dict:
+    """Next scheduled run and the outcome of the last one."""
+    job = scheduler.get_job("daily_sync") if scheduler.running else None
+    state = await load_schedule_state()
+    return {
+        "next_run": job.next_run_time.isoformat() if job and job.next_run_time else None,
+        "last_slot": state["last_slot"],
+        "last_run": state["last_run"],
+    }
 
 
 def start_scheduler():
     """Start the background scheduler."""
-    # Run quick sync daily at 6 AM UTC
     scheduler.add_job(
         scheduled_sync,
-        CronTrigger(hour=6, minute=0),
+        trigger,
         id="daily_sync",
-        replace_existing=True
+        replace_existing=True,
+        misfire_grace_time=SCHEDULE_GRACE,
+        coalesce=True
     )
+    # Runs once, as soon as the scheduler starts
+    scheduler.add_job(catch_up, id="catch_up_sync", replace_existing=True)
     scheduler.start()
     logger.info("Scheduler started")
 
@@ -0,0 +1,125 @@
+"""
+Server-Sent Events for sync progress and data updates.
+
+One broadcaster per API process watches the sync status and the data
+version, and pushes changes to every connected client:
+
+    event: progress   the /api/sync/status payload, whenever it changes
+    event: data       {"version": ...} when a sync has committed new counts
+
+The data version is the `last_sync` timestamp that every sync writes in
+the same transaction as its final counts, so it also changes when the sync
+ran in a standalone worker process. The broadcaster only polls while at
+least one client is connected, and does so once for all of them.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+SSE_POLL_INTERVAL = 1.0  # seconds between status checks while clients are connected
+SSE_KEEPALIVE = 15.0  # seconds of silence before a keepalive comment
+SSE_CLIENT_BUFFER = 16  # events held per client before it is sent the latest state instead
+
+
+def format_event(event: str, data) -> str:
+    """One event in the text/event-stream format."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class SyncEventBroadcaster:
+    """Polls sync status and data version once, and fans changes out to subscribers."""
+
+    def __init__(
+        self,
+        load_status: Callable[[], Awaitable[dict]],
+        load_version: Callable[[], Awaitable[str | None]],
+        poll_interval: float = SSE_POLL_INTERVAL
+    ):
+        self.load_status = load_status
+        self.load_version = load_version
+        self.poll_interval = poll_interval
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._starting = asyncio.Lock()
+        self._status: dict | None = None
+        self._version: str | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> asyncio.Queue:
+        """
+        Register a client. Its queue starts with the current status and data
+        version, so a client never misses a change made before it connected.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_CLIENT_BUFFER)
+        async with self._starting:
+            if self._task is None:
+                self._status = await self.load_status()
+                self._version = await self.load_version()
+                self._task = asyncio.create_task(self._run())
+        queue.put_nowait(("progress", self._status))
+        queue.put_nowait(("data", {"version": self._version}))
+        self._subscribers.add(queue)
+        return queue
+
+    async def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers:
+            await self.stop()
+
+    async def stop(self):
+        """Stop polling; connected clients get no further events."""
+        self._subscribers.clear()
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def publish(self, event: str, data):
+        for queue in self._subscribers:
+            if queue.full():
+                # A client that fell behind only needs the latest state
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("progress", self._status))
+                queue.put_nowait(("data", {"version": self._version}))
+            else:
+                queue.put_nowait((event, data))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                status = await self.load_status()
+                version = await self.load_version()
+            except Exception as e:
+                logger.warning(f"Sync event poll failed: {e}")
+                continue
+            if status != self._status:
+                self._status = status
+                self.publish("progress", status)
+            if version != self._version:
+                self._version = version
+                self.publish("data", {"version": version})
+
+    async def stream(self, is_disconnected: Callable[[], Awaitable[bool]]):
+        """Event-stream text for one client, until it disconnects."""
+        queue = await self.subscribe()
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event, data)
+        finally:
+            await self.unsubscribe(queue)
@@ -0,0 +1,344 @@
+"""
+Durable queue of sync jobs, kept in the `sync_jobs` table.
+
+The API and the scheduler enqueue jobs; a SyncWorker (sync_worker.py),
+embedded in the API process or running on its own, claims and runs them.
+Because the queue lives in the database, a job survives a restart of
+either process, and syncs never overlap: a job is only claimed while no
+other job is running.
+
+Job lifecycle:
+    queued -> running -> done | failed | cancelled
+A running job whose worker stops sending heartbeats is put back in the
+queue (or failed once it has used up its attempts). A failed attempt is
+retried after a backoff.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import aiosqlite
+
+from database import DATABASE_PATH
+
+JOB_KINDS = ("full", "quick", "category", "backfill")
+PRIORITY_MANUAL = 10
+PRIORITY_SCHEDULED = 0
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 300  # seconds, multiplied by the attempt number
+STALE_AFTER = 120  # seconds without a heartbeat before a running job is reclaimed
+
+ACTIVE_STATES = ("queued", "running")
+# Params that change what a sync does; a request only joins a job that has the same
+MODE_PARAMS = ("sharded", "memory_budget_mb", "trace_memory")
+
+
+class JobConflict(Exception):
+    """An active job of the same kind runs with different mode params."""
+
+    def __init__(self, job: "SyncJob", params: dict):
+        self.job = job
+        held = {k: job.params.get(k) for k in MODE_PARAMS}
+        wanted = {k: params.get(k) for k in MODE_PARAMS}
+        super().__init__(f"{job.kind} sync job {job.id} is already {job.status} with {held}, not {wanted}")
+
+
+@dataclass
+class SyncJob:
+    id: int
+    kind: str
+    params: dict
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    worker: str | None
+    created_at: str
+    started_at: str | None
+    heartbeat_at: str | None
+    finished_at: str | None
+    run_after: str | None
+    error: str | None
+    progress: dict
+
+    @classmethod
+    def from_row(cls, row) -> "SyncJob":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            params=json.loads(row["params"] or "{}"),
+            priority=row["priority"],
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            cancel_requested=bool(row["cancel_requested"]),
+            worker=row["worker"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            heartbeat_at=row["heartbeat_at"],
+            finished_at=row["finished_at"],
+            run_after=row["run_after"],
+            error=row["error"],
+            progress=json.loads(row["progress"] or "{}"),
+        )
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class JobQueue:
+    """Operations on the sync_jobs table. Every call uses its own short connection."""
+
+    def __init__(self, path: Path = DATABASE_PATH):
+        self.path = path
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA busy_timeout = 5000")
+        return db
+
+    async def enqueue(
+        self,
+        kind: str,
+        params: dict | None = None,
+        priority: int = PRIORITY_MANUAL,
+        max_attempts: int = MAX_ATTEMPTS
+    ) -> tuple[SyncJob, bool]:
+        """
+        Queue a job unless one of the same kind is already queued or running.
+        Returns (job, created); an existing job is returned with created=False.
+        A higher priority raises the priority of an existing queued job.
+        Raises JobConflict if the active job differs in MODE_PARAMS, e.g. a
+        sharded full sync requested while a plain one is queued.
+
+        A category refresh (params {"categories": [...], "months": n}) joins
+        an active job that covers it instead; see _covering_job.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown sync job kind: {kind}")
+        db = await self._connect()
+        try:
+            # Take the write lock first so two enqueues cannot both insert
+            await db.execute("BEGIN IMMEDIATE")
+            if kind == "category":
+                row = await self._covering_job(db, params)
+            else:
+                cursor = await db.execute(
+                    "SELECT * FROM sync_jobs WHERE kind = ? AND status IN (?, ?) ORDER BY id LIMIT 1",
+                    (kind, *ACTIVE_STATES)
+                )
+                row = await cursor.fetchone()
+                if row is not None:
+                    held = json.loads(row["params"] or "{}")
+                    if any(held.get(k) != (params or {}).get(k) for k in MODE_PARAMS):
+                        await db.rollback()
+                        raise JobConflict(SyncJob.from_row(row), params or {})
+            if row is not None:
+                if row["status"] == "queued" and priority > row["priority"]:
+                    await db.execute(
+                        "UPDATE sync_jobs SET priority = ? WHERE id = ?", (priority, row["id"])
+                    )
+                await db.commit()
+                return await self.get(row["id"]), False
+
+            cursor = await db.execute("""
+                INSERT INTO sync_jobs (kind, params, priority, status, max_attempts, created_at)
+                VALUES (?, ?, ?, 'queued', ?, ?)
+            """, (kind, json.dumps(params or {}), priority, max_attempts, _now()))
+            job_id = cursor.lastrowid
+            await db.commit()
+        finally:
+            await db.close()
+        return await self.get(job_id), True
+
+    async def _covering_job(self, db: aiosqlite.Connection, params: dict):
+        """
+        The active job a category refresh is coalesced into, or None:
+        a backfill or a full sync reaching back far enough, a running refresh of the same
+        categories over at least as many months, or a queued refresh, which
+        is widened to the union of categories and the longest window.
+        """
+        cursor = await db.execute(
+            "SELECT * FROM sync_jobs WHERE kind IN ('full', 'backfill', 'category') AND status IN (?, ?) ORDER BY id",
+            ACTIVE_STATES
+        )
+        rows = await cursor.fetchall()
+        wanted, months = set(params["categories"]), params["months"]
+        now = datetime.now()
+        first_year = (now.year * 12 + now.month - months) // 12
+        for row in rows:
+            held = json.loads(row["params"] or "{}")
+            if row["kind"] == "backfill" or (
+                    row["kind"] == "full" and held.get("start_year", first_year) <= first_year):
+                return row
+            if (row["kind"] == "category" and row["status"] == "running"
+                    and wanted <= set(held["categories"]) and months <= held["months"]):
+                return row
+        for row in rows:
+            if row["kind"] == "category" and row["status"] == "queued":
+                held = json.loads(row["params"])
+                held["categories"] = sorted(wanted | set(held["categories"]))
+                held["months"] = max(months, held["months"])
+                await db.execute(
+                    "UPDATE sync_jobs SET params = ? WHERE id = ?", (json.dumps(held), row["id"])
+                )
+                return row
+        return None
+
+    async def claim(self, worker: str) -> SyncJob | None:
+        """Start the next due job, highest priority first, if none is running."""
+        now = _now()
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                UPDATE sync_jobs
+                SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?,
+                    attempts = attempts + 1, error = NULL
+                WHERE id = (
+                    SELECT id FROM sync_jobs
+                    WHERE status = 'queued' AND (run_after IS NULL OR run_after <= ?)
+                    ORDER BY priority DESC, id
+                    LIMIT 1
+                )
+                AND NOT EXISTS (SELECT 1 FROM sync_jobs WHERE status = 'running')
+                RETURNING *
+            """, (worker, now, now, now))
+            row = await cursor.fetchone()
+            await db.commit()
+        finally:
+            await db.close()
+        return SyncJob.from_row(row) if row is not None else None
+
+    async def heartbeat(self, job_id: int, progress: dict) -> bool:
+        """Record that a job is alive, with its progress. Returns True if cancellation was requested."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "UPDATE sync_jobs SET heartbeat_at = ?, progress = ? WHERE id = ? RETURNING cancel_requested",
+                (_now(), json.dumps(progress), job_id)
+            )
+            row = await cursor.fetchone()
+            await db.commit()
+        finally:
+            await db.close()
+        return bool(row and row["cancel_requested"])
+
+    async def finish(self, job_id: int, status: str, error: str | None = None, progress: dict | None = None):
+        """
+        Record the outcome of a run. A failure is queued again after a
+        backoff until the job has used its attempts.
+        """
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "SELECT attempts, max_attempts, cancel_requested FROM sync_jobs WHERE id = ?", (job_id,)
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return
+            run_after = None
+            if status == "failed" and not row["cancel_requested"] and row["attempts"] < row["max_attempts"]:
+                status = "queued"
+                run_after = (datetime.now() + timedelta(seconds=RETRY_BACKOFF * row["attempts"])).isoformat()
+            await db.execute("""
+                UPDATE sync_jobs
+                SET status = ?, error = ?, run_after = ?, worker = NULL,
+                    finished_at = CASE WHEN ? = 'queued' THEN NULL ELSE ? END,
+                    progress = COALESCE(?, progress)
+                WHERE id = ?
+            """, (
+                status, error, run_after, status, _now(),
+                json.dumps(progress) if progress is not None else None, job_id
+            ))
+            await db.commit()
+        finally:
+            await db.close()
+
+    async def release(self, job_id: int):
+        """Put a running job back in the queue without counting the attempt."""
+        db = await self._connect()
+        try:
+            await db.execute("""
+                UPDATE sync_jobs
+                SET status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'queued' END,
+                    attempts = MAX(attempts - 1, 0), worker = NULL
+                WHERE id = ? AND status = 'running'
+            """, (job_id,))
+            await db.commit()
+        finally:
+            await db.close()
+
+    async def cancel(self, job_id: int) -> SyncJob | None:
+        """Cancel a queued job now, or ask the worker running it to stop."""
+        db = await self._connect()
+        try:
+            await db.execute(
+                "UPDATE sync_jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (_now(), job_id)
+            )
+            await db.execute(
+                "UPDATE sync_jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,)
+            )
+            await db.commit()
+        finally:
+            await db.close()
+        return await self.get(job_id)
+
+    async def reclaim_stale(self, stale_after: float = STALE_AFTER) -> int:
+        """Requeue running jobs whose worker stopped sending heartbeats. Returns how many."""
+        cutoff = (datetime.now() - timedelta(seconds=stale_after)).isoformat()
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                UPDATE sync_jobs
+                SET status = CASE
+                        WHEN cancel_requested THEN 'cancelled'
+                        WHEN attempts >= max_attempts THEN 'failed'
+                        ELSE 'queued' END,
+                    error = 'worker stopped responding', worker = NULL,
+                    finished_at = CASE
+                        WHEN cancel_requested OR attempts >= max_attempts THEN ? ELSE NULL END
+                WHERE status = 'running' AND heartbeat_at < ?
+            """, (_now(), cutoff))
+            await db.commit()
+            return cursor.rowcount
+        finally:
+            await db.close()
+
+    async def get(self, job_id: int) -> SyncJob | None:
+        db = await self._connect()
+        try:
+            cursor = await db.execute("SELECT * FROM sync_jobs WHERE id = ?", (job_id,))
+            row = await cursor.fetchone()
+        finally:
+            await db.close()
+        return SyncJob.from_row(row) if row is not None else None
+
+    async def running(self) -> SyncJob | None:
+        db = await self._connect()
+        try:
+            cursor = await db.execute("SELECT * FROM sync_jobs WHERE status = 'running' LIMIT 1")
+            row = await cursor.fetchone()
+        finally:
+            await db.close()
+        return SyncJob.from_row(row) if row is not None else None
+
+    async def recent(self, limit: int = 20) -> list[SyncJob]:
+        """Active jobs first, then the most recent ones."""
+        db = await self._connect()
+        try:
+            cursor = await db.execute("""
+                SELECT * FROM sync_jobs
+                ORDER BY status IN ('queued', 'running') DESC, id DESC
+                LIMIT ?
+            """, (limit,))
+            rows = await cursor.fetchall()
+        finally:
+            await db.close()
+        return [SyncJob.from_row(row) for row in rows]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Sync worker: takes jobs from the sync_jobs queue and runs them.
+
+By default a worker runs inside the API process (EMBEDDED_WORKER in
+main.py). It can also run on its own, so the API process never harvests:
+
+    python3 sync_worker.py
+
+Any number of workers may share a database; only one job runs at a time.
+A worker with no job of its own helps with the shards of a sharded full
+sync (harvest_shards.py) run by another worker, so starting workers on
+more processes or machines spreads such a sync across them.
+While a job runs, the worker writes a heartbeat with the collector's
+progress every HEARTBEAT_INTERVAL seconds and stops the sync if the job
+has been cancelled.
+"""
+
+import asyncio
+import logging
+
+from arxiv_collector import ArxivCollector, collector as default_collector, configure_logging
+from harvest_shards import ShardQueue, process_name
+from sync_jobs import JobQueue, SyncJob
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 5.0  # seconds between queue checks while idle
+HEARTBEAT_INTERVAL = 10.0  # seconds
+
+
+class SyncWorker:
+    """Claims queued sync jobs one at a time and runs them with a collector."""
+
+    def __init__(
+        self,
+        queue: JobQueue | None = None,
+        collector: ArxivCollector = default_collector,
+        poll_interval: float = POLL_INTERVAL,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+        shards: ShardQueue | None = None
+    ):
+        self.queue = queue or JobQueue()
+        self.shards = shards or ShardQueue(self.queue.path)
+        self.collector = collector
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.name = process_name()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Run the worker loop as a background task of the current event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Stop the loop. A running job is cancelled and left to be resumed."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self):
+        """Check the queue now instead of at the next poll."""
+        self._wake.set()
+
+    async def run_forever(self):
+        logger.info(f"Sync worker {self.name} started")
+        while True:
+            try:
+                reclaimed = await self.queue.reclaim_stale()
+                if reclaimed:
+                    logger.warning(f"Requeued {reclaimed} sync job(s) whose worker stopped responding")
+                if await self.run_next() or await self.help_with_shard():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sync worker error: {e}", exc_info=True)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_next(self) -> bool:
+        """Claim and run one job. Returns False if there was nothing to run."""
+        job = await self.queue.claim(self.name)
+        if job is None:
+            return False
+        logger.info(f"Running sync job {job.id} ({job.kind}, attempt {job.attempts}/{job.max_attempts})")
+        await self.run_job(job)
+        return True
+
+    async def help_with_shard(self) -> bool:
+        """Harvest one shard of a sharded sync. Returns False if none was free."""
+        if self.collector.is_syncing:
+            return False
+        shard = await self.shards.claim(self.name)
+        if shard is None:
+            return False
+        try:
+            await self.collector.run_shard(shard, self.shards, self.name)
+        finally:
+            self.collector.rate_limiter.set_share(1)
+        return True
+
+    async def run_job(self, job: SyncJob):
+        sync = asyncio.create_task(self._run_sync(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, sync))
+        try:
+            await sync
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # The worker itself is stopping: hand the job back to the queue
+                await asyncio.shield(self.queue.release(job.id))
+                raise
+            logger.info(f"Sync job {job.id} cancelled")
+            await self._finish(job, "cancelled")
+        except Exception as e:
+            logger.error(f"Sync job {job.id} failed: {e}")
+            await self._finish(job, "failed", str(e))
+        else:
+            logger.info(f"Sync job {job.id} done")
+            await self._finish(job, "done")
+        finally:
+            heartbeat.cancel()
+            sync.cancel()
+            await asyncio.gather(heartbeat, sync, return_exceptions=True)
+
+    async def _run_sync(self, job: SyncJob):
+        params = dict(job.params)
+        if job.kind == "full" and params.pop("sharded", False):
+            await self.collector.sync_all_sharded(params.pop("start_year", 2022), **params)
+        elif job.kind == "full":
+            await self.collector.sync_all_categories(params.pop("start_year", 2022), **params)
+        elif job.kind == "backfill":
+            await self.collector.backfill(**params)
+        elif job.kind == "category":
+            await self.collector.refresh_categories(**params)
+        else:
+            await self.collector.quick_sync(**params)
+
+    async def _heartbeat(self, job: SyncJob, sync: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if await self.queue.heartbeat(job.id, self.collector.status_snapshot()):
+                logger.info(f"Cancellation requested for sync job {job.id}")
+                sync.cancel()
+                return
+
+    async def _finish(self, job: SyncJob, status: str, error: str | None = None):
+        # Shielded: the outcome is recorded even while the worker is being stopped
+        await asyncio.shield(
+            self.queue.finish(job.id, status, error, self.collector.status_snapshot())
+        )
+
+
+async def main():
+    from database import init_db, seed_categories
+
+    configure_logging()
+    await init_db()
+    await seed_categories()
+    worker = SyncWorker()
+    try:
+        await worker.run_forever()
+    finally:
+        await worker.collector.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
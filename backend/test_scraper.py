@@ -6,12 +6,13 @@ Run this before starting a full overnight sync.
 
 import asyncio
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, '.')
 
-from arxiv_collector import ArxivCollector, CATEGORY_TO_SETSPEC, MAX_RETRIES, RATE_LIMIT_DELAY
+from arxiv_collector import ArxivCollector, CATEGORY_TO_SETSPEC, MAX_RETRIES, RATE_LIMIT_DELAY, configure_logging
 
 
 async def test_oai_pmh_connection():
@@ -46,63 +47,428 @@ async def test_oai_pmh_connection():
         return False
 
 
+def mock_collector(server, **options) -> ArxivCollector:
+    """A collector harvesting `server` (a MockOAIServer) in-process, unthrottled."""
+    import httpx
+    from rate_control import AdaptiveRateLimiter
+
+    collector = ArxivCollector(base_url="http://mock/oai", **options)
+    collector.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app))
+    collector.rate_limiter = AdaptiveRateLimiter(max_rate=1e9, capacity=1e9)
+    return collector
+
+
+@asynccontextmanager
+async def offline_database():
+    """
+    Point the collector at a fresh database in a temporary directory, which
+    is yielded for archives and checkpoints; the real one is restored after.
+    """
+    import tempfile
+    from pathlib import Path
+    import arxiv_collector
+    import database
+
+    saved_path = database.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        # Both modules hold the path as a global, read at call time
+        database.DATABASE_PATH = arxiv_collector.DATABASE_PATH = Path(tmp) / "test.db"
+        try:
+            await database.init_db()
+            await database.seed_categories()
+            yield Path(tmp)
+        finally:
+            database.DATABASE_PATH = arxiv_collector.DATABASE_PATH = saved_path
+
+
+def database_snapshot() -> tuple[list, list, list]:
+    """Counts, ledger papers (without sync stamps) and watermarks of the current database."""
+    import sqlite3
+    import database
+
+    with sqlite3.connect(database.DATABASE_PATH) as db:
+        counts = db.execute("SELECT * FROM publication_counts ORDER BY 1, 2, 3").fetchall()
+        papers = db.execute(
+            "SELECT arxiv_id, year, month, categories, datestamp FROM papers ORDER BY 1"
+        ).fetchall()
+        watermarks = db.execute(
+            "SELECT key, value FROM sync_metadata WHERE key LIKE 'watermark:%' ORDER BY 1"
+        ).fetchall()
+    return counts, papers, watermarks
+
+
 async def test_category_counting():
-    """Test counting papers for a specific category."""
+    """Test counting papers for a specific category (offline, mock server)."""
     print("\n" + "=" * 60)
     print("TEST 2: Category Counting Test")
     print("=" * 60)
 
-    collector = ArxivCollector()
+    from mock_oai_server import MockOAIServer
+
+    server = MockOAIServer(records=20_000, start=(2023, 7), months=12)
+    collector = mock_collector(server)
 
     # Test counting for cs.AI in January 2024
     print("Counting cs.AI papers for January 2024...")
-
-    counts = await collector.count_papers_by_category_for_month(2024, 1, "cs")
-    await collector.close()
-
-    # Find cs.AI count
-    cs_ai_setspec = CATEGORY_TO_SETSPEC["cs.AI"]
-    cs_ai_count = counts.get(cs_ai_setspec, 0)
-
-    print(f"Results for CS parent set:")
-    ai_related = {k: v for k, v in counts.items() if "AI" in k or "LG" in k or "CV" in k}
-    for spec, count in sorted(ai_related.items()):
-        print(f"  {spec}: {count}")
-
-    if cs_ai_count > 0:
-        print(f"\nSUCCESS: cs.AI has {cs_ai_count} papers")
-        return True
-    else:
-        print(f"\nWARNING: cs.AI count is 0 (might need different date range)")
-        return len(counts) > 0  # At least some data was found
+    try:
+        counts = await collector.count_papers_by_submission_date("cs", 2024, 1, 2024, 1)
+    finally:
+        await collector.close()
+
+    month = counts.to_dict().get((2024, 1), {})
+    expected = server.expected_counts("cs", (2024, 1), (2024, 1), "2024-01-01").get((2024, 1), {})
+    print("Results for CS parent set:")
+    for cat_id in ("cs.AI", "cs.CV", "cs.LG"):
+        print(f"  {cat_id}: {month.get(cat_id, 0)}")
+
+    if not month.get("cs.AI") or month != expected:
+        print(f"\nFAILED: counts differ from the synthetic archive ({month.get('cs.AI', 0)} cs.AI papers)")
+        return False
+    print(f"\nSUCCESS: cs.AI has {month['cs.AI']} papers")
+    return True
 
 
 async def test_batch_month_fetch():
-    """Test fetching all categories for a month."""
+    """Test fetching all categories for a month in one pass (offline, mock server)."""
     print("\n" + "=" * 60)
     print("TEST 3: Batch Month Fetch Test")
     print("=" * 60)
 
-    collector = ArxivCollector()
+    from mock_oai_server import MockOAIServer
+
+    server = MockOAIServer(records=20_000, start=(2023, 7), months=12)
+    collector = mock_collector(server)
 
     print("Fetching all categories for January 2024...")
     print("(This tests the main sync logic)")
+    try:
+        counts = await collector.count_papers_by_submission_date(None, 2024, 1, 2024, 1)
+    finally:
+        await collector.close()
+
+    month = counts.to_dict().get((2024, 1), {})
+    expected = server.expected_counts(None, (2024, 1), (2024, 1), "2024-01-01").get((2024, 1), {})
+    print(f"\nResults ({len(month)} categories with data)")
+    if not month or month != expected:
+        print("\nFAILED: counts differ from the synthetic archive")
+        return False
+    print(f"\nSUCCESS: Total papers across all categories: {sum(month.values())}")
+    return True
 
-    counts = await collector.sync_month_batch(2024, 1)
-    await collector.close()
 
-    print(f"\nResults ({len(counts)} categories with data):")
-    for cat_id, count in sorted(counts.items()):
-        if count > 0:
-            print(f"  {cat_id}: {count}")
+async def test_mock_server_harvest():
+    """Harvest the local synthetic OAI-PMH server and check the counts."""
+    print("\n" + "=" * 60)
+    print("TEST: Mock Server Harvest (offline)")
+    print("=" * 60)
 
-    if len(counts) > 0:
-        total = sum(counts.values())
-        print(f"\nSUCCESS: Total papers across all categories: {total}")
-        return True
-    else:
-        print("\nFAILED: No data retrieved")
+    from mock_oai_server import MockOAIServer
+
+    server = MockOAIServer(records=20_000, page_size=1000, error_rate=0.3, retry_after=0)
+    collector = mock_collector(server)
+
+    try:
+        counts = await collector.count_papers_by_submission_date("cs", 2000, 1, 2099, 12)
+    finally:
+        await collector.close()
+
+    counts = counts.to_dict()
+    expected = server.expected_counts("cs", (2000, 1), (2099, 12), "2000-01-01")
+    print(f"{server.requests} requests, {server.errors_injected} injected errors")
+    print(f"{sum(sum(c.values()) for c in counts.values())} category-papers counted")
+    metrics = collector.metrics.report()
+    print(f"Metrics: {collector.metrics.summary()}")
+
+    if counts != expected:
+        print("FAILED: Counts differ from the synthetic archive")
+        return False
+    # Every header of the list was received, and the injected errors were retried
+    if metrics["remaining_records"] != 0 or metrics["records"] != metrics["list_size"] or not metrics["retries"]:
+        print(f"FAILED: Unexpected harvest metrics {metrics}")
+        return False
+    print("SUCCESS: Counts match the synthetic archive")
+    return True
+
+
+async def test_archive_replay():
+    """Replaying the archive after a quick sync recounts the full sync, not the quick one."""
+    print("\n" + "=" * 60)
+    print("TEST: Archive Replay (offline)")
+    print("=" * 60)
+
+    from mock_oai_server import MockOAIServer
+
+    server = MockOAIServer(records=5_000, page_size=500, start=(2023, 7), months=12)
+    async with offline_database() as tmp:
+        dirs = {"archive_dir": tmp / "archive", "checkpoint_dir": tmp / "checkpoints"}
+        collector = mock_collector(server, archive_pages=True, **dirs)
+        try:
+            await collector.sync_all_categories(2023, resume=False)
+            await collector.quick_sync()
+        finally:
+            await collector.close()
+        before = database_snapshot()
+
+        replay = ArxivCollector(replay=True, **dirs)
+        try:
+            await replay.sync_all_categories(2023, resume=False)
+            refused = False
+            try:
+                # The archived full sync starts in 2023; 2022 would count as zeros
+                await replay.sync_all_categories(2022, resume=False)
+            except ValueError as e:
+                refused = True
+                print(f"Refused: {e}")
+        finally:
+            await replay.close()
+        after = database_snapshot()
+        kinds = sorted({run["kind"] for run in replay.archive.runs()})
+
+    print(f"Archived runs of kinds {kinds}; {len(before[0])} count rows, {len(before[1])} papers")
+    if not before[1] or before[:2] != after[:2]:
+        print("FAILED: Replay changed the counts or the ledger")
+        return False
+    if not refused:
+        print("FAILED: Replay from before the archived full sync was not refused")
+        return False
+    print("SUCCESS: Replay left counts and ledger unchanged")
+    return True
+
+
+async def test_failed_page_fetch():
+    """A page that cannot be fetched fails the sync instead of truncating it."""
+    print("\n" + "=" * 60)
+    print("TEST: Failed Page Fetch (offline)")
+    print("=" * 60)
+
+    from arxiv_collector import PageFetchFailed
+    from checkpoint_log import CheckpointLog
+    from mock_oai_server import MockOAIServer
+
+    server = MockOAIServer(records=5_000, page_size=500, start=(2023, 7), months=12)
+    async with offline_database() as tmp:
+        collector = mock_collector(server, checkpoint_dir=tmp / "checkpoints")
+        try:
+            await collector.sync_all_categories(2023, resume=False)
+            before = database_snapshot()
+
+            # The third resumption request gives up, as after its last retry
+            fetch = collector._fetch_page_records
+            resumptions = 0
+
+            async def failing_fetch(params, spec=None):
+                nonlocal resumptions
+                if "resumptionToken" in params:
+                    resumptions += 1
+                    if resumptions == 3:
+                        return None
+                return await fetch(params, spec)
+
+            collector._fetch_page_records = failing_fetch
+            failed = False
+            try:
+                await collector.sync_all_categories(2023, resume=False)
+            except PageFetchFailed as e:
+                failed = True
+                print(f"Sync failed: {e}")
+            after_failure = database_snapshot()
+            kept = CheckpointLog(tmp / "checkpoints").load() is not None
+
+            # The job queue's retry resumes from the checkpoint
+            collector._fetch_page_records = fetch
+            await collector.sync_all_categories(2023)
+            resumed = database_snapshot()
+        finally:
+            await collector.close()
+
+    print(f"{len(before[1])} papers before, {len(after_failure[1])} after the failure, {len(resumed[1])} resumed")
+    if not failed:
+        print("FAILED: The sync completed despite a page it could not fetch")
+        return False
+    if after_failure[1:] != before[1:] or not kept:
+        print("FAILED: The failed sync pruned the ledger, moved watermarks or dropped its checkpoint")
+        return False
+    if resumed[:2] != before[:2]:
+        print("FAILED: The resumed sync does not match the complete one")
+        return False
+    print("SUCCESS: Ledger, watermarks and checkpoint survived the failure")
+    return True
+
+
+async def failed_shards_recover(sync) -> bool:
+    """
+    Run `sync(collector)` (a sharded sync) cleanly, then with every shard of
+    q-fin failing until it runs out of attempts, then resumed: the resumed
+    sync must retry the failed shards and match the clean one.
+    """
+    from mock_oai_server import MockOAIServer
+
+    server = MockOAIServer(records=5_000, page_size=500, start=(2023, 7), months=12)
+    async with offline_database() as tmp:
+        collector = mock_collector(server, checkpoint_dir=tmp / "checkpoints")
+        try:
+            await sync(collector)
+            clean = database_snapshot()
+
+            fetch = collector._fetch_page_records
+
+            async def failing_fetch(params, spec=None):
+                if params.get("set") == "q-fin":
+                    return None
+                return await fetch(params, spec)
+
+            collector._fetch_page_records = failing_fetch
+            failed = False
+            try:
+                await sync(collector)
+            except RuntimeError as e:
+                failed = True
+                print(f"Sync failed: {e}")
+
+            collector._fetch_page_records = fetch
+            await sync(collector)
+            resumed = database_snapshot()
+        finally:
+            await collector.close()
+
+    if not failed:
+        print("FAILED: The sync completed despite failing shards")
+        return False
+    if resumed[:2] != clean[:2]:
+        print("FAILED: The resumed sync does not match the clean one")
+        return False
+    print(f"SUCCESS: Failed shards were retried on resume ({len(resumed[1])} papers)")
+    return True
+
+
+async def test_sharded_sync_recovery():
+    """A resumed sharded full sync retries shards that failed before."""
+    print("\n" + "=" * 60)
+    print("TEST: Sharded Sync Recovery (offline)")
+    print("=" * 60)
+
+    return await failed_shards_recover(
+        lambda collector: collector.sync_all_sharded(2023, shards_per_set=2)
+    )
+
+
+async def test_backfill_recovery():
+    """A resumed backfill retries year shards that failed before."""
+    print("\n" + "=" * 60)
+    print("TEST: Backfill Recovery (offline)")
+    print("=" * 60)
+
+    return await failed_shards_recover(lambda collector: collector.backfill())
+
+
+async def test_identifier_schemes():
+    """Both arXiv ID schemes map to their submission month."""
+    print("\n" + "=" * 60)
+    print("TEST: Identifier Schemes")
+    print("=" * 60)
+
+    from oai_parser import parse_arxiv_id_date
+
+    cases = {
+        "oai:arXiv.org:2401.12345": (2024, 1),
+        "oai:arXiv.org:0704.0001": (2007, 4),
+        "oai:arXiv.org:hep-th/9108001": (1991, 8),
+        "oai:arXiv.org:math/0601001": (2006, 1),
+        "oai:arXiv.org:cond-mat/9912345": (1999, 12),
+        "oai:arXiv.org:2413.00001": None,
+    }
+    failed = {i: parse_arxiv_id_date(i) for i, want in cases.items() if parse_arxiv_id_date(i) != want}
+    if failed:
+        print(f"FAILED: {failed}")
         return False
+    print(f"SUCCESS: {len(cases)} identifiers parsed as expected")
+    return True
+
+
+async def test_schedule_plan():
+    """Scheduled runs follow arXiv's announcements and scale to the probed changes."""
+    print("\n" + "=" * 60)
+    print("TEST: Schedule Plan")
+    print("=" * 60)
+
+    from datetime import datetime, timezone
+    from scheduler import SINGLE_PASS_MAX_CHANGES, previous_slot, sync_params
+
+    # Saturday 12:00 UTC: the last announcement was Thursday evening in New York
+    slot = previous_slot(datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc))
+    if (slot.weekday(), slot.hour, slot.day) != (3, 22, 15):
+        print(f"FAILED: previous slot {slot}")
+        return False
+    plans = {
+        0: sync_params(0),
+        10: sync_params(10),
+        SINGLE_PASS_MAX_CHANGES * 4: sync_params(SINGLE_PASS_MAX_CHANGES * 4),
+    }
+    if plans[0] is not None or not plans[10].get("single_pass") or plans[SINGLE_PASS_MAX_CHANGES * 4].get("single_pass"):
+        print(f"FAILED: {plans}")
+        return False
+    print(f"SUCCESS: previous slot {slot}, plans {plans}")
+    return True
+
+
+async def test_nowcast():
+    """Announcement days and the running month's extrapolation."""
+    print("\n" + "=" * 60)
+    print("TEST: Nowcast")
+    print("=" * 60)
+
+    from database import announcement_day
+    from nowcast import extrapolate
+
+    days = [
+        announcement_day(2024, 2, "2024-02-13"),
+        announcement_day(2024, 2, "2024-03-01"),  # announced after the month ended
+        announcement_day(2024, 2, None),
+    ]
+    if days != [13, 29, 29]:
+        print(f"FAILED: announcement days {days}")
+        return False
+
+    # Reference months had 40% of their papers by this day; cs.OS has too few to use its own
+    rows = [
+        ("cs.LG", 2024, 5, 400, 1000), ("cs.LG", 2024, 6, 400, 1000), ("cs.LG", 2024, 7, 300, None),
+        ("cs.OS", 2024, 6, 1, 10), ("cs.OS", 2024, 7, 4, None),
+    ]
+    rows = [(c, y, m, upto, total if total is not None else upto) for c, y, m, upto, total in rows]
+    nowcasts = {c: estimate for c, _, estimate, _ in extrapolate(rows, 2024, 7)}
+    if nowcasts != {"cs.LG": 750, "cs.OS": 10}:
+        print(f"FAILED: {nowcasts}")
+        return False
+    print(f"SUCCESS: nowcasts {nowcasts}")
+    return True
+
+
+async def test_parse_pool_startup():
+    """Spawned parse-pool workers do not repeat the parent's start-up (log files)."""
+    print("\n" + "=" * 60)
+    print("TEST: Parse Pool Start-up")
+    print("=" * 60)
+
+    import time
+    from arxiv_collector import LOG_DIR, PARSE_WORKERS
+
+    before = set(LOG_DIR.glob("*.log"))
+    collector = ArxivCollector(parse_pool="process")
+    try:
+        # Each call occupies a worker, so every worker has to be spawned
+        pool = collector._parse_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, time.sleep, 0.5) for _ in range(PARSE_WORKERS)
+        ))
+    finally:
+        await collector.close()
+    extra = set(LOG_DIR.glob("*.log")) - before
+    if extra:
+        print(f"FAILED: workers created log files {sorted(p.name for p in extra)}")
+        return False
+    print(f"SUCCESS: {PARSE_WORKERS} workers started, no log files created")
+    return True
 
 
 async def test_configuration():
@@ -174,6 +540,7 @@ async def estimate_full_sync_time():
 
 
 async def main():
+    configure_logging()
     print("arXiv OAI-PMH Scraper Test Suite")
     print(f"Started at: {datetime.now().isoformat()}")
     print("")
@@ -182,6 +549,15 @@ async def main():
         ("OAI-PMH Connection", test_oai_pmh_connection),
         ("Category Counting", test_category_counting),
         ("Batch Month Fetch", test_batch_month_fetch),
+        ("Mock Server Harvest", test_mock_server_harvest),
+        ("Archive Replay", test_archive_replay),
+        ("Failed Page Fetch", test_failed_page_fetch),
+        ("Sharded Sync Recovery", test_sharded_sync_recovery),
+        ("Backfill Recovery", test_backfill_recovery),
+        ("Identifier Schemes", test_identifier_schemes),
+        ("Schedule Plan", test_schedule_plan),
+        ("Nowcast", test_nowcast),
+        ("Parse Pool Start-up", test_parse_pool_startup),
         ("Configuration", test_configuration),
         ("Time Estimate", estimate_full_sync_time),
     ]
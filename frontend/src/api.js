@@ -38,6 +38,16 @@ export async function getSyncStatus() {
   return response.data;
 }
 
+// Server-Sent Events: `progress` carries the sync status whenever it changes,
+// `data` the data version, which changes once a sync has committed new counts.
+// The browser reconnects on its own if the stream drops.
+export function subscribeSyncEvents({ onProgress, onData }) {
+  const source = new EventSource('/api/sync/events');
+  source.addEventListener('progress', (event) => onProgress(JSON.parse(event.data)));
+  source.addEventListener('data', (event) => onData(JSON.parse(event.data).version));
+  return () => source.close();
+}
+
 export async function getParentCategoryStats(parentId) {
   const response = await api.get(`/parent/${parentId}/stats`);
   return response.data;
@@ -1,9 +1,9 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import CategorySelector from './CategorySelector';
 import TrendChart from './TrendChart';
 import HypeIndicator from './HypeIndicator';
 import ReportViewer from './ReportViewer';
-import { getSyncStatus } from '../api';
+import { subscribeSyncEvents } from '../api';
 
 function SyncProgress({ current, total, message }) {
   const percentage = total > 0 ? Math.round((current / total) * 100) : 0;
@@ -33,28 +33,21 @@ export default function Dashboard() {
   const [selectedCategory, setSelectedCategory] = useState(null);
   const [syncStatus, setSyncStatus] = useState(null);
   const [activeTab, setActiveTab] = useState('trends');
+  // Bumped when a sync commits new data; charts refetch when it changes
+  const [dataVersion, setDataVersion] = useState(0);
+  const loadedVersion = useRef(undefined);
 
   useEffect(() => {
-    let interval;
-
-    const checkSync = async () => {
-      try {
-        const status = await getSyncStatus();
-        setSyncStatus(status);
-
-        if (status.is_syncing) {
-          interval = setTimeout(checkSync, 2000);
+    return subscribeSyncEvents({
+      onProgress: setSyncStatus,
+      onData: (version) => {
+        // The first event is the version the page was loaded with
+        if (loadedVersion.current !== undefined && version !== loadedVersion.current) {
+          setDataVersion((v) => v + 1);
         }
-      } catch (err) {
-        console.error('Failed to check sync status:', err);
-      }
-    };
-
-    checkSync();
-
-    return () => {
-      if (interval) clearTimeout(interval);
-    };
+        loadedVersion.current = version;
+      },
+    });
   }, []);
 
   return (
@@ -93,11 +86,11 @@ export default function Dashboard() {
               selectedCategory={selectedCategory}
               onSelectCategory={setSelectedCategory}
             />
-            <TrendChart categoryId={selectedCategory} />
+            <TrendChart categoryId={selectedCategory} dataVersion={dataVersion} />
           </section>
 
           <aside className="sidebar">
-            <HypeIndicator onSelectCategory={setSelectedCategory} />
+            <HypeIndicator onSelectCategory={setSelectedCategory} dataVersion={dataVersion} />
           </aside>
         </main>
       )}
@@ -67,7 +67,7 @@ function CategoryList({ title, categories, type, onSelectCategory }) {
   );
 }
 
-export default function HypeIndicator({ onSelectCategory }) {
+export default function HypeIndicator({ onSelectCategory, dataVersion }) {
   const [hypeCategories, setHypeCategories] = useState([]);
   const [decliningCategories, setDecliningCategories] = useState([]);
   const [parentCategories, setParentCategories] = useState([]);
@@ -108,7 +108,7 @@ export default function HypeIndicator({ onSelectCategory }) {
       }
     }
     fetchData();
-  }, [selectedParent]);
+  }, [selectedParent, dataVersion]);
 
   const handleFilterChange = (e) => {
     setSelectedParent(e.target.value);
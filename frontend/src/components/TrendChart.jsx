@@ -20,7 +20,7 @@ const COLORS = [
   '#06b6d4', '#ec4899', '#84cc16', '#f59e0b', '#6366f1'
 ];
 
-function SingleCategoryChart({ categoryId }) {
+function SingleCategoryChart({ categoryId, dataVersion }) {
   const [data, setData] = useState([]);
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(false);
@@ -53,7 +53,7 @@ function SingleCategoryChart({ categoryId }) {
     }
 
     fetchData();
-  }, [categoryId]);
+  }, [categoryId, dataVersion]);
 
   if (loading) return <div className="trend-chart loading">Loading...</div>;
   if (error) return <div className="trend-chart error">{error}</div>;
@@ -91,7 +91,7 @@ function SingleCategoryChart({ categoryId }) {
   );
 }
 
-function MiniTrendChart({ categoryId }) {
+function MiniTrendChart({ categoryId, dataVersion }) {
   const [data, setData] = useState([]);
   const [loading, setLoading] = useState(true);
 
@@ -111,7 +111,7 @@ function MiniTrendChart({ categoryId }) {
       }
     }
     fetchData();
-  }, [categoryId]);
+  }, [categoryId, dataVersion]);
 
   if (loading) return <div style={{ padding: '20px', color: '#6b7280' }}>Loading chart...</div>;
   if (data.length === 0) return <div style={{ padding: '20px', color: '#6b7280' }}>No data</div>;
@@ -131,7 +131,7 @@ function MiniTrendChart({ categoryId }) {
   );
 }
 
-function ParentCategoryView({ parentId }) {
+function ParentCategoryView({ parentId, dataVersion }) {
   const [stats, setStats] = useState([]);
   const [trendsData, setTrendsData] = useState({});
   const [loading, setLoading] = useState(true);
@@ -163,7 +163,7 @@ function ParentCategoryView({ parentId }) {
       }
     }
     fetchData();
-  }, [parentId]);
+  }, [parentId, dataVersion]);
 
   if (loading) return <div className="trend-chart loading">Loading all subcategories...</div>;
   if (error) return <div className="trend-chart error">{error}</div>;
@@ -323,7 +323,7 @@ function ParentCategoryView({ parentId }) {
                 {expandedCategory === s.category_id && (
                   <tr style={{ background: '#f8fafc' }}>
                     <td colSpan={6} style={{ padding: '0 20px 20px 20px', borderBottom: '1px solid #e5e7eb' }}>
-                      <MiniTrendChart categoryId={s.category_id} />
+                      <MiniTrendChart categoryId={s.category_id} dataVersion={dataVersion} />
                     </td>
                   </tr>
                 )}
@@ -336,7 +336,7 @@ function ParentCategoryView({ parentId }) {
   );
 }
 
-export default function TrendChart({ categoryId }) {
+export default function TrendChart({ categoryId, dataVersion }) {
   if (!categoryId) {
     return (
       <div className="trend-chart empty">
@@ -348,8 +348,8 @@ export default function TrendChart({ categoryId }) {
   // Check if it's a parent category view
   if (categoryId.startsWith('parent:')) {
     const parentId = categoryId.replace('parent:', '');
-    return <ParentCategoryView parentId={parentId} />;
+    return <ParentCategoryView parentId={parentId} dataVersion={dataVersion} />;
   }
 
-  return <SingleCategoryChart categoryId={categoryId} />;
+  return <SingleCategoryChart categoryId={categoryId} dataVersion={dataVersion} />;
 }